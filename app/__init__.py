@@ -7,6 +7,8 @@ from flask_migrate import Migrate
 from .core.config import config
 from .models.models import db
 from .commands import register_commands
+from .services.fetch_pool import configure_rate_limits
+from .services.provider_registry import configure_providers
 
 # Initialize extensions globally but do not bind them to an app yet
 migrate = Migrate()
@@ -21,12 +23,28 @@ def create_app(config_name='default'):
     # Initialize extensions with the app instance
     db.init_app(app)
     migrate.init_app(app, db)
+    configure_rate_limits(app.config.get('PROVIDER_RATE_LIMITS'))
+    configure_providers(app.config)
     # Allow requests specifically from your frontend's origin for all API routes
     CORS(app, resources={r"/api/*": {"origins": ["http://localhost:3000", "http://localhost:8501"]}})
 
     # Register custom CLI commands (e.g., 'flask test') and shell context
     register_commands(app)
 
+    # --- Configure Market Data Providers and In-Process Caches ---
+    from .services.providers import configure_market_data_providers
+    from .services.market_data_service import configure_caches
+    from .services.refresh_policy import configure_access_tracking
+    from .services.summary_cache import configure_summary_cache
+    configure_market_data_providers(app.config)
+    configure_caches(app.config)
+    configure_access_tracking(app.config)
+    configure_summary_cache(app.config)
+
+    # --- Start Background Job Workers ---
+    from .services.job_service import configure_job_queue
+    configure_job_queue(app.config)
+
     # --- Register API Blueprints ---
     from .api.portfolio_routes import portfolio_bp
     from .api.transaction_routes import transaction_bp
@@ -34,6 +52,8 @@ def create_app(config_name='default'):
     from .api.market_data_routes import market_data_bp
     from .api.order_routes import order_bp
     from .api.account_routes import account_bp 
+    from .api.admin_routes import admin_bp
+    from .api.job_routes import job_bp
 
     app.register_blueprint(portfolio_bp, url_prefix='/api/v1/portfolio')
     app.register_blueprint(transaction_bp, url_prefix='/api/v1/transactions')
@@ -41,6 +61,8 @@ def create_app(config_name='default'):
     app.register_blueprint(market_data_bp, url_prefix='/api/v1/market')
     app.register_blueprint(order_bp, url_prefix='/api/v1/orders')
     app.register_blueprint(account_bp, url_prefix='/api/v1/accounts')
+    app.register_blueprint(admin_bp, url_prefix='/api/v1/admin')
+    app.register_blueprint(job_bp, url_prefix='/api/v1/jobs')
 
     # --- Swagger UI Configuration ---
     SWAGGER_URL = '/api/docs'
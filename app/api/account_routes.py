@@ -2,6 +2,8 @@
 
 from flask import Blueprint, jsonify, request
 from app.models.models import db, Account, Transaction, Portfolio, TransactionType
+from app.services.portfolio_service import holdings_totals, EMPTY_TOTALS
+from app.services.summary_cache import invalidate_portfolios
 from decimal import Decimal
 from datetime import date
 
@@ -30,6 +32,7 @@ def create_account():
     )
     db.session.add(new_account)
     db.session.commit()
+    invalidate_portfolios(new_account.portfolio_id)
 
     return jsonify({
         "message": "Account created successfully.",
@@ -47,10 +50,12 @@ def get_accounts_for_portfolio(portfolio_id):
     if not account:
         return jsonify([]), 200 # Return empty list if no account exists yet
 
+    # Holdings are valued by the grouped SQL aggregate rather than by loading each holding and its asset.
+    totals = holdings_totals(account_ids=[account.id]).get(account.id, EMPTY_TOTALS)
     account_data = [{
         "id": account.id,
         "name": account.name,
-        "balance": float(account.balance + account.holdings_market_value)
+        "balance": float(account.balance + totals["market_value"])
     }]
     return jsonify(account_data), 200
 
@@ -94,6 +99,7 @@ def manage_funds(account_id):
     )
     db.session.add(transaction)
     db.session.commit()
+    invalidate_portfolios(account.portfolio_id)
 
     return jsonify({
         "message": f"{action.capitalize()} successful.",
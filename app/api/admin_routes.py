@@ -0,0 +1,43 @@
+# app/api/admin_routes.py
+
+from flask import Blueprint, jsonify, request
+from app.services.market_data_service import MarketDataService
+from app.services.provider_registry import provider_registry
+from app.services.providers import market_data_providers
+from app.services.refresh_policy import get_refresh_stats
+
+admin_bp = Blueprint('admin_bp', __name__)
+
+@admin_bp.route('/providers', methods=['GET'])
+def get_provider_status():
+    """
+    Returns the circuit breaker state and rolling latency/error statistics of every market data
+    provider, plus the order in which fallback chains currently try them.
+    """
+    # In a real app, this would be a protected admin endpoint
+    return jsonify({
+        "providers": provider_registry.snapshot(),
+        "order": provider_registry.ordered(name for name, provider in market_data_providers.items() if provider.is_configured()),
+        "caches": MarketDataService.get_cache_stats()
+    }), 200
+
+@admin_bp.route('/providers/<string:name>/reset', methods=['POST'])
+def reset_provider(name):
+    """Closes a provider's circuit breaker so it is tried again immediately."""
+    if name not in provider_registry.snapshot():
+        return jsonify({"error": f"Unknown provider: {name}"}), 404
+    provider_registry.reset(name)
+    return jsonify({"message": f"Circuit breaker for {name} reset.", "provider": provider_registry.snapshot()[name]}), 200
+
+@admin_bp.route('/refresh-stats', methods=['GET'])
+def get_refresh_stats_route():
+    """
+    Returns each asset's adaptive refresh interval with the volatility and access statistics behind it,
+    and the provider calls per minute those intervals need. Query params: limit (default 100), sort
+    (interval, access or volatility).
+    """
+    limit = min(max(request.args.get('limit', 100, type=int), 1), 1000)
+    try:
+        return jsonify(get_refresh_stats(limit, request.args.get('sort', 'interval'))), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
@@ -0,0 +1,35 @@
+# app/api/conditional.py
+
+from functools import wraps
+from flask import request, make_response
+from app.services.summary_cache import portfolio_version
+
+def portfolio_etag(extra_tag=None, on_not_modified=None):
+    """
+    Tags a portfolio GET route with the portfolio's version token as its ETag and answers a matching
+    If-None-Match with 304 before the view runs, so unchanged portfolios cost one cache read instead of
+    any valuation work. The token is replaced by every holding, transaction, fund, watchlist and held or
+    watched asset price write (see summary_cache), which also makes it valid for the watchlist routes.
+    Conditional GET is only enabled with the shared summary cache backend (see portfolio_version).
+    `extra_tag(**view_args)` may return a string mixed into the ETag for inputs that change on their own,
+    and `on_not_modified(**view_args)` runs side effects the view would have had (e.g. access tracking).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**view_args):
+            etag = portfolio_version(view_args['portfolio_id'])
+            if etag is None: return view(**view_args)
+            extra = extra_tag(**view_args) if extra_tag else None
+            if extra: etag = f"{etag}-{extra}"
+
+            if request.if_none_match.contains(etag):
+                if on_not_modified: on_not_modified(**view_args)
+                response = make_response('', 304)
+            else:
+                response = make_response(view(**view_args))
+                if response.status_code != 200: return response
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,14 @@
+# app/api/job_routes.py
+
+from flask import Blueprint, jsonify
+from app.services.job_service import get_job_status
+
+job_bp = Blueprint('job_bp', __name__)
+
+@job_bp.route('/<int:job_id>', methods=['GET'])
+def get_job_route(job_id):
+    """Returns a background job's status, progress (tickers done/failed) and estimated time remaining."""
+    job = get_job_status(job_id)
+    if not job:
+        return jsonify({"error": "Job not found."}), 404
+    return jsonify(job), 200
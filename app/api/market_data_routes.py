@@ -1,23 +1,48 @@
-from flask import Blueprint, jsonify, request
-from app.services.market_data_service import MarketDataService
+from datetime import datetime
+from flask import Blueprint, jsonify, request, url_for
+from app.services.market_data_service import MarketDataService, HISTORY_FIELDS, HISTORY_INTERVALS
+from app.services.job_service import enqueue_history_update, enqueue_price_refresh, job_to_dict
+from app.services.refresh_policy import record_asset_access
+from app.services.symbol_search import search_symbols
 
 market_data_bp = Blueprint('market_data_bp', __name__)
 
 @market_data_bp.route('/search', methods=['GET'])
 def search_assets_route():
-    """Search for assets by ticker or name."""
+    """Search for assets by ticker or company name, ranked from the local symbol universe."""
     query = request.args.get('q', '')
     if len(query) < 2:
         return jsonify({"error": "Search query must be at least 2 characters long"}), 400
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
     
-    results = MarketDataService.search_assets(query)
+    results = search_symbols(query, limit)
     return jsonify(results), 200
 
 @market_data_bp.route('/asset/<string:ticker>', methods=['GET'])
 def get_asset_details_route(ticker):
-    """Get detailed information and historical data for a specific asset."""
+    """
+    Get detailed information and historical data for a specific asset.
+    Optional query parameters: start/end (YYYY-MM-DD), fields (comma-separated, e.g. open,close,volume),
+    interval (1d, 1wk or 1mo) and max_points (downsamples the history for charting).
+    """
+    try:
+        start = datetime.strptime(request.args['start'], '%Y-%m-%d').date() if request.args.get('start') else None
+        end = datetime.strptime(request.args['end'], '%Y-%m-%d').date() if request.args.get('end') else None
+    except ValueError:
+        return jsonify({"error": "start and end must be dates in YYYY-MM-DD format"}), 400
+    fields = [f.strip() for f in request.args.get('fields', 'close').split(',') if f.strip()]
+    if not fields or any(f not in HISTORY_FIELDS for f in fields):
+        return jsonify({"error": f"fields must be a comma-separated subset of: {', '.join(HISTORY_FIELDS)}"}), 400
+    interval = request.args.get('interval', '1d')
+    if interval not in HISTORY_INTERVALS:
+        return jsonify({"error": f"interval must be one of: {', '.join(HISTORY_INTERVALS)}"}), 400
+    max_points = request.args.get('max_points', type=int)
+    if 'max_points' in request.args and (max_points is None or max_points < 3):
+        return jsonify({"error": "max_points must be an integer of at least 3"}), 400
+
     try:
-        details = MarketDataService.get_asset_details(ticker)
+        details = MarketDataService.get_asset_details(ticker, start=start, end=end, fields=fields, interval=interval, max_points=max_points)
+        record_asset_access(details['asset_id'])
         return jsonify(details), 200
     except ValueError as e:
         return jsonify({"error": str(e)}), 404
@@ -31,21 +56,31 @@ def get_asset_news_route(ticker):
     except Exception as e:
         return jsonify({"error": f"An unexpected error occurred: {str(e)}"}), 500
 
+def _job_accepted(job, created: bool, description: str):
+    """[Internal Helper] 202 response pointing at the job's status endpoint."""
+    message = f"{description} queued." if created else f"{description} is already {job.status.value.lower()}."
+    response = jsonify({"message": message, "deduplicated": not created, "job": job_to_dict(job)})
+    response.headers['Location'] = url_for('job_bp.get_job_route', job_id=job.id)
+    return response, 202
+
 @market_data_bp.route('/update-history/<int:asset_id>', methods=['POST'])
 def update_history_route(asset_id):
-    """Manually trigger an update of historical data for an asset."""
+    """Queues an update of historical data for an asset. Poll GET /api/v1/jobs/<id> for progress."""
     # In a real app, this would be a protected admin endpoint
-    MarketDataService.update_historical_data(asset_id)
-    return jsonify({"message": "Historical data update initiated."}), 202
+    try:
+        job, created = enqueue_history_update(asset_id)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
+    return _job_accepted(job, created, "Historical data update")
 
 @market_data_bp.route('/refresh-prices', methods=['POST'])
 def refresh_prices_route():
     """
-    Manually triggers a server-side process to update the latest market prices
-    for all assets from external data providers.
+    Queues a server-side job that updates the latest market prices for all assets from external
+    data providers. Only one refresh runs at a time; a second request returns the running job.
     """
     try:
-        MarketDataService.update_asset_prices()
-        return jsonify({"message": "Market price refresh completed successfully."}), 200
+        job, created = enqueue_price_refresh()
     except Exception as e:
-        return jsonify({"error": f"An unexpected error occurred during the refresh: {str(e)}"}), 500
\ No newline at end of file
+        return jsonify({"error": f"An unexpected error occurred while queueing the refresh: {str(e)}"}), 500
+    return _job_accepted(job, created, "Market price refresh")
\ No newline at end of file
@@ -1,20 +1,35 @@
 # app/api/portfolio_routes.py
 
-from flask import Blueprint, jsonify
-from ..services.portfolio_service import get_portfolio_summary, get_total_holdings_value, get_detailed_holdings
-from ..models.models import Portfolio
+from flask import Blueprint, jsonify, request
+from ..services.portfolio_service import (
+    get_portfolio_summary, get_total_holdings_value, get_detailed_holdings, holdings_totals, parse_summary_fields, EMPTY_TOTALS
+)
+from ..services.summary_cache import indices_version
+from ..models.models import db, Portfolio
+from .conditional import portfolio_etag
 
 portfolio_bp = Blueprint('portfolio_bp', __name__)
 
+def _summary_indices_tag(portfolio_id):
+    """[Internal Helper] Market indices change without any portfolio write, so their shared version token joins the ETag."""
+    fields = parse_summary_fields(request.args.get('fields'))
+    if fields and 'indices' not in fields: return None
+    return indices_version()
+
 @portfolio_bp.route('/<int:portfolio_id>/summary', methods=['GET'])
+@portfolio_etag(extra_tag=_summary_indices_tag)
 def get_summary_route(portfolio_id):
-    """Endpoint to get a full summary of a portfolio."""
-    summary, error = get_portfolio_summary(portfolio_id)
+    """Endpoint to get a summary of a portfolio, optionally only some sections (?fields=performance,movers)."""
+    try:
+        summary, error = get_portfolio_summary(portfolio_id, parse_summary_fields(request.args.get('fields')))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     if error:
         return jsonify({"error": error}), 404
     return jsonify(summary), 200
 
 @portfolio_bp.route('/<int:portfolio_id>/holdings', methods=['GET'])
+@portfolio_etag()
 def get_holdings_route(portfolio_id):
     """Endpoint to get a detailed list of all holdings in a portfolio."""
     holdings, error = get_detailed_holdings(portfolio_id)
@@ -23,6 +38,7 @@ def get_holdings_route(portfolio_id):
     return jsonify(holdings), 200
 
 @portfolio_bp.route('/<int:portfolio_id>/holdings-value', methods=['GET'])
+@portfolio_etag()
 def get_holdings_value_route(portfolio_id):
     """Endpoint to get the total market value of all holdings in a portfolio."""
     value, error = get_total_holdings_value(portfolio_id)
@@ -31,40 +47,38 @@ def get_holdings_value_route(portfolio_id):
     return jsonify(value), 200
 
 @portfolio_bp.route('/<int:portfolio_id>/performance/movers', methods=['GET'])
+@portfolio_etag()
 def get_movers_route(portfolio_id):
     """Endpoint to get only the top 5 daily gainers and losers for a portfolio."""
-    summary, error = get_portfolio_summary(portfolio_id)
+    summary, error = get_portfolio_summary(portfolio_id, fields=['movers'])
     if error:
         return jsonify({"error": error}), 404
-    
-    movers = {
-        "top_gainers": summary.get("insights", {}).get("top_gainers", []),
-        "top_losers": summary.get("insights", {}).get("top_losers", [])
-    }
-    return jsonify(movers), 200
+    return jsonify(summary["insights"]), 200
 
 @portfolio_bp.route('/<int:portfolio_id>/allocation', methods=['GET'])
+@portfolio_etag()
 def get_allocation_route(portfolio_id):
-    """Endpoint to get the portfolio's asset allocation by sector."""
-    summary, error = get_portfolio_summary(portfolio_id)
+    """Endpoint to get the portfolio's allocation by asset type (assets carry no sector data)."""
+    summary, error = get_portfolio_summary(portfolio_id, fields=['allocation'])
     if error:
         return jsonify({"error": error}), 404
-
-    allocation = summary.get("insights", {}).get("sector_allocation", {})
-    return jsonify(allocation), 200
+    return jsonify(summary["allocation"]), 200
 
 @portfolio_bp.route('/<int:portfolio_id>/accounts', methods=['GET'])
+@portfolio_etag()
 def get_accounts_route(portfolio_id):
     """Endpoint to retrieve all financial accounts for a specific portfolio."""
-    portfolio = Portfolio.query.get(portfolio_id)
+    portfolio = db.session.get(Portfolio, portfolio_id)
     if not portfolio:
         return jsonify({"error": "Portfolio not found"}), 404
 
+    # Holdings values for every account come from one grouped query.
+    totals = holdings_totals(portfolio_id)
     accounts_data = [{
         "id": acc.id,
         "name": acc.name,
         "account_type": acc.account_type.value,
-        "balance": float(acc.balance + acc.holdings_market_value)
+        "balance": float(acc.balance + totals.get(acc.id, EMPTY_TOTALS)["market_value"])
     } for acc in portfolio.accounts]
     
     return jsonify(accounts_data), 200
\ No newline at end of file
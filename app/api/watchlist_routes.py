@@ -2,14 +2,22 @@
 
 from flask import Blueprint, jsonify, request
 from app.services import watchlist_service
+from app.services.refresh_policy import record_asset_access
+from .conditional import portfolio_etag
 
 watchlist_bp = Blueprint('watchlist_bp', __name__)
 
+def _record_watched_access(portfolio_id):
+    """[Internal Helper] A 304 is still a view of the watched assets, so it keeps them hot for refreshes."""
+    record_asset_access(*watchlist_service.watched_asset_ids(portfolio_id))
+
 @watchlist_bp.route('/<int:portfolio_id>', methods=['GET'])
+@portfolio_etag(on_not_modified=_record_watched_access)
 def get_watchlists_route(portfolio_id):
     """Get all watchlists for a portfolio."""
     try:
         watchlists = watchlist_service.get_all_watchlists(portfolio_id)
+        record_asset_access(*(item['asset_id'] for wl in watchlists for item in wl['items']))
         return jsonify(watchlists), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -1,8 +1,11 @@
 # app/commands.py
 
 import click
+import os
+import tempfile
+import time
 import unittest
-from .models.models import db, User, Portfolio, Account, Asset, Holding, Transaction, Watchlist, WatchlistItem, HistoricalPrice
+from .models.models import db, User, Portfolio, Account, Asset, AssetType, Holding, Transaction, Watchlist, WatchlistItem, HistoricalPrice, SymbolListing
 
 def register_commands(app):
     """Register custom CLI commands for the Flask app."""
@@ -13,7 +16,7 @@ def register_commands(app):
         return dict(
             db=db, User=User, Portfolio=Portfolio, Account=Account, Asset=Asset, 
             Holding=Holding, Transaction=Transaction, Watchlist=Watchlist, 
-            WatchlistItem=WatchlistItem, HistoricalPrice=HistoricalPrice
+            WatchlistItem=WatchlistItem, HistoricalPrice=HistoricalPrice, SymbolListing=SymbolListing
         )
 
     @app.cli.command()
@@ -25,3 +28,102 @@ def register_commands(app):
         else:
             tests = unittest.TestLoader().discover('tests', pattern='test*.py')
         unittest.TextTestRunner(verbosity=2).run(tests)
+
+    @app.cli.command('load-symbols')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    def load_symbols(path):
+        """Bulk-load the symbol search universe from a listings CSV or JSON file."""
+        from .services.symbol_search import load_symbol_file
+        count = load_symbol_file(path)
+        click.echo(f"Loaded {count} symbols from {path}.")
+
+    @app.cli.command('record-market-data')
+    @click.argument('tickers', nargs=-1, required=True)
+    @click.option('--out', 'data_dir', default=None, help='Directory to write recordings to (defaults to LOCAL_PROVIDER_DATA_DIR).')
+    def record_market_data(tickers, data_dir):
+        """Record live provider responses for TICKERS so the local provider can replay them offline."""
+        from .services.market_data_service import MarketDataService
+        from .services.providers import LocalProvider
+        data_dir = data_dir or app.config.get('LOCAL_PROVIDER_DATA_DIR') or 'market_data_recordings'
+        for ticker in (t.upper() for t in tickers):
+            profile = MarketDataService._get_profile(ticker)
+            if not profile:
+                click.echo(f"Skipping {ticker}: no provider returned a quote."); continue
+            bars = MarketDataService._fetch_historical_data(ticker)
+            LocalProvider.save_recording(data_dir, ticker, profile, bars)
+            click.echo(f"Recorded {ticker} ({len(bars)} bars) to {data_dir}.")
+
+    @app.cli.command('run-scheduler')
+    @click.option('--once', is_flag=True, help='Run whichever tiers are due now and exit.')
+    def run_scheduler(once):
+        """
+        Refresh prices on a market-hours schedule: held and pending-order assets every
+        SCHEDULER_HELD_INTERVAL_SECONDS, watchlist assets every SCHEDULER_WATCHLIST_INTERVAL_SECONDS,
+        and everything after the close. Weekends, exchange holidays and off-hours are skipped.
+        """
+        from .services.refresh_scheduler import RefreshScheduler
+        scheduler = RefreshScheduler.from_config(app.config)
+        if once:
+            refreshed = scheduler.run_once()
+            click.echo(f"Refreshed: {refreshed or 'nothing due'}")
+            return
+        try:
+            scheduler.run_forever()
+        except KeyboardInterrupt:
+            click.echo("Scheduler stopped.")
+
+    @app.cli.command('benchmark-refresh')
+    @click.option('--assets', 'asset_count', default=1000, show_default=True, help='Number of synthetic BENCH assets to include.')
+    @click.option('--phase', type=click.Choice(['prices', 'history', 'details', 'all']), default='all', show_default=True)
+    @click.option('--database', 'database_uri', default=None,
+                  help='Database URI to benchmark against (defaults to a throwaway SQLite file; rows written elsewhere are kept).')
+    def benchmark_refresh(asset_count, phase, database_uri):
+        """
+        Time the refresh pipeline offline against the local provider, on synthetic BENCHnnnnn assets in a
+        separate database so the configured one is never touched. LOCAL_PROVIDER_* settings control injected
+        latency and errors; pass --database to time writes against a scratch MySQL schema instead of SQLite.
+        """
+        from flask import Flask
+        from .services.provider_registry import provider_registry
+        from .services.providers import configure_market_data_providers
+        configure_market_data_providers({**app.config, 'MARKET_DATA_PROVIDERS': ['local']})
+
+        with tempfile.TemporaryDirectory(prefix='benchmark-refresh-') as scratch_dir:
+            bench_app = Flask(app.import_name)
+            bench_app.config.update(app.config)
+            bench_app.config['SQLALCHEMY_DATABASE_URI'] = database_uri or f"sqlite:///{os.path.join(scratch_dir, 'benchmark.db')}"
+            db.init_app(bench_app)
+            with bench_app.app_context():
+                try:
+                    results, asset_count = _run_refresh_benchmark(asset_count, phase)
+                finally:
+                    db.session.remove()
+                    db.engine.dispose()
+
+        for name, elapsed in results:
+            click.echo(f"{name}: {elapsed:.2f}s for {asset_count} assets ({asset_count / elapsed:.0f} assets/s)")
+        click.echo(f"local provider: {provider_registry.snapshot().get('local')}")
+
+def _run_refresh_benchmark(asset_count, phase):
+    """[Internal Helper] Creates any missing BENCH assets in the current app's database and times each refresh phase."""
+    from .services.market_data_service import MarketDataService
+    db.create_all()
+    tickers = [f"BENCH{i:05d}" for i in range(1, asset_count + 1)]
+    existing = {t for (t,) in db.session.query(Asset.ticker_symbol).filter(Asset.ticker_symbol.like('BENCH%'))}
+    db.session.add_all(
+        Asset(ticker_symbol=t, name=f"{t} Synthetic Holdings", asset_type=AssetType.STOCK) for t in tickers if t not in existing
+    )
+    db.session.commit()
+    asset_ids = [asset_id for (asset_id,) in db.session.query(Asset.id).filter(Asset.ticker_symbol.in_(tickers))]
+
+    phases = {
+        'prices': lambda: MarketDataService.update_asset_prices(asset_ids=asset_ids),
+        'history': lambda: MarketDataService.update_all_historical_data(asset_ids),
+        'details': lambda: MarketDataService.update_all_asset_details(asset_ids=asset_ids),
+    }
+    results = []
+    for name in (phases if phase == 'all' else [phase]):
+        started = time.perf_counter()
+        phases[name]()
+        results.append((name, time.perf_counter() - started))
+    return results, len(asset_ids)
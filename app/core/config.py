@@ -1,4 +1,5 @@
 import os
+from datetime import date
 from dotenv import load_dotenv
 
 basedir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
@@ -8,6 +9,121 @@ class Config:
     """Base configuration class."""
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'a-hard-to-guess-string'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # --- Market Data ---
+    # Number of tickers sent per multi-symbol provider request during bulk refreshes.
+    MARKET_DATA_BATCH_SIZE = int(os.environ.get('MARKET_DATA_BATCH_SIZE', 100))
+    # Maximum number of provider requests in flight during bulk refreshes.
+    MARKET_DATA_MAX_WORKERS = int(os.environ.get('MARKET_DATA_MAX_WORKERS', 8))
+    # Number of historical bars written per bulk upsert statement.
+    HISTORICAL_UPSERT_CHUNK_SIZE = int(os.environ.get('HISTORICAL_UPSERT_CHUNK_SIZE', 1000))
+    # In-process yfinance caches: prices go stale quickly, names/descriptions/listing dates do not.
+    QUOTE_CACHE_PRICE_TTL = int(os.environ.get('QUOTE_CACHE_PRICE_TTL', 15))
+    QUOTE_CACHE_METADATA_TTL = int(os.environ.get('QUOTE_CACHE_METADATA_TTL', 6 * 60 * 60))
+    QUOTE_CACHE_MAX_SIZE = int(os.environ.get('QUOTE_CACHE_MAX_SIZE', 5000))
+    # How long a ticker that no provider could resolve is rejected without asking the providers again.
+    UNRESOLVABLE_TICKER_TTL = int(os.environ.get('UNRESOLVABLE_TICKER_TTL', 15 * 60))
+    # Market index quotes for portfolio summaries are served from memory and refreshed in the background.
+    INDEX_SNAPSHOT_REFRESH_SECONDS = int(os.environ.get('INDEX_SNAPSHOT_REFRESH_SECONDS', 60))
+    INDEX_SNAPSHOT_BACKGROUND = True
+    # Asset details are served from the database and refreshed in the background once the quote is older than this.
+    ASSET_PRICE_MAX_AGE_SECONDS = int(os.environ.get('ASSET_PRICE_MAX_AGE_SECONDS', 15 * 60))
+    # Refreshes only write quotes that changed. An unchanged quote's price_updated_at is re-stamped (a narrow
+    # single-column UPDATE) only once it is older than this, so it never looks stale to the check above.
+    ASSET_PRICE_TOUCH_SECONDS = int(os.environ.get('ASSET_PRICE_TOUCH_SECONDS', 5 * 60))
+    # The in-memory symbol search index is rebuilt from the database after this many seconds.
+    SYMBOL_INDEX_REFRESH_SECONDS = int(os.environ.get('SYMBOL_INDEX_REFRESH_SECONDS', 60 * 60))
+    # On-disk cache of provider responses shared by all workers and update runs. Profiles are reused for their
+    # metadata for up to the metadata TTL, but their prices only for the quote max age; history downloads are
+    # reused for the same date window until the history TTL passes. Batch quotes are never cached on disk.
+    PROVIDER_RESPONSE_CACHE_DIR = os.environ.get('PROVIDER_RESPONSE_CACHE_DIR', os.path.join(basedir, 'instance', 'provider_cache'))
+    PROVIDER_RESPONSE_CACHE_MAX_MB = int(os.environ.get('PROVIDER_RESPONSE_CACHE_MAX_MB', 512))
+    PROVIDER_RESPONSE_CACHE_METADATA_TTL = int(os.environ.get('PROVIDER_RESPONSE_CACHE_METADATA_TTL', 24 * 60 * 60))
+    PROVIDER_RESPONSE_CACHE_QUOTE_MAX_AGE = int(os.environ.get('PROVIDER_RESPONSE_CACHE_QUOTE_MAX_AGE', 60))
+    PROVIDER_RESPONSE_CACHE_HISTORY_TTL = int(os.environ.get('PROVIDER_RESPONSE_CACHE_HISTORY_TTL', 60 * 60))
+    # Market data providers in preference order. 'local' replays recordings from LOCAL_PROVIDER_DATA_DIR
+    # (and synthesizes anything else) for offline benchmarks, with optional injected latency and errors.
+    MARKET_DATA_PROVIDERS = [p.strip() for p in os.environ.get('MARKET_DATA_PROVIDERS', 'yfinance,twelvedata,tiingo').split(',') if p.strip()]
+    TWELVE_DATA_API_KEY = os.environ.get('TWELVE_DATA_API_KEY')
+    TIINGO_API_KEY = os.environ.get('TIINGO_API_KEY')
+    LOCAL_PROVIDER_DATA_DIR = os.environ.get('LOCAL_PROVIDER_DATA_DIR')
+    LOCAL_PROVIDER_SYNTHESIZE = os.environ.get('LOCAL_PROVIDER_SYNTHESIZE', 'true').lower() == 'true'
+    LOCAL_PROVIDER_LATENCY_MS = float(os.environ.get('LOCAL_PROVIDER_LATENCY_MS', 0))
+    LOCAL_PROVIDER_LATENCY_JITTER_MS = float(os.environ.get('LOCAL_PROVIDER_LATENCY_JITTER_MS', 0))
+    LOCAL_PROVIDER_ERROR_RATE = float(os.environ.get('LOCAL_PROVIDER_ERROR_RATE', 0))
+    LOCAL_PROVIDER_SEED = int(os.environ['LOCAL_PROVIDER_SEED']) if os.environ.get('LOCAL_PROVIDER_SEED') else None
+    # Calls per minute allowed for each provider (None disables throttling).
+    PROVIDER_RATE_LIMITS = {
+        'yfinance': int(os.environ.get('YFINANCE_CALLS_PER_MINUTE', 120)),
+        'twelvedata': int(os.environ.get('TWELVE_DATA_CALLS_PER_MINUTE', 8)),
+        'tiingo': int(os.environ.get('TIINGO_CALLS_PER_MINUTE', 50)),
+    }
+    # A provider's circuit breaker opens after this many consecutive failures and allows a probe call after the reset delay.
+    PROVIDER_BREAKER_FAILURE_THRESHOLD = int(os.environ.get('PROVIDER_BREAKER_FAILURE_THRESHOLD', 5))
+    PROVIDER_BREAKER_RESET_SECONDS = int(os.environ.get('PROVIDER_BREAKER_RESET_SECONDS', 30))
+    # Rolling latency/error statistics cover each provider's last N calls. Providers whose median latency
+    # falls in the same bucket keep their preference order (yfinance, Twelve Data, Tiingo).
+    PROVIDER_STATS_WINDOW = int(os.environ.get('PROVIDER_STATS_WINDOW', 200))
+    PROVIDER_LATENCY_BUCKET_SECONDS = float(os.environ.get('PROVIDER_LATENCY_BUCKET_SECONDS', 1.0))
+    # User-facing lookups (new tickers in orders, watchlists and asset details) race the next provider once the
+    # current one is slower than this percentile of its recent latency, and give up after the overall deadline.
+    PROVIDER_HEDGE_PERCENTILE = float(os.environ.get('PROVIDER_HEDGE_PERCENTILE', 95))
+    PROVIDER_HEDGE_MIN_DELAY_SECONDS = float(os.environ.get('PROVIDER_HEDGE_MIN_DELAY_SECONDS', 0.25))
+    PROVIDER_HEDGE_DEFAULT_DELAY_SECONDS = float(os.environ.get('PROVIDER_HEDGE_DEFAULT_DELAY_SECONDS', 1.0))
+    PROVIDER_REQUEST_DEADLINE_SECONDS = float(os.environ.get('PROVIDER_REQUEST_DEADLINE_SECONDS', 8))
+    # Any single provider call is abandoned after this long (0 disables), as the client libraries have no timeouts of their own.
+    PROVIDER_CALL_TIMEOUT_SECONDS = float(os.environ.get('PROVIDER_CALL_TIMEOUT_SECONDS', 30))
+
+    # --- Scheduled Price Refreshes (flask run-scheduler) ---
+    # Exchange session used to decide when intraday refreshes run. NYSE holidays are built in;
+    # MARKET_EXTRA_HOLIDAYS adds one-off closures as comma-separated YYYY-MM-DD dates.
+    MARKET_TIMEZONE = os.environ.get('MARKET_TIMEZONE', 'America/New_York')
+    MARKET_OPEN_TIME = os.environ.get('MARKET_OPEN_TIME', '09:30')
+    MARKET_CLOSE_TIME = os.environ.get('MARKET_CLOSE_TIME', '16:00')
+    MARKET_EXTRA_HOLIDAYS = [date.fromisoformat(d.strip()) for d in os.environ.get('MARKET_EXTRA_HOLIDAYS', '').split(',') if d.strip()]
+    # Held and pending-order assets refresh most often, watchlist-only assets less often, both only during
+    # the session. Every asset is refreshed once after the close (exchange-local time) on trading days.
+    SCHEDULER_HELD_INTERVAL_SECONDS = int(os.environ.get('SCHEDULER_HELD_INTERVAL_SECONDS', 60))
+    SCHEDULER_WATCHLIST_INTERVAL_SECONDS = int(os.environ.get('SCHEDULER_WATCHLIST_INTERVAL_SECONDS', 15 * 60))
+    SCHEDULER_NIGHTLY_TIME = os.environ.get('SCHEDULER_NIGHTLY_TIME', '17:00')
+    # Adaptive intervals: the tier intervals above become per-asset base intervals, shortened for volatile
+    # (daily log-return volatility above the reference) and frequently viewed assets and lengthened for quiet
+    # ones, within [MIN, MAX] seconds. Recently viewed assets outside any tier use the watchlist interval as
+    # their base. All intervals are stretched if they would exceed SCHEDULER_CALLS_PER_MINUTE provider calls.
+    SCHEDULER_ADAPTIVE = os.environ.get('SCHEDULER_ADAPTIVE', 'true').lower() == 'true'
+    SCHEDULER_ADAPTIVE_MIN_SECONDS = int(os.environ.get('SCHEDULER_ADAPTIVE_MIN_SECONDS', 15))
+    SCHEDULER_ADAPTIVE_MAX_SECONDS = int(os.environ.get('SCHEDULER_ADAPTIVE_MAX_SECONDS', 60 * 60))
+    SCHEDULER_REFERENCE_VOLATILITY = float(os.environ.get('SCHEDULER_REFERENCE_VOLATILITY', 0.02))
+    SCHEDULER_CALLS_PER_MINUTE = int(os.environ.get('SCHEDULER_CALLS_PER_MINUTE', 60))
+    SCHEDULER_RECOMPUTE_SECONDS = int(os.environ.get('SCHEDULER_RECOMPUTE_SECONDS', 15 * 60))
+    # API reads of an asset are counted in memory and written every ASSET_ACCESS_FLUSH_SECONDS; the access
+    # score used by the adaptive intervals halves every ASSET_ACCESS_HALF_LIFE_SECONDS.
+    ASSET_ACCESS_FLUSH_SECONDS = int(os.environ.get('ASSET_ACCESS_FLUSH_SECONDS', 30))
+    ASSET_ACCESS_HALF_LIFE_SECONDS = int(os.environ.get('ASSET_ACCESS_HALF_LIFE_SECONDS', 6 * 60 * 60))
+
+    # --- Portfolio Summary Cache ---
+    # Computed summaries are cached per portfolio and invalidated when an order, transaction, fund movement or
+    # price refresh changes them. 'disk' shares them (and their invalidations) between API workers and the
+    # scheduler or update_prices.py through SUMMARY_CACHE_DIR, and is the default wherever
+    # PROVIDER_RESPONSE_CACHE_DIR is set; otherwise the cache is 'off'. 'memory' keeps them per process and is
+    # only safe for a single process: the TTL bounds how long a summary can outlive another process's write.
+    # SUMMARY_CACHE_TTL=0 disables the cache.
+    # With the shared backend the per-portfolio version tokens are also the ETags of the portfolio and watchlist
+    # GET routes and expire after SUMMARY_CACHE_SHARED_VERSION_TTL; on the per-process one they expire with the summaries.
+    SUMMARY_CACHE_BACKEND = os.environ.get('SUMMARY_CACHE_BACKEND')
+    SUMMARY_CACHE_DIR = os.environ.get('SUMMARY_CACHE_DIR', os.path.join(basedir, 'instance', 'summary_cache'))
+    SUMMARY_CACHE_TTL = int(os.environ.get('SUMMARY_CACHE_TTL', 60))
+    SUMMARY_CACHE_MAX_SIZE = int(os.environ.get('SUMMARY_CACHE_MAX_SIZE', 1000))
+    SUMMARY_CACHE_SHARED_VERSION_TTL = int(os.environ.get('SUMMARY_CACHE_SHARED_VERSION_TTL', 24 * 60 * 60))
+
+    # --- Background Jobs ---
+    # Long-running refreshes started from the API run on this many in-process worker threads.
+    JOB_QUEUE_WORKERS = int(os.environ.get('JOB_QUEUE_WORKERS', 2))
+    JOB_QUEUE_BACKGROUND = True
+    # Progress is written to the jobs table at most this often. A queued or running job that has not been
+    # updated for JOB_STALE_SECONDS is assumed to belong to a dead process and no longer blocks new jobs.
+    JOB_PROGRESS_INTERVAL_SECONDS = float(os.environ.get('JOB_PROGRESS_INTERVAL_SECONDS', 1.0))
+    JOB_STALE_SECONDS = int(os.environ.get('JOB_STALE_SECONDS', 10 * 60))
     
 class DevelopmentConfig(Config):
     """Development-specific configuration."""
@@ -28,6 +144,16 @@ class TestingConfig(Config):
     """Testing-specific configuration."""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    PROVIDER_RATE_LIMITS = {'yfinance': None, 'twelvedata': None, 'tiingo': None}
+    PROVIDER_RESPONSE_CACHE_DIR = None
+    # Tests never talk to the keyed providers.
+    TWELVE_DATA_API_KEY = None
+    TIINGO_API_KEY = None
+    INDEX_SNAPSHOT_BACKGROUND = False
+    JOB_QUEUE_BACKGROUND = False
+    ASSET_ACCESS_FLUSH_SECONDS = 60 * 60
+    # Tests run in one process, where the per-process summary cache is exact.
+    SUMMARY_CACHE_BACKEND = 'memory'
 
 
 config = {
@@ -0,0 +1,162 @@
+# app/core/disk_cache.py
+
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+
+def _encode(value):
+    if isinstance(value, Decimal): return {"__type__": "decimal", "value": str(value)}
+    if isinstance(value, datetime): return {"__type__": "datetime", "value": value.isoformat()}
+    if isinstance(value, date): return {"__type__": "date", "value": value.isoformat()}
+    raise TypeError(f"Cannot cache a value of type {type(value).__name__}")
+
+def _decode(obj):
+    kind = obj.get("__type__")
+    if kind == "decimal": return Decimal(obj["value"])
+    if kind == "datetime": return datetime.fromisoformat(obj["value"])
+    if kind == "date": return date.fromisoformat(obj["value"])
+    return obj
+
+class DiskCache:
+    """
+    Persistent cache shared by every process pointing at the same `directory` (gunicorn workers,
+    repeated update_prices.py runs). Values may be JSON types plus Decimal, date and datetime.
+    Entries are addressed by a hash of their key, stored zlib-compressed and written atomically,
+    and expire after their TTL. Once the directory grows past `max_bytes` the least recently
+    used entries are pruned. A cache without a directory is disabled and always misses.
+    """
+    def __init__(self, directory: str = None, ttl: float = 24 * 60 * 60, max_bytes: int = 512 * 1024 * 1024):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._written_since_prune = 0
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def configure(self, directory: str = None, ttl: float = None, max_bytes: int = None):
+        """Points the cache at `directory` (None disables it) and changes the default TTL and size limit."""
+        with self._lock:
+            self.directory = directory
+            if ttl is not None: self.ttl = ttl
+            if max_bytes is not None: self.max_bytes = max_bytes
+            self.hits = self.misses = self.writes = self._written_since_prune = 0
+
+    def _path(self, key):
+        digest = hashlib.sha256(json.dumps(key, sort_keys=True, default=_encode).encode()).hexdigest()
+        return os.path.join(self.directory, digest[:2], f"{digest}.json.z")
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit: self.hits += 1
+            else: self.misses += 1
+
+    def lookup(self, key, max_age: float = None):
+        """
+        Returns (value, age_seconds) for a live entry, or (None, None). `max_age` lets a caller that needs
+        fresher data than the entry's TTL treat an older entry as a miss without removing it.
+        """
+        if not self.directory: return None, None
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                entry = json.loads(zlib.decompress(f.read()), object_hook=_decode)
+        except FileNotFoundError:
+            self._count(hit=False); return None, None
+        except (OSError, ValueError, zlib.error):
+            self._remove(path); self._count(hit=False); return None, None
+
+        age = time.time() - entry['stored_at']
+        if age > entry['ttl']:
+            self._remove(path); self._count(hit=False); return None, None
+        if max_age is not None and age > max_age:
+            self._count(hit=False); return None, None
+        try:
+            os.utime(path)  # Marks the entry as recently used for pruning.
+        except OSError:
+            pass
+        self._count(hit=True)
+        return entry['value'], age
+
+    def get(self, key, max_age: float = None):
+        return self.lookup(key, max_age)[0]
+
+    def set(self, key, value, ttl: float = None):
+        """Stores a value for `ttl` seconds (defaults to the cache's TTL)."""
+        if not self.directory: return
+        path = self._path(key)
+        entry = {"key": key, "stored_at": time.time(), "ttl": self.ttl if ttl is None else ttl, "value": value}
+        data = zlib.compress(json.dumps(entry, default=_encode).encode(), 6)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self.writes += 1
+            self._written_since_prune += len(data)
+            should_prune = self._written_since_prune > self.max_bytes // 10
+            if should_prune: self._written_since_prune = 0
+        if should_prune: self.prune()
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _files(self):
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_mtime, stat.st_size
+
+    def prune(self):
+        """
+        Removes entries unused for longer than the default TTL and leftover temp files, then the least
+        recently used entries until the cache is below 80% of `max_bytes`. Returns the number of files removed.
+        """
+        if not self.directory or not os.path.isdir(self.directory): return 0
+        now, removed, kept = time.time(), 0, []
+        for path, mtime, size in self._files():
+            if now - mtime > self.ttl or (path.endswith('.tmp') and now - mtime > 60 * 60):
+                self._remove(path); removed += 1
+            elif not path.endswith('.tmp'):
+                kept.append((mtime, size, path))
+
+        total = sum(size for _, size, _ in kept)
+        for _, size, path in sorted(kept):
+            if total <= self.max_bytes * 0.8: break
+            self._remove(path); removed += 1
+            total -= size
+        return removed
+
+    def clear(self):
+        if not self.directory or not os.path.isdir(self.directory): return
+        for path, _, _ in list(self._files()):
+            self._remove(path)
+
+    def stats(self):
+        """Returns hit/miss/write counters as a JSON-serializable dict."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": bool(self.directory),
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,89 @@
+# app/core/market_calendar.py
+
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int):
+    """The n-th `weekday` (0=Monday) of a month; n=-1 is the last one."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = (date(year, month + 1, 1) if month < 12 else date(year + 1, 1, 1)) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+def _easter(year: int):
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 19 * l) // 433
+    month = (h + l - 7 * m + 90) // 25
+    return date(year, month, (h + l - 7 * m + 33 * month + 19) % 32)
+
+def _observed(day: date):
+    """Fixed-date holidays falling on a weekend are observed on the nearest weekday."""
+    if day.weekday() == 5: return day - timedelta(days=1)
+    if day.weekday() == 6: return day + timedelta(days=1)
+    return day
+
+@lru_cache(maxsize=32)
+def nyse_holidays(year: int):
+    """Full-day NYSE closures for a year under the exchange's current holiday rules."""
+    holidays = {
+        _nth_weekday(year, 1, 0, 3),     # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),     # Washington's Birthday
+        _easter(year) - timedelta(days=2),  # Good Friday
+        _nth_weekday(year, 5, 0, -1),    # Memorial Day
+        _observed(date(year, 7, 4)),     # Independence Day
+        _nth_weekday(year, 9, 0, 1),     # Labor Day
+        _nth_weekday(year, 11, 3, 4),    # Thanksgiving
+        _observed(date(year, 12, 25)),   # Christmas
+    }
+    # New Year's Day falling on a Saturday is not observed on the preceding Friday.
+    if date(year, 1, 1).weekday() != 5: holidays.add(_observed(date(year, 1, 1)))
+    if year >= 2022: holidays.add(_observed(date(year, 6, 19)))  # Juneteenth
+    return frozenset(holidays)
+
+class MarketCalendar:
+    """
+    Trading days and regular session hours of an exchange (NYSE/Nasdaq by default).
+    Naive datetimes are taken to be UTC, like the rest of the app's timestamps.
+    `extra_holidays` adds one-off closures the rules do not cover.
+    """
+    def __init__(self, tz: str = 'America/New_York', open_time: time = time(9, 30), close_time: time = time(16, 0),
+                 extra_holidays=()):
+        self.tz = ZoneInfo(tz)
+        self.open_time = open_time
+        self.close_time = close_time
+        self.extra_holidays = frozenset(extra_holidays)
+
+    def local(self, moment: datetime):
+        """Converts a datetime to exchange-local time."""
+        if moment.tzinfo is None: moment = moment.replace(tzinfo=timezone.utc)
+        return moment.astimezone(self.tz)
+
+    def is_trading_day(self, day: date):
+        return day.weekday() < 5 and day not in nyse_holidays(day.year) and day not in self.extra_holidays
+
+    def is_open(self, moment: datetime):
+        """True during the regular session of a trading day."""
+        local = self.local(moment)
+        return self.is_trading_day(local.date()) and self.open_time <= local.time() < self.close_time
+
+    def at(self, day: date, clock: time):
+        """The exchange-local datetime of `clock` on `day`."""
+        return datetime.combine(day, clock, tzinfo=self.tz)
+
+    def next_open(self, moment: datetime):
+        """The start of the next regular session at or after `moment` (the current one if the market is open)."""
+        local = self.local(moment)
+        day = local.date()
+        if self.is_trading_day(day) and local.time() < self.close_time:
+            return max(local, self.at(day, self.open_time))
+        day += timedelta(days=1)
+        while not self.is_trading_day(day): day += timedelta(days=1)
+        return self.at(day, self.open_time)
@@ -28,6 +28,12 @@ class TransactionStatus(enum.Enum):
     FAILED = "FAILED"
     CANCELLED = "CANCELLED"
 
+class JobStatus(enum.Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    SUCCEEDED = "SUCCEEDED"
+    FAILED = "FAILED"
+
 db = SQLAlchemy()
 
 class User(db.Model):
@@ -95,6 +101,7 @@ class Asset(db.Model):
     last_price = db.Column(db.Numeric(15, 4))
     previous_close_price = db.Column(db.Numeric(15, 4))
     price_updated_at = db.Column(db.DateTime)
+    currency = db.Column(db.String(10), default='USD')
     
     # --- Relationships ---
     historical_prices = relationship('HistoricalPrice', back_populates='asset', cascade="all, delete-orphan")
@@ -183,7 +190,8 @@ class WatchlistItem(db.Model):
 
 class HistoricalPrice(db.Model):
     __tablename__ = 'historical_prices'
-    id = db.Column(db.BigInteger, primary_key=True)
+    # SQLite only autoincrements INTEGER primary keys, so the test database gets a plain Integer.
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
     asset_id = db.Column(db.Integer, db.ForeignKey('assets.id'), nullable=False)
     price_date = db.Column(db.Date, nullable=False)
     open_price = db.Column(db.Numeric(15, 4))
@@ -193,5 +201,81 @@ class HistoricalPrice(db.Model):
     volume = db.Column(db.BigInteger)
     asset = relationship('Asset', back_populates='historical_prices')
 
+    __table_args__ = (
+        db.Index('ix_historical_prices_asset_id_price_date', 'asset_id', 'price_date', unique=True),
+    )
+
+    def __repr__(self):
+        return f"<HistoricalPrice(asset_id={self.asset_id}, date='{self.price_date}', close={self.close_price})>"
+
+class SymbolListing(db.Model):
+    """A listed instrument in the local search universe. Assets are only created once a symbol is used."""
+    __tablename__ = 'symbol_listings'
+    id = db.Column(db.Integer, primary_key=True)
+    ticker_symbol = db.Column(db.String(20), unique=True, nullable=False)
+    name = db.Column(db.String(255), nullable=False)
+    exchange_code = db.Column(db.String(50))
+    asset_type = db.Column(db.String(50))
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<SymbolListing(ticker='{self.ticker_symbol}', name='{self.name}')>"
+
+class AssetRefreshStats(db.Model):
+    """
+    Per-asset inputs and output of the adaptive refresh policy. Access counters are folded in from the
+    API workers; volatility, tier and interval are recomputed by the refresh scheduler.
+    """
+    __tablename__ = 'asset_refresh_stats'
+    asset_id = db.Column(db.Integer, db.ForeignKey('assets.id'), primary_key=True, autoincrement=False)
+    access_count = db.Column(db.Integer, nullable=False, default=0)
+    # Exponentially decayed access count; it halves every ASSET_ACCESS_HALF_LIFE_SECONDS without accesses.
+    access_score = db.Column(db.Float, nullable=False, default=0.0)
+    last_accessed_at = db.Column(db.DateTime)
+    volatility = db.Column(db.Float)
+    tier = db.Column(db.String(20))
+    refresh_interval_seconds = db.Column(db.Integer)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    asset = relationship('Asset')
+
+    def __repr__(self):
+        return f"<AssetRefreshStats(asset_id={self.asset_id}, interval={self.refresh_interval_seconds})>"
+
+class Job(db.Model):
+    """
+    A background job run by the in-process job queue. Progress is persisted so any worker process can report it.
+    `active_key` holds the job's deduplication key while it is queued or running and is cleared when it finishes,
+    so its unique index allows only one active job per key across processes.
+    """
+    __tablename__ = 'jobs'
+    id = db.Column(db.Integer, primary_key=True)
+    job_type = db.Column(db.String(50), nullable=False)
+    params = db.Column(db.JSON)
+    status = db.Column(db.Enum(JobStatus), nullable=False, default=JobStatus.QUEUED)
+    active_key = db.Column(db.String(100), unique=True)
+    total = db.Column(db.Integer)
+    done = db.Column(db.Integer, nullable=False, default=0)
+    failed = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<Job(id={self.id}, type='{self.job_type}', status='{self.status.value}')>"
+
+class UpdateCheckpoint(db.Model):
+    """
+    Outcome of one phase (prices, details or history) of a full market data update for one asset.
+    `run_id` is the job that started the run; a resumed run keeps it, so completed work is skipped.
+    """
+    __tablename__ = 'update_checkpoints'
+    run_id = db.Column(db.Integer, db.ForeignKey('jobs.id'), primary_key=True, autoincrement=False)
+    asset_id = db.Column(db.Integer, db.ForeignKey('assets.id'), primary_key=True, autoincrement=False)
+    phase = db.Column(db.String(20), primary_key=True)
+    status = db.Column(db.String(10), nullable=False)  # 'done' or 'failed'
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
     def __repr__(self):
-        return f"<HistoricalPrice(asset_id={self.asset_id}, date='{self.price_date}', close={self.close_price})>"
\ No newline at end of file
+        return f"<UpdateCheckpoint(run_id={self.run_id}, asset_id={self.asset_id}, phase='{self.phase}', status='{self.status}')>"
@@ -0,0 +1,46 @@
+# app/services/downsampling.py
+
+import numpy as np
+
+def lttb_indices(x, y, max_points: int):
+    """
+    Largest-Triangle-Three-Buckets: picks `max_points` indices from an ordered series that preserve
+    its visual shape. The first and last points are always kept; every interior bucket contributes the
+    point forming the largest triangle with the previously selected point and the next bucket's mean.
+    Area computation is vectorized per bucket. Returns all indices if the series is already small enough.
+    """
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # max_points - 2 buckets spanning the interior points [1, n - 1)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            avg_x, avg_y = x[end:edges[i + 2]].mean(), np.nanmean(y[end:edges[i + 2]])
+        else:
+            avg_x, avg_y = x[n - 1], y[n - 1]
+
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        selected[i + 1] = a
+    return selected
+
+def downsample_rows(rows: list, max_points: int, value_index: int = 1):
+    """
+    Downsamples ascending (date, *values) row tuples to at most `max_points` rows with LTTB,
+    using the column at `value_index` as the series shape and days since the first row as x.
+    """
+    if not max_points or len(rows) <= max_points:
+        return rows
+    first = rows[0][0]
+    x = np.fromiter(((row[0] - first).days for row in rows), dtype=float, count=len(rows))
+    y = np.array([np.nan if row[value_index] is None else float(row[value_index]) for row in rows], dtype=float)
+    return [rows[i] for i in lttb_indices(x, y, max_points)]
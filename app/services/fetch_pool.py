@@ -0,0 +1,116 @@
+# app/services/fetch_pool.py
+
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+class TokenBucket:
+    """
+    Thread-safe token bucket allowing `rate_per_minute` calls on average, with bursts of up to `capacity`.
+    A request for more tokens than the bucket holds (e.g. a multi-symbol call billed per symbol)
+    is let through once the bucket is full and leaves it in deficit, delaying later callers.
+    Callers with a deadline pass `timeout` so they fail fast instead of waiting out the deficit.
+    """
+    def __init__(self, rate_per_minute: float, capacity: float = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1, timeout: float = None):
+        """
+        Blocks until `tokens` are available, then consumes them. With `timeout`, raises TimeoutError
+        without consuming anything as soon as the tokens cannot be available within that many seconds.
+        """
+        needed = min(tokens, self.capacity)
+        give_up_at = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= needed:
+                    self._tokens -= tokens
+                    return
+                wait = (needed - self._tokens) / self.rate
+            if give_up_at is not None and time.monotonic() + wait > give_up_at:
+                raise TimeoutError(f"Rate limit would delay the call by {wait:.2f} seconds, past its deadline.")
+            time.sleep(wait)
+
+    def take(self, max_tokens: int):
+        """Consumes up to `max_tokens` whole tokens without blocking and returns how many were taken."""
+        with self._lock:
+            self._refill()
+            taken = max(min(int(self._tokens), int(max_tokens)), 0)
+            self._tokens -= taken
+            return taken
+
+# --- Per-Provider Rate Limiters ---
+_rate_limiters = {}
+
+def configure_rate_limits(limits: dict):
+    """Installs one token bucket per provider from a {provider: calls_per_minute} mapping. None means unlimited."""
+    _rate_limiters.clear()
+    for provider, calls_per_minute in (limits or {}).items():
+        if calls_per_minute:
+            _rate_limiters[provider] = TokenBucket(calls_per_minute)
+
+def throttle(provider: str, tokens: float = 1, timeout: float = None):
+    """Blocks the calling thread until `provider`'s quota allows another call, or raises TimeoutError after `timeout` seconds."""
+    limiter = _rate_limiters.get(provider)
+    if limiter:
+        limiter.acquire(tokens, timeout)
+
+# --- Bounded Fetch Pool ---
+class FetchPool:
+    """
+    Runs provider fetches on a bounded thread pool and hands results back to the calling thread
+    through a queue, so the caller can keep all database writes on its own session.
+    Fetch functions must not touch the database.
+    """
+    def __init__(self, max_workers: int = 8):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='market-fetch')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._executor.shutdown(wait=True)
+
+    def imap_unordered(self, fn, items):
+        """Submits fn(item) for every item and yields (item, result, error) tuples as each one completes."""
+        items = list(items)
+        results = queue.Queue()
+
+        def _run(item):
+            try:
+                results.put((item, fn(item), None))
+            except Exception as e:
+                results.put((item, None, e))
+
+        for item in items:
+            self._executor.submit(_run, item)
+        for _ in range(len(items)):
+            yield results.get()
+
+def fetch_all(fn, items, max_workers: int = 8):
+    """
+    Yields (item, result, error) for fn(item) over all items. Runs inline for a single item
+    (e.g. a per-request refresh) and on a FetchPool otherwise.
+    """
+    items = list(items)
+    if len(items) <= 1 or max_workers <= 1:
+        for item in items:
+            try:
+                yield item, fn(item), None
+            except Exception as e:
+                yield item, None, e
+        return
+
+    with FetchPool(min(max_workers, len(items))) as pool:
+        yield from pool.imap_unordered(fn, items)
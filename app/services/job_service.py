@@ -0,0 +1,213 @@
+# app/services/job_service.py
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from app.models.models import db, Job, JobStatus, Asset
+from .market_data_service import MarketDataService
+from .update_pipeline import PHASES, format_stats, run_update_pipeline
+
+# --- Worker Pool ---
+# Jobs run on in-process threads, each with its own app context and session. Their state lives in the
+# jobs table, so any gunicorn worker can report on a job and deduplicate against it.
+_job_executor = None
+_executor_lock = threading.Lock()
+
+def configure_job_queue(config):
+    """(Re)creates the worker pool with JOB_QUEUE_WORKERS threads. Called by the app factory."""
+    global _job_executor
+    with _executor_lock:
+        if _job_executor: _job_executor.shutdown(wait=False)
+        _job_executor = ThreadPoolExecutor(max_workers=config.get('JOB_QUEUE_WORKERS', 2), thread_name_prefix='job-worker')
+
+# --- Job Handlers ---
+# Each handler receives the job's params and a progress(done, failed, total) callback.
+def _refresh_prices(params: dict, progress):
+    MarketDataService.update_asset_prices(asset_ids=params.get('asset_ids'), progress=progress)
+
+def _update_history(params: dict, progress):
+    progress(0, 0, 1)
+    MarketDataService.update_historical_data(params['asset_id'])
+    progress(1, 0, 1)
+
+def _full_update(params: dict, progress):
+    # Checkpoints belong to the job that started the run, which a resumed job carries as run_id.
+    stats = run_update_pipeline(params.get('run_id') or progress.job_id, params.get('phases') or PHASES,
+                                params.get('tickers'), params.get('workers'), progress)
+    print("Full update summary:\n" + format_stats(stats))
+    failed = sum(phase_stats.failed for phase_stats in stats.values())
+    if failed: raise RuntimeError(f"{failed} steps failed; rerun with --resume to retry them.")
+
+JOB_HANDLERS = {
+    'refresh-prices': _refresh_prices,
+    'update-history': _update_history,
+    'full-update': _full_update
+}
+
+class JobProgress:
+    """
+    Progress callback handed to job handlers. Counts are kept in memory and written to the
+    job row at most once per JOB_PROGRESS_INTERVAL_SECONDS, plus once when the job finishes.
+    """
+    def __init__(self, job_id: int, interval: float = 1.0):
+        self.job_id = job_id
+        self.interval = interval
+        self.done = self.failed = 0
+        self.total = None
+        self._last_write = 0.0
+
+    def __call__(self, done: int, failed: int = 0, total: int = None):
+        self.done, self.failed = done, failed
+        if total is not None: self.total = total
+        if time.monotonic() - self._last_write >= self.interval:
+            self.flush()
+
+    def flush(self):
+        values = {"done": self.done, "failed": self.failed}
+        if self.total is not None: values["total"] = self.total
+        _write_job(self.job_id, **values)
+        self._last_write = time.monotonic()
+
+def _write_job(job_id: int, only_if_status: JobStatus = None, **values):
+    """
+    [Internal Helper] Updates a job row on its own connection and commits immediately, so progress
+    never commits (or expires) the handler's session. Returns True if the row was updated.
+    """
+    statement = update(Job.__table__).where(Job.__table__.c.id == job_id).values(updated_at=datetime.utcnow(), **values)
+    if only_if_status: statement = statement.where(Job.__table__.c.status == only_if_status)
+    with db.engine.begin() as conn:
+        return conn.execute(statement).rowcount > 0
+
+def run_job(job_id: int):
+    """Runs a queued job to completion in the current app context, recording its outcome."""
+    # Claim the job; a job expired as stale while it waited in the queue is not run.
+    now = datetime.utcnow()
+    if not _write_job(job_id, only_if_status=JobStatus.QUEUED, status=JobStatus.RUNNING, started_at=now):
+        return
+    job = db.session.get(Job, job_id)
+    db.session.refresh(job)
+    progress = JobProgress(job_id, current_app.config.get('JOB_PROGRESS_INTERVAL_SECONDS', 1.0))
+    print(f"Job {job_id} ({job.job_type}) started.")
+    try:
+        JOB_HANDLERS[job.job_type](job.params or {}, progress)
+        progress.flush()
+        _write_job(job_id, status=JobStatus.SUCCEEDED, active_key=None, finished_at=datetime.utcnow())
+        print(f"Job {job_id} ({job.job_type}) finished.")
+    except (Exception, KeyboardInterrupt) as e:
+        db.session.rollback()
+        _write_job(job_id, status=JobStatus.FAILED, active_key=None, error=str(e) or type(e).__name__, finished_at=datetime.utcnow())
+        print(f"Job {job_id} ({job.job_type}) failed: {str(e) or type(e).__name__}")
+        # An interrupted job is recorded as failed (so it can be resumed at once) before the interrupt propagates.
+        if isinstance(e, KeyboardInterrupt): raise
+
+def _run_in_context(app, job_id: int):
+    with app.app_context():
+        run_job(job_id)
+
+def _expire_stale_jobs(dedup_key: str):
+    """[Internal Helper] Releases the key of an active job whose process stopped updating it."""
+    cutoff = datetime.utcnow() - timedelta(seconds=current_app.config.get('JOB_STALE_SECONDS', 600))
+    db.session.execute(
+        update(Job).where(Job.active_key == dedup_key, Job.updated_at < cutoff)
+        .values(status=JobStatus.FAILED, active_key=None, finished_at=datetime.utcnow(),
+                error="Abandoned: the job stopped reporting progress.")
+    )
+    db.session.commit()
+
+def enqueue_job(job_type: str, params: dict = None, dedup_key: str = None, background: bool = None):
+    """
+    Queues a job and returns (job, created). If a job with the same deduplication key (defaults to
+    the job type) is already queued or running, that job is returned instead with created=False.
+    `background=False` runs the job inline instead of on the worker pool (defaults to JOB_QUEUE_BACKGROUND).
+    """
+    if job_type not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job type: {job_type}")
+    dedup_key = dedup_key or job_type
+    _expire_stale_jobs(dedup_key)
+
+    existing = Job.query.filter_by(active_key=dedup_key).first()
+    if existing: return existing, False
+
+    job = Job(job_type=job_type, params=params or {}, status=JobStatus.QUEUED, active_key=dedup_key)
+    db.session.add(job)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another request or worker process queued the same job first.
+        db.session.rollback()
+        existing = Job.query.filter_by(active_key=dedup_key).first()
+        if existing: return existing, False
+        raise
+
+    app = current_app._get_current_object()
+    if background is None: background = app.config.get('JOB_QUEUE_BACKGROUND', True)
+    if background:
+        _job_executor.submit(_run_in_context, app, job.id)
+    else:
+        run_job(job.id)
+        db.session.refresh(job)
+    return job, True
+
+def enqueue_price_refresh():
+    """Queues a price refresh of every STOCK/ETF asset. Returns (job, created)."""
+    return enqueue_job('refresh-prices')
+
+def enqueue_history_update(asset_id: int):
+    """Queues an incremental historical data update for one asset. Returns (job, created)."""
+    if not db.session.get(Asset, asset_id):
+        raise ValueError("Asset not found.")
+    return enqueue_job('update-history', {"asset_id": asset_id}, dedup_key=f"update-history:{asset_id}")
+
+def enqueue_full_update(phases=None, tickers: list = None, workers: int = None, resume: bool = False, background: bool = None):
+    """
+    Queues a checkpointed full market data update (see update_pipeline). With `resume`, the most recent
+    unfinished run is continued with its original phases and tickers, skipping its completed steps.
+    Returns (job, created); raises ValueError if there is nothing to resume or a phase is unknown.
+    """
+    unknown = set(phases or ()) - set(PHASES)
+    if unknown: raise ValueError(f"Unknown phase(s): {', '.join(sorted(unknown))}. Choose from: {', '.join(PHASES)}")
+    params = {"phases": list(phases or PHASES), "tickers": tickers or None, "workers": workers}
+    if resume:
+        previous = Job.query.filter(Job.job_type == 'full-update', Job.status != JobStatus.SUCCEEDED) \
+            .order_by(Job.id.desc()).first()
+        if not previous: raise ValueError("No unfinished full update to resume.")
+        previous_params = previous.params or {}
+        params = dict(previous_params, run_id=previous_params.get('run_id') or previous.id,
+                      workers=workers or previous_params.get('workers'))
+    return enqueue_job('full-update', params, background=background)
+
+def job_to_dict(job: Job):
+    """Serializes a job with its progress and, while it runs, an ETA extrapolated from its rate so far."""
+    processed = job.done + job.failed
+    eta_seconds = None
+    if job.status == JobStatus.RUNNING and job.total and processed and job.started_at:
+        elapsed = (datetime.utcnow() - job.started_at).total_seconds()
+        eta_seconds = round(elapsed / processed * max(job.total - processed, 0), 1)
+    return {
+        "id": job.id,
+        "type": job.job_type,
+        "params": job.params or {},
+        "status": job.status.value,
+        "progress": {
+            "total": job.total,
+            "done": job.done,
+            "failed": job.failed,
+            "percent": round(processed / job.total * 100, 1) if job.total else None
+        },
+        "eta_seconds": eta_seconds,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None
+    }
+
+def get_job_status(job_id: int):
+    """Returns the serialized job, or None if it does not exist."""
+    job = db.session.get(Job, job_id)
+    if not job: return None
+    db.session.refresh(job)  # Progress is written by the worker on another connection.
+    return job_to_dict(job)
@@ -1,101 +1,318 @@
 # app/services/market_data_service.py
 
-import os
-import yfinance as yf
-from twelvedata import TDClient
-from tiingo import TiingoClient
-from datetime import datetime, timedelta
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, date
+from flask import current_app
+from decimal import Decimal
+from sqlalchemy import func, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.core.cache import TTLCache, SingleFlight
+from app.core.disk_cache import DiskCache
 from app.models.models import db, Asset, HistoricalPrice, AssetType
-from decimal import Decimal, InvalidOperation
+from .downsampling import downsample_rows
+from .fetch_pool import fetch_all
+from .provider_registry import provider_registry, ProviderUnavailable
+from .providers import available_providers, get_provider
+from .summary_cache import invalidate_assets, invalidate_indices
 
-# --- Configuration ---
-TWELVE_DATA_API_KEY = os.environ.get('TWELVE_DATA_API_KEY')
-TIINGO_API_KEY = os.environ.get('TIINGO_API_KEY')
+# --- Quote/Metadata Caches ---
+# Provider profiles carry prices and slow-changing metadata in the same payload; they are cached
+# separately so a stale price can be refetched while the metadata is still served from memory.
+QUOTE_FIELDS = ('last_price', 'previous_close')
+quote_cache = TTLCache(ttl=15, max_size=5000)
+metadata_cache = TTLCache(ttl=6 * 60 * 60, max_size=5000)
+# Tickers no provider could resolve, so repeated lookups fail fast instead of burning quota.
+unresolvable_tickers = TTLCache(ttl=15 * 60, max_size=10000)
+# Only one provider resolution runs per new ticker; concurrent callers wait for its result.
+asset_resolutions = SingleFlight()
+# Provider responses persisted across processes and runs. Profiles are kept for their metadata,
+# but their prices are only trusted while younger than PROVIDER_RESPONSE_CACHE_QUOTE_MAX_AGE.
+response_cache = DiskCache()
+RESPONSE_CACHE_SETTINGS = {'quote_max_age': 60, 'history_ttl': 60 * 60}
 
-td_client = TDClient(apikey=TWELVE_DATA_API_KEY) if TWELVE_DATA_API_KEY and TWELVE_DATA_API_KEY != 'YOUR_TWELVE_DATA_KEY' else None
-tiingo_client = TiingoClient({'api_key': TIINGO_API_KEY}) if TIINGO_API_KEY and TIINGO_API_KEY != 'YOUR_TIINGO_KEY' else None
+# --- Background Asset Refreshes ---
+# Stale assets viewed through the API are refreshed off the request thread, one job per asset at a time.
+_refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='asset-refresh')
+_refreshing_assets = set()
+_refreshing_lock = threading.Lock()
+
+def configure_caches(config):
+    """Applies cache TTLs and size limits from the app config."""
+    quote_cache.configure(ttl=config.get('QUOTE_CACHE_PRICE_TTL'), max_size=config.get('QUOTE_CACHE_MAX_SIZE'))
+    metadata_cache.configure(ttl=config.get('QUOTE_CACHE_METADATA_TTL'), max_size=config.get('QUOTE_CACHE_MAX_SIZE'))
+    unresolvable_tickers.configure(ttl=config.get('UNRESOLVABLE_TICKER_TTL'))
+    response_cache.configure(
+        directory=config.get('PROVIDER_RESPONSE_CACHE_DIR'),
+        ttl=config.get('PROVIDER_RESPONSE_CACHE_METADATA_TTL'),
+        max_bytes=config.get('PROVIDER_RESPONSE_CACHE_MAX_MB', 512) * 1024 * 1024
+    )
+    RESPONSE_CACHE_SETTINGS.update(
+        quote_max_age=config.get('PROVIDER_RESPONSE_CACHE_QUOTE_MAX_AGE', 60),
+        history_ttl=config.get('PROVIDER_RESPONSE_CACHE_HISTORY_TTL', 60 * 60)
+    )
 
 # --- Helper Functions ---
-def safe_decimal(value, default=Decimal('0.0')):
-    """Safely converts a value to a Decimal, returning a default on failure."""
-    try:
-        if value is None or str(value).lower() in ['none', 'nan', '']: return default
-        return Decimal(str(value))
-    except (InvalidOperation, ValueError): return default
-
-def safe_int(value, default=0):
-    """Safely converts a value to an integer, returning a default on failure."""
-    try:
-        if value is None or str(value).lower() in ['none', 'nan', '']: return default
-        return int(float(value))
-    except (ValueError, TypeError): return default
+def has_weekday_between(start: date, end: date):
+    """Returns True if any weekday (a potential trading day) falls within [start, end]."""
+    if start > end: return False
+    return (end - start).days >= 2 or any(d.weekday() < 5 for d in (start, end))
+
+def chunked(items, size):
+    """Yields successive lists of at most `size` items."""
+    items = list(items)
+    size = max(int(size or 1), 1)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+HISTORICAL_PRICE_VALUE_COLUMNS = ['open_price', 'high_price', 'low_price', 'close_price', 'volume']
+
+# Public field names accepted by the asset details endpoint, mapped to their HistoricalPrice columns.
+HISTORY_FIELDS = {
+    'open': HistoricalPrice.open_price, 'high': HistoricalPrice.high_price, 'low': HistoricalPrice.low_price,
+    'close': HistoricalPrice.close_price, 'volume': HistoricalPrice.volume
+}
+# Bucket keys for the supported bar intervals. Daily bars are returned as stored.
+HISTORY_INTERVALS = {
+    '1d': None,
+    '1wk': lambda d: d.isocalendar()[:2],
+    '1mo': lambda d: (d.year, d.month)
+}
+
+def resample_bars(rows: list, fields: list, interval: str):
+    """
+    Aggregates ascending (date, *fields) row tuples into weekly or monthly bars labelled with
+    the first trading day of each bucket: first open, highest high, lowest low, last close, total volume.
+    """
+    bucket_key = HISTORY_INTERVALS[interval]
+    if not bucket_key: return rows
+
+    def merge(field, current, value):
+        if value is None: return current
+        if current is None: return value
+        if field == 'high': return max(current, value)
+        if field == 'low': return min(current, value)
+        if field == 'close': return value
+        if field == 'volume': return current + value
+        return current # open keeps the first value
+
+    buckets, keys = [], []
+    for row in rows:
+        key = bucket_key(row[0])
+        if not keys or keys[-1] != key:
+            keys.append(key)
+            buckets.append(list(row))
+            continue
+        bucket = buckets[-1]
+        for i, field in enumerate(fields, start=1):
+            bucket[i] = merge(field, bucket[i], row[i])
+    return [tuple(bucket) for bucket in buckets]
+
+def bulk_upsert(model, rows: list, conflict_columns: list, update_columns: list, chunk_size: int = 1000):
+    """
+    Writes rows with one multi-row INSERT per chunk, overwriting `update_columns` of any row that
+    collides on the unique `conflict_columns`. Uses ON DUPLICATE KEY UPDATE on MySQL and
+    ON CONFLICT DO UPDATE on SQLite. Does not commit.
+    """
+    if not rows: return 0
+    dialect = db.session.get_bind().dialect.name
+    table = model.__table__
+
+    for chunk in chunked(rows, chunk_size):
+        if dialect == 'mysql':
+            stmt = mysql_insert(table).values(chunk)
+            stmt = stmt.on_duplicate_key_update({col: stmt.inserted[col] for col in update_columns})
+        elif dialect == 'sqlite':
+            stmt = sqlite_insert(table).values(chunk)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=conflict_columns,
+                set_={col: stmt.excluded[col] for col in update_columns}
+            )
+        else:
+            raise ValueError(f"Bulk upsert is not supported for the '{dialect}' database dialect.")
+        db.session.execute(stmt)
+    return len(rows)
+
+def bulk_update_by_id(model, rows: list, chunk_size: int = 1000):
+    """
+    Applies per-row changes given as {'id': ..., column: value, ...} with one executemany UPDATE by primary
+    key per chunk (rows with different column sets are grouped by SQLAlchemy). Only the columns present in
+    a row are written, and objects already loaded in the session are not refreshed. Does not commit.
+    """
+    for chunk in chunked(rows, chunk_size):
+        db.session.execute(update(model), chunk)
+    return len(rows)
+
+def quote_value(value):
+    """Normalizes a price to the 4 decimal places the quote columns store, so unchanged quotes compare equal."""
+    return Decimal(value).quantize(Decimal('0.0001')) if value is not None else None
+
+def price_touch_cutoff(now: datetime):
+    """
+    Unchanged quotes still re-stamp price_updated_at once it is older than this (ASSET_PRICE_TOUCH_SECONDS),
+    so quiet tickers stay fresh for the stale-while-revalidate check without a write on every refresh.
+    """
+    return now - timedelta(seconds=current_app.config.get('ASSET_PRICE_TOUCH_SECONDS', 5 * 60))
+
+def upsert_historical_prices(rows: list, chunk_size: int = None):
+    """
+    Writes historical bars in chunks of HISTORICAL_UPSERT_CHUNK_SIZE, overwriting the OHLCV values of
+    any (asset_id, price_date) that already exists so late corrections replace stale bars. Does not commit.
+    """
+    chunk_size = chunk_size or current_app.config.get('HISTORICAL_UPSERT_CHUNK_SIZE', 1000)
+    return bulk_upsert(HistoricalPrice, rows, ['asset_id', 'price_date'], HISTORICAL_PRICE_VALUE_COLUMNS, chunk_size)
 
 class MarketDataService:
     @staticmethod
-    def _get_yfinance_data(ticker: str):
-        """[Internal Helper] Fetches comprehensive asset data from yfinance."""
-        try:
-            print(f"Primary source: Attempting yfinance for {ticker}")
-            y_ticker = yf.Ticker(ticker)
-            info = y_ticker.info
-            
-            if info and info.get('longName'):
-                list_date_ms = info.get('firstTradeDateMilliseconds')
-                return {
-                    "name": info.get('longName'),
-                    "description": info.get('longBusinessSummary'),
-                    "exchange_code": info.get('exchange'),
-                    "list_date": datetime.fromtimestamp(list_date_ms / 1000).date() if list_date_ms else None,
-                    "last_price": safe_decimal(info.get('currentPrice') or info.get('regularMarketPrice')),
-                    "previous_close": safe_decimal(info.get('previousClose') or info.get('regularMarketPreviousClose')),
-                    "currency": info.get('financialCurrency', 'USD')
-                }
-        except Exception as e:
-            print(f"yfinance failed for {ticker}: {e}")
+    def _get_profile(ticker: str):
+        """
+        [Internal Helper] Returns name, metadata and quote for a ticker from the healthiest provider that has it.
+        Served from the in-process caches while both the price and metadata entries are fresh.
+        """
+        cached = MarketDataService._get_cached_profile(ticker)
+        if cached: return cached
+        for provider in available_providers('quote'):
+            data = MarketDataService._fetch_profile(provider, ticker)
+            if data and data.get('last_price'):
+                return data
         return None
 
+    @staticmethod
+    def _get_cached_profile(ticker: str):
+        """[Internal Helper] Returns the cached profile if both its price and metadata entries are fresh."""
+        quote, metadata = quote_cache.get(ticker), metadata_cache.get(ticker)
+        if quote is not None and metadata is not None:
+            return {**metadata, **quote}
+        return None
+
+    @staticmethod
+    def _fetch_profile(provider: str, ticker: str, need_quote: bool = True, raise_errors: bool = False):
+        """
+        [Internal Helper] Fetches one provider's profile for a ticker, bypassing the in-process caches but
+        refilling them when it includes a price. Returns None on failure, or re-raises the provider's error
+        with `raise_errors` so callers can tell it apart from an unknown ticker. Performs no database access.
+        A profile from the on-disk response cache keeps its prices only while they are younger than the
+        quote max age; with `need_quote` an older entry is refetched, otherwise it is returned without prices.
+        """
+        key = ['profile', provider, ticker]
+        data, age = response_cache.lookup(key)
+        if data is not None and age > RESPONSE_CACHE_SETTINGS['quote_max_age']:
+            data = None if need_quote else {k: v for k, v in data.items() if k not in QUOTE_FIELDS}
+        if data is None:
+            try:
+                print(f"Profile: Attempting {provider} for {ticker}")
+                data = get_provider(provider).get_profile(ticker)
+            except Exception as e:
+                print(f"{provider} profile failed for {ticker}: {e}")
+                if raise_errors: raise
+                return None
+            if data: response_cache.set(key, data)
+        if data and data.get('last_price'):
+            quote_cache.set(ticker, {field: data.get(field) for field in QUOTE_FIELDS})
+            metadata_cache.set(ticker, {k: v for k, v in data.items() if k not in QUOTE_FIELDS})
+        return data
+
+    @staticmethod
+    def _hedged_profile(ticker: str):
+        """
+        [Internal Helper] Name, metadata and quote for a ticker from the quote providers, hedged against the
+        next one when the healthiest is slow. Returns (provider, data) for the first profile with a price, or
+        (None, None) when the providers that answered do not have the ticker. Raises ProviderUnavailable when
+        none answered (every call failed or no provider is available), and TimeoutError once the deadline passes.
+        """
+        answered = []
+
+        def attempt(provider):
+            data = MarketDataService._fetch_profile(provider, ticker, raise_errors=True)
+            answered.append(provider)
+            return data
+
+        attempts = [(provider, lambda provider=provider: attempt(provider)) for provider in available_providers('quote')]
+        provider, data = provider_registry.hedged(attempts, accept=lambda data: bool(data and data.get('last_price')))
+        if not data and not answered:
+            raise ProviderUnavailable(f"No market data provider could be reached for {ticker}.")
+        return provider, data
+
+    @staticmethod
+    def _get_metadata_supplement(ticker: str):
+        """
+        [Internal Helper] Descriptive fields (name, description, exchange, list date) from the first
+        metadata-only provider (e.g. Tiingo) that has the ticker. Returns {} if none does.
+        """
+        for provider in available_providers('metadata'):
+            if 'quote' in get_provider(provider).capabilities: continue
+            data = MarketDataService._fetch_profile(provider, ticker, need_quote=False)
+            if data: return data
+        return {}
+
+    @staticmethod
+    def get_cache_stats():
+        """Returns hit/miss counters for the quote, metadata and on-disk provider response caches."""
+        return {"quotes": quote_cache.stats(), "metadata": metadata_cache.stats(), "responses": response_cache.stats()}
+
     @staticmethod
     def find_or_create_asset(ticker: str):
-        """Finds an asset by ticker or creates it using a tiered fallback system."""
+        """
+        Finds an asset by ticker or creates it using a tiered fallback system.
+        Tickers that no provider could resolve are remembered for UNRESOLVABLE_TICKER_TTL seconds,
+        and concurrent requests for the same new ticker share a single provider resolution.
+        This is on the request path of orders, watchlists and asset details, so provider lookups are
+        hedged, and all of them (the metadata supplement included) are bounded by PROVIDER_REQUEST_DEADLINE_SECONDS.
+        """
         ticker = ticker.upper()
         asset = Asset.query.filter_by(ticker_symbol=ticker).first()
         if asset:
             return asset
 
+        if unresolvable_tickers.get(ticker):
+            raise ValueError(f"Could not find valid data for {ticker} from any source (recently checked).")
+
+        def resolve():
+            with provider_registry.deadline_scope():
+                return MarketDataService._create_asset_from_providers(ticker)
+        asset_id = asset_resolutions.do(ticker, resolve)
+        asset = db.session.get(Asset, asset_id) or MarketDataService._get_committed_asset(id=asset_id)
+        if not asset:
+            raise ValueError(f"Asset {ticker} was created but could not be loaded.")
+        return asset
+
+    @staticmethod
+    def _get_committed_asset(**filters):
+        """
+        [Internal Helper] Loads an asset committed by another session. A locking read is used because
+        MySQL's REPEATABLE READ snapshot would otherwise hide rows committed after this transaction's first read.
+        """
+        return Asset.query.filter_by(**filters).with_for_update(read=True).first()
+
+    @staticmethod
+    def _create_asset_from_providers(ticker: str):
+        """[Internal Helper] Resolves a new ticker through the provider fallback chain and stores it. Returns the asset id."""
         print(f"Asset '{ticker}' not in DB. Fetching from external APIs...")
-        
-        # 1. Primary source: yfinance
-        asset_data = MarketDataService._get_yfinance_data(ticker)
-
-        # 2. Fallback sources if primary fails
-        if not asset_data:
-            print(f"yfinance failed for {ticker}. Trying fallbacks.")
-            asset_data = {}
+
+        # 1. Name and price from the healthiest quote source, hedged against the next one when it is slow
+        provider, data = 'cache', MarketDataService._get_cached_profile(ticker)
+        if not data:
             try:
-                # Price from Twelve Data
-                if td_client:
-                    print(f"Fallback: Attempting Twelve Data for price on {ticker}")
-                    quote = td_client.quote(symbol=ticker).as_json()
-                    asset_data['last_price'] = safe_decimal(quote.get('close'))
-                    asset_data['previous_close'] = safe_decimal(quote.get('previous_close'))
-                    asset_data['name'] = quote.get('name') # Get name from here too
-                
-                # Metadata from Tiingo
-                if tiingo_client:
-                    print(f"Fallback: Attempting Tiingo for metadata on {ticker}")
-                    meta = tiingo_client.get_ticker_metadata(ticker)
-                    # Don't overwrite name if already present
-                    if 'name' not in asset_data: asset_data['name'] = meta.get('name')
-                    asset_data['description'] = meta.get('description')
-                    asset_data['exchange_code'] = meta.get('exchangeCode')
-                    if meta.get('startDate'):
-                        asset_data['list_date'] = datetime.strptime(meta['startDate'], '%Y-%m-%d').date()
-            except Exception as e:
-                db.session.rollback()
-                raise ValueError(f"All fallback API calls failed for {ticker}: {e}")
+                provider, data = MarketDataService._hedged_profile(ticker)
+            except (TimeoutError, ProviderUnavailable) as e:
+                # Timeouts and failed providers say nothing about whether the ticker exists, so it is not negatively cached.
+                raise ValueError(f"Market data providers could not be reached for {ticker}: {e}")
+        asset_data = {k: v for k, v in data.items() if v is not None} if data else {}
+        if provider: print(f"Quote for {ticker} served by {provider}.")
+
+        # 2. Fill in missing metadata from a metadata provider, skipped once the request deadline has passed
+        if asset_data and not (asset_data.get('name') and asset_data.get('description')):
+            supplement = MarketDataService._get_metadata_supplement(ticker)
+            # Don't overwrite fields that are already present
+            for field, value in supplement.items():
+                if value is not None and not asset_data.get(field): asset_data[field] = value
 
-        # 3. Create asset if we have minimum data (name and price)
+        # 3. Create asset if we have minimum data (name and price); a provider answered, so a miss is remembered
         if not asset_data or not asset_data.get('name') or not asset_data.get('last_price'):
+            unresolvable_tickers.set(ticker, True)
             raise ValueError(f"Could not find valid data for {ticker} from any source.")
             
         try:
@@ -114,56 +331,137 @@ class MarketDataService:
             db.session.add(asset)
             db.session.commit()
             print(f"New asset '{asset.name}' created.")
-            return asset
+            return asset.id
+        except IntegrityError:
+            # Another worker process created the same ticker first; use its row.
+            db.session.rollback()
+            existing = MarketDataService._get_committed_asset(ticker_symbol=ticker)
+            if existing: return existing.id
+            raise ValueError(f"Failed to commit new asset {ticker} to DB: ticker already exists.")
         except Exception as e:
             db.session.rollback()
             raise ValueError(f"Failed to commit new asset {ticker} to DB: {e}")
 
     @staticmethod
-    def update_asset_prices():
-        """Fetches the latest market price for all assets, with fallbacks."""
+    def _get_batch_quotes(provider: str, tickers: list):
+        """[Internal Helper] Fetches last price and previous close for many tickers in one provider call. Returns {} on failure."""
+        try:
+            print(f"Batch quote: Attempting {provider} for {len(tickers)} tickers")
+            return get_provider(provider).get_quotes(tickers) or {}
+        except Exception as e:
+            print(f"{provider} batch quote failed for {len(tickers)} tickers: {e}")
+            return {}
+
+    @staticmethod
+    def update_asset_prices(batch_size: int = None, asset_ids: list = None, progress=None):
+        """
+        Fetches the latest market price for all STOCK/ETF assets, or only those in `asset_ids`.
+        Quotes are requested in chunks of `batch_size` tickers (defaults to MARKET_DATA_BATCH_SIZE),
+        from the healthiest batch source first, then from the next one for any symbols it missed.
+        Only tickers absent from every batch response fall back to per-ticker lookups.
+        `progress(done, failed, total)` is called as tickers are quoted (see job_service).
+        Returns the IDs of assets no source could quote.
+        """
         print("Starting bulk asset price update...")
-        assets = Asset.query.filter(Asset.asset_type.in_([AssetType.STOCK, AssetType.ETF])).all()
+        query = Asset.query.filter(Asset.asset_type.in_([AssetType.STOCK, AssetType.ETF]))
+        if asset_ids: query = query.filter(Asset.id.in_(asset_ids))
+        assets = query.all()
         if not assets:
-            print("No assets to update."); return
+            print("No assets to update."); return set()
 
-        for asset in assets:
-            # 1. Try yfinance
-            price_data = MarketDataService._get_yfinance_data(asset.ticker_symbol)
-            
-            # 2. Fallback to Twelve Data if yfinance fails
-            if not price_data or not price_data.get('last_price'):
-                if td_client:
-                    try:
-                        print(f"Price fallback: Twelve Data for {asset.ticker_symbol}")
-                        quote = td_client.quote(symbol=asset.ticker_symbol).as_json()
-                        price_data = {
-                            'last_price': safe_decimal(quote.get('close')),
-                            'previous_close': safe_decimal(quote.get('previous_close'))
-                        }
-                    except Exception as e:
-                        print(f"Twelve Data price fallback failed for {asset.ticker_symbol}: {e}")
-
-            # 3. Update if data was found from any source
+        batch_size = batch_size or current_app.config.get('MARKET_DATA_BATCH_SIZE', 100)
+        max_workers = current_app.config.get('MARKET_DATA_MAX_WORKERS', 8)
+        assets_by_ticker = {asset.ticker_symbol: asset for asset in assets}
+        quotes = MarketDataService._fetch_quotes(list(assets_by_ticker), batch_size, max_workers, progress)
+        return MarketDataService._write_quotes(assets_by_ticker, quotes, batch_size)
+
+    @staticmethod
+    def _fetch_quotes(tickers: list, batch_size: int, max_workers: int, progress=None):
+        """
+        [Internal Helper] Steps 1-3 of update_asset_prices: batched quotes from each batch source in turn,
+        then per-ticker lookups for what they all missed. Performs no database access.
+        Returns {ticker: price_data} for every ticker that could be quoted.
+        """
+        progress = progress or (lambda done, failed, total: None)
+        progress(0, 0, len(tickers))
+
+        # 1-2. Batched quotes, healthiest provider first, each covering what the previous one missed
+        quotes = {}
+        for provider in available_providers('quotes'):
+            missing = [t for t in tickers if t not in quotes]
+            if not missing: break
+            fetch = lambda batch, provider=provider: MarketDataService._get_batch_quotes(provider, batch)
+            for _, batch, _ in fetch_all(fetch, chunked(missing, batch_size), max_workers):
+                quotes.update(batch or {})
+                progress(len(quotes), 0, len(tickers))
+
+        # 3. Per-ticker fallback only for symbols absent from every batch response
+        missing = [t for t in tickers if t not in quotes]
+        if missing:
+            print(f"{len(missing)} tickers missing from batch responses. Falling back per ticker.")
+        failed = 0
+        for ticker, price_data, error in fetch_all(MarketDataService._get_profile, missing, max_workers):
+            if error:
+                print(f"Per-ticker quote failed for {ticker}: {error}")
             if price_data and price_data.get('last_price'):
-                asset.last_price = price_data['last_price']
-                asset.previous_close_price = price_data['previous_close']
-                asset.price_updated_at = datetime.utcnow()
-                print(f"Updated {asset.ticker_symbol}: Price={asset.last_price}")
+                quotes[ticker] = price_data
             else:
-                print(f"Could not update price for {asset.ticker_symbol} from any source.")
-        
+                failed += 1
+            progress(len(quotes), failed, len(tickers))
+
+        for ticker, price_data in quotes.items():
+            quote_cache.set(ticker, {field: price_data.get(field) for field in QUOTE_FIELDS})
+        return quotes
+
+    @staticmethod
+    def _write_quotes(assets_by_ticker: dict, quotes: dict, batch_size: int):
+        """
+        [Internal Helper] Step 4 of update_asset_prices: writes only quotes that changed, as narrow executemany
+        UPDATEs of the quote columns, and commits. Unchanged quotes just have price_updated_at re-stamped
+        once it gets old (see ASSET_PRICE_TOUCH_SECONDS). Returns the IDs of assets without a quote.
+        """
+        now = datetime.utcnow()
+        touch_before = price_touch_cutoff(now)
+        changed, touched, unquoted = [], [], set()
+        for ticker, asset in assets_by_ticker.items():
+            price_data = quotes.get(ticker)
+            if not (price_data and price_data.get('last_price')):
+                print(f"Could not update price for {ticker} from any source.")
+                unquoted.add(asset.id); continue
+            last_price, previous_close = quote_value(price_data['last_price']), quote_value(price_data.get('previous_close'))
+            if last_price != quote_value(asset.last_price) or previous_close != quote_value(asset.previous_close_price):
+                changed.append({"id": asset.id, "last_price": last_price, "previous_close_price": previous_close, "price_updated_at": now})
+                print(f"Updated {ticker}: Price={last_price}")
+            elif not asset.price_updated_at or asset.price_updated_at < touch_before:
+                touched.append(asset.id)
+
+        bulk_update_by_id(Asset, changed, batch_size)
+        for chunk in chunked(touched, batch_size):
+            db.session.execute(update(Asset).where(Asset.id.in_(chunk)).values(price_updated_at=now), execution_options={"synchronize_session": False})
         db.session.commit()
-        print("Database price update finished.")
+        # Only portfolios holding a repriced asset lose their cached summaries; re-stamps change nothing they show.
+        invalidate_assets(row["id"] for row in changed)
+        print(f"Database price update finished: {len(changed)} changed, {len(touched)} re-stamped, "
+              f"{len(assets_by_ticker) - len(unquoted) - len(changed) - len(touched)} unchanged.")
+        return unquoted
 
     @staticmethod
-    def get_asset_details(ticker: str):
-        """Gets detailed and historical data for an asset."""
+    def get_asset_details(ticker: str, start: date = None, end: date = None, fields: list = None, interval: str = '1d',
+                          max_points: int = None):
+        """
+        Gets detailed and historical data for an asset using stale-while-revalidate:
+        whatever is stored is returned immediately, and if the quote or history is older than
+        the freshness thresholds a background refresh is scheduled for the next request.
+        History can be bounded by date, limited to specific fields, resampled and downsampled (see get_price_history).
+        """
         asset = MarketDataService.find_or_create_asset(ticker)
-        MarketDataService.update_all_asset_details(asset.id)
-        MarketDataService.update_historical_data(asset.id)
-        asset = db.session.get(Asset, asset.id)
-        historical_data = HistoricalPrice.query.filter_by(asset_id=asset.id).order_by(HistoricalPrice.price_date.asc()).all()
+        historical_data = MarketDataService.get_price_history(asset.id, start, end, fields, interval, max_points)
+        latest_price_date = MarketDataService._get_latest_price_dates([asset.id]).get(asset.id)
+
+        freshness = MarketDataService.get_asset_freshness(asset, latest_price_date)
+        if freshness['is_stale']:
+            freshness['refresh_scheduled'] = MarketDataService.refresh_asset_in_background(asset.id)
+
         return {
             "asset_id": asset.id, "ticker_symbol": asset.ticker_symbol, "name": asset.name,
             "description": asset.description, "exchange": asset.exchange_code,
@@ -171,133 +469,356 @@ class MarketDataService:
             "last_price": float(asset.last_price) if asset.last_price is not None else 0.0,
             "previous_close_price": float(asset.previous_close_price) if asset.previous_close_price is not None else 0.0,
             "currency": asset.currency,
-            "historical_data": [{"date": h.price_date.isoformat(), "close": float(h.close_price)} for h in historical_data]
+            "freshness": freshness,
+            "historical_data": historical_data
         }
 
     @staticmethod
-    def update_historical_data(asset_id: int):
-        """Fetches and stores historical data for an asset, with fallbacks."""
-        asset = db.session.get(Asset, asset_id)
-        if not asset: return
+    def get_price_history(asset_id: int, start: date = None, end: date = None, fields: list = None, interval: str = '1d',
+                          max_points: int = None):
+        """
+        Returns an asset's price history as [{"date": ..., <field>: ...}] dicts, ascending by date.
+        Date bounds and column selection are applied in SQL and rows are serialized straight from
+        tuples, so no HistoricalPrice objects are built. `fields` defaults to ['close'].
+        With `max_points`, the series is reduced with LTTB on the close (or first requested) field.
+        """
+        fields = list(fields or ['close'])
+        unknown = [f for f in fields if f not in HISTORY_FIELDS]
+        if unknown: raise ValueError(f"Unknown history field(s): {', '.join(unknown)}")
+        if interval not in HISTORY_INTERVALS: raise ValueError(f"Unsupported interval '{interval}'.")
 
-        print(f"Updating historical data for {asset.ticker_symbol}...")
-        try:
-            # 1. Primary: yfinance
-            print(f"Hist. data: Trying yfinance for {asset.ticker_symbol}")
-            y_ticker = yf.Ticker(asset.ticker_symbol)
-            hist_df = y_ticker.history(period="1y", interval="1d")
-            if hist_df.empty: raise ValueError("yfinance returned no historical data.")
-            for price_date, row in hist_df.iterrows():
-                price_date_obj = price_date.date()
-                if not HistoricalPrice.query.filter_by(asset_id=asset.id, price_date=price_date_obj).first():
-                    db.session.add(HistoricalPrice(
-                        asset_id=asset.id, price_date=price_date_obj,
-                        open_price=safe_decimal(row.get('Open')), high_price=safe_decimal(row.get('High')),
-                        low_price=safe_decimal(row.get('Low')), close_price=safe_decimal(row.get('Close')),
-                        volume=safe_int(row.get('Volume'))
-                    ))
-            db.session.commit()
-        except Exception as e_yf:
-            # 2. Fallback: Twelve Data
-            print(f"yfinance historical failed for {asset.ticker_symbol}: {e_yf}. Trying Twelve Data.")
-            db.session.rollback()
-            if not td_client:
-                print("Twelve Data client not available. Skipping historical update.")
-                return
+        query = db.session.query(HistoricalPrice.price_date, *[HISTORY_FIELDS[f] for f in fields]) \
+            .filter(HistoricalPrice.asset_id == asset_id)
+        if start: query = query.filter(HistoricalPrice.price_date >= start)
+        if end: query = query.filter(HistoricalPrice.price_date <= end)
+        rows = resample_bars(query.order_by(HistoricalPrice.price_date.asc()).all(), fields, interval)
+        if max_points:
+            rows = downsample_rows(rows, max_points, value_index=fields.index('close') + 1 if 'close' in fields else 1)
+
+        def serialize(field, value):
+            if value is None: return None
+            return int(value) if field == 'volume' else float(value)
+
+        return [
+            {"date": row[0].isoformat(), **{field: serialize(field, row[i]) for i, field in enumerate(fields, start=1)}}
+            for row in rows
+        ]
+
+    @staticmethod
+    def get_asset_freshness(asset: Asset, latest_price_date: date = None):
+        """
+        Describes how old an asset's stored data is. The quote is stale once it is older than
+        ASSET_PRICE_MAX_AGE_SECONDS; the history is stale when a completed weekday is missing.
+        """
+        price_age = (datetime.utcnow() - asset.price_updated_at).total_seconds() if asset.price_updated_at else None
+        price_stale = price_age is None or price_age > current_app.config.get('ASSET_PRICE_MAX_AGE_SECONDS', 900)
+        yesterday = date.today() - timedelta(days=1)
+        history_stale = latest_price_date is None or has_weekday_between(latest_price_date + timedelta(days=1), yesterday)
+        return {
+            "price_updated_at": asset.price_updated_at.isoformat() if asset.price_updated_at else None,
+            "price_age_seconds": int(price_age) if price_age is not None else None,
+            "latest_price_date": latest_price_date.isoformat() if latest_price_date else None,
+            "is_stale": price_stale or history_stale,
+            "refresh_scheduled": False
+        }
+
+    @staticmethod
+    def refresh_asset(asset_id: int):
+        """Refreshes an asset's details, quote and historical data from the providers."""
+        MarketDataService.update_all_asset_details(asset_id)
+        MarketDataService.update_historical_data(asset_id)
+
+    @staticmethod
+    def refresh_asset_in_background(asset_id: int):
+        """
+        Schedules refresh_asset on a background thread with its own app context and session.
+        Returns False without scheduling if a refresh for the asset is already queued or running.
+        """
+        with _refreshing_lock:
+            if asset_id in _refreshing_assets: return False
+            _refreshing_assets.add(asset_id)
+
+        app = current_app._get_current_object()
+
+        def _run():
             try:
-                ts = td_client.time_series(symbol=asset.ticker_symbol, interval="1day", outputsize=365).as_json()
-                for row in ts:
-                    price_date = datetime.strptime(row['datetime'], '%Y-%m-%d').date()
-                    if not HistoricalPrice.query.filter_by(asset_id=asset.id, price_date=price_date).first():
-                        db.session.add(HistoricalPrice(
-                            asset_id=asset.id, price_date=price_date,
-                            open_price=safe_decimal(row.get('open')), high_price=safe_decimal(row.get('high')),
-                            low_price=safe_decimal(row.get('low')), close_price=safe_decimal(row.get('close')),
-                            volume=safe_int(row.get('volume'))
-                        ))
-                db.session.commit()
-            except Exception as e_td:
-                db.session.rollback()
-                print(f"Twelve Data historical also failed for {asset.ticker_symbol}: {e_td}")
+                with app.app_context():
+                    MarketDataService.refresh_asset(asset_id)
+            except Exception as e:
+                print(f"Background refresh failed for asset {asset_id}: {e}")
+            finally:
+                with _refreshing_lock:
+                    _refreshing_assets.discard(asset_id)
+
+        _refresh_executor.submit(_run)
+        return True
 
     @staticmethod
-    def search_assets(query: str):
+    def _get_latest_price_dates(asset_ids: list):
+        """[Internal Helper] Returns {asset_id: latest stored price_date} using a single grouped query."""
+        rows = db.session.query(HistoricalPrice.asset_id, func.max(HistoricalPrice.price_date)) \
+            .filter(HistoricalPrice.asset_id.in_(asset_ids)) \
+            .group_by(HistoricalPrice.asset_id).all()
+        return {asset_id: latest for asset_id, latest in rows}
+
+    @staticmethod
+    def _fetch_historical_data(ticker: str, start: date = None):
         """
-        Searches for a specific ticker symbol using yfinance and returns its full data.
-        Note: This search is intended for ticker symbols (e.g., 'AAPL'), not company names.
+        [Internal Helper] Downloads daily bars for a ticker from the healthiest history source,
+        falling back to the next one on failure.
+        Fetches a full year by default, or only bars from `start` onwards for incremental syncs. Those pass
+        the latest stored bar's date rather than the day after: syncs run intraday, when providers include
+        today's unfinished bar, so the upsert must get to replace a partial bar with the final one.
+        Performs no database access, so it is safe to run on a fetch pool.
+        Returns a list of bar dicts keyed like HistoricalPrice columns.
         """
-        if not query:
+        if start and not has_weekday_between(start, date.today()):
             return []
+        for provider in available_providers('history'):
+            # The window is keyed by its start and today's date, so a re-run the same day reuses the download.
+            key = ['history', provider, ticker, start.isoformat() if start else '1y', date.today().isoformat()]
+            cached = response_cache.get(key)
+            if cached is not None: return cached
+            try:
+                print(f"Hist. data: Trying {provider} for {ticker}" + (f" from {start}" if start else ""))
+                bars = get_provider(provider).get_history(ticker, start)
+                response_cache.set(key, bars, ttl=RESPONSE_CACHE_SETTINGS['history_ttl'])
+                return bars
+            except Exception as e:
+                print(f"{provider} historical failed for {ticker}: {e}")
+        print(f"No historical data source succeeded for {ticker}. Skipping historical update.")
+        return []
+
+    @staticmethod
+    def _store_historical_data(asset: Asset, bars: list):
+        """[Internal Helper] Upserts fetched bars for an asset, one round trip per chunk."""
+        # De-duplicate by date so a chunk never conflicts with itself.
+        rows = {bar['price_date']: dict(bar, asset_id=asset.id) for bar in bars}
+        if not rows: return 0
 
-        print(f"Searching yfinance directly for ticker: {query}")
         try:
-            ticker = yf.Ticker(query)
-            info = ticker.info
-
-            # A valid ticker from yfinance will almost always have a 'longName'.
-            # Invalid tickers may return a dict with few keys or no 'longName'.
-            if info and info.get('longName'):
-                # The function is named search_assets (plural), so it's good practice
-                # to return a list containing the single result.
-                return [info]
-            else:
-                print(f"No valid data found for ticker '{query}' on yfinance.")
-                return []
+            written = upsert_historical_prices(list(rows.values()))
+            db.session.commit()
+            return written
         except Exception as e:
-            print(f"An error occurred during yfinance search for '{query}': {e}")
-            return []
+            db.session.rollback()
+            print(f"Could not store historical data for {asset.ticker_symbol}: {e}")
+            return 0
+
+    @staticmethod
+    def update_historical_data(asset_id: int, incremental: bool = True):
+        """
+        Fetches and stores historical data for an asset, with fallbacks.
+        In incremental mode only bars from the latest stored price_date onwards are requested (see _fetch_historical_data).
+        """
+        asset = db.session.get(Asset, asset_id)
+        if not asset: return
+
+        print(f"Updating historical data for {asset.ticker_symbol}...")
+        start = MarketDataService._get_latest_price_dates([asset.id]).get(asset.id) if incremental else None
+        bars = MarketDataService._fetch_historical_data(asset.ticker_symbol, start)
+        if bars:
+            MarketDataService._store_historical_data(asset, bars)
+
+    @staticmethod
+    def update_all_historical_data(asset_ids: list = None, incremental: bool = True):
+        """
+        Updates historical data for many assets (defaults to every STOCK/ETF/INDEX asset).
+        In incremental mode the latest stored date of every asset is read with one grouped query
+        and only the window from that date onwards is requested. Downloads run in parallel on the fetch pool;
+        upserts stay on the current session. Returns the IDs of assets whose bars could not be fetched or stored.
+        """
+        query = Asset.query.filter(Asset.id.in_(asset_ids)) if asset_ids else \
+            Asset.query.filter(Asset.asset_type.in_([AssetType.STOCK, AssetType.ETF, AssetType.INDEX]))
+        assets = query.all()
+        if not assets:
+            print("No assets found requiring historical data updates."); return set()
+
+        assets_by_ticker = {asset.ticker_symbol: asset for asset in assets}
+        latest_dates = MarketDataService._get_latest_price_dates([asset.id for asset in assets]) if incremental else {}
+        windows = {ticker: latest_dates.get(asset.id) for ticker, asset in assets_by_ticker.items()}
+
+        def fetch(ticker):
+            return MarketDataService._fetch_historical_data(ticker, windows[ticker])
+
+        max_workers = current_app.config.get('MARKET_DATA_MAX_WORKERS', 8)
+        written, failed = 0, set()
+        for ticker, bars, error in fetch_all(fetch, list(assets_by_ticker), max_workers):
+            asset = assets_by_ticker[ticker]
+            if error:
+                print(f"Could not update historical data for {ticker}: {error}")
+                failed.add(asset.id)
+            elif bars:
+                stored = MarketDataService._store_historical_data(asset, bars)
+                if not stored: failed.add(asset.id)
+                written += stored
+        print(f"Wrote {written} historical bars for {len(assets)} assets.")
+        return failed
 
     @staticmethod
     def get_index_data():
-        """Fetches the current price and daily change for major market indices using yfinance."""
+        """Fetches the current price and daily change for major market indices from the healthiest provider that quotes them."""
         index_tickers = {"S&P 500": "^GSPC", "Dow Jones": "^DJI", "Nasdaq": "^IXIC"}
-        try:
-            data = yf.Tickers(" ".join(index_tickers.values()))
+        for provider in available_providers('indices'):
+            try:
+                quotes = get_provider(provider).get_quotes(list(index_tickers.values()))
+            except Exception as e:
+                print(f"Failed to fetch index data from {provider}: {e}"); continue
             index_data = []
             for name, ticker in index_tickers.items():
-                info = data.tickers[ticker].info
-                if info and 'regularMarketPrice' in info and info.get('regularMarketPreviousClose'):
-                    change_pct = ((info['regularMarketPrice'] - info['regularMarketPreviousClose']) / info['regularMarketPreviousClose']) * 100
-                    index_data.append({"name": name, "ticker": ticker, "price": info.get('regularMarketPrice'), "change_percent": change_pct})
-            return index_data
-        except Exception as e:
-            print(f"Failed to fetch index data: {e}"); return []
+                quote = quotes.get(ticker)
+                if quote and quote.get('last_price') and quote.get('previous_close'):
+                    change_pct = ((quote['last_price'] - quote['previous_close']) / quote['previous_close']) * 100
+                    index_data.append({"name": name, "ticker": ticker, "price": float(quote['last_price']), "change_percent": float(change_pct)})
+            if index_data: return index_data
+        return []
+
+    @staticmethod
+    def get_cached_index_data():
+        """Returns the latest market index snapshot from memory without waiting on the provider."""
+        return index_snapshot.get(
+            interval=current_app.config.get('INDEX_SNAPSHOT_REFRESH_SECONDS', 60),
+            background=current_app.config.get('INDEX_SNAPSHOT_BACKGROUND', True)
+        )
     
     @staticmethod
-    def update_all_asset_details(asset_id: int = None):
-        """Updates full details for assets by merging data from yfinance and Tiingo."""
-        assets_to_update = [db.session.get(Asset, asset_id)] if asset_id else Asset.query.filter(Asset.asset_type.in_([AssetType.STOCK, AssetType.ETF])).all()
-        if not assets_to_update: print("No assets for detail update."); return
-
-        for asset in assets_to_update:
-            if not asset: continue
-            print(f"Updating full details for {asset.ticker_symbol}...")
+    def _fetch_asset_details(ticker: str):
+        """[Internal Helper] Fetches the primary profile plus supplemental metadata (e.g. Tiingo). Performs no database access."""
+        # 1. Get primary data from the healthiest quote provider. Detail and SWR refreshes also write the quote,
+        # so an on-disk profile older than the quote max age is refetched rather than served without prices.
+        primary_data = MarketDataService._get_cached_profile(ticker)
+        if not primary_data:
+            for provider in available_providers('quote'):
+                primary_data = MarketDataService._fetch_profile(provider, ticker)
+                if primary_data and primary_data.get('name'): break
+        primary_data = primary_data or {}
+
+        # 2. Get supplemental data from a metadata provider
+        supplemental_data = MarketDataService._get_metadata_supplement(ticker)
+        return primary_data, supplemental_data
+
+    @staticmethod
+    def update_all_asset_details(asset_id: int = None, asset_ids: list = None):
+        """
+        Updates full details for assets by merging the primary profile (yfinance by default) with supplemental metadata (Tiingo).
+        Returns the IDs of assets whose details could not be fetched or written.
+        """
+        query = Asset.query.filter(Asset.asset_type.in_([AssetType.STOCK, AssetType.ETF]))
+        if asset_ids: query = query.filter(Asset.id.in_(asset_ids))
+        assets_to_update = [db.session.get(Asset, asset_id)] if asset_id else query.all()
+        assets_by_ticker = {asset.ticker_symbol: asset for asset in assets_to_update if asset}
+        if not assets_by_ticker: print("No assets for detail update."); return set()
+
+        max_workers = current_app.config.get('MARKET_DATA_MAX_WORKERS', 8)
+        batch_size = current_app.config.get('MARKET_DATA_BATCH_SIZE', 100)
+        pending, unchanged, failed = [], 0, set()
+        for ticker, fetched, error in fetch_all(MarketDataService._fetch_asset_details, list(assets_by_ticker), max_workers):
+            asset = assets_by_ticker[ticker]
+            try:
+                if error: raise error
+                changes = MarketDataService._merge_asset_details(asset, *fetched)
+            except Exception as e:
+                print(f"Could not update details for {ticker}: {e}")
+                failed.add(asset.id); continue
+            if changes:
+                pending.append({"id": asset.id, **changes})
+                print(f"Updating {', '.join(changes)} for {ticker}.")
+            else:
+                unchanged += 1
+            # 4. Only changed columns are written, one executemany UPDATE per batch.
+            if len(pending) >= batch_size:
+                if not MarketDataService._write_asset_details(pending): failed.update(row["id"] for row in pending)
+                pending = []
+        if not MarketDataService._write_asset_details(pending): failed.update(row["id"] for row in pending)
+        print(f"Asset detail update finished: {unchanged} unchanged.")
+        return failed
+
+    @staticmethod
+    def _merge_asset_details(asset: Asset, primary_data: dict, supplemental_data: dict):
+        """
+        [Internal Helper] Merges the primary profile (preferred) and supplemental metadata into an asset's
+        current values. Returns only the columns whose values would change; the asset is not modified.
+        """
+        merged = {
+            "name": primary_data.get('name') or asset.name,
+            # Fill in gaps with supplemental data
+            "description": primary_data.get('description') or supplemental_data.get('description') or asset.description,
+            "exchange_code": primary_data.get('exchange_code') or supplemental_data.get('exchange_code') or asset.exchange_code,
+            "list_date": asset.list_date or primary_data.get('list_date') or supplemental_data.get('list_date')
+        }
+        changes = {column: value for column, value in merged.items() if value != getattr(asset, column)}
+
+        # A profile without a price (every quote provider failed) leaves the stored quote alone.
+        last_price, previous_close = quote_value(primary_data.get('last_price')), quote_value(primary_data.get('previous_close'))
+        if last_price and last_price != quote_value(asset.last_price):
+            changes["last_price"] = last_price
+        if previous_close and previous_close != quote_value(asset.previous_close_price):
+            changes["previous_close_price"] = previous_close
+        now = datetime.utcnow()
+        if "last_price" in changes or "previous_close_price" in changes:
+            changes["price_updated_at"] = now
+        elif last_price and (not asset.price_updated_at or asset.price_updated_at < price_touch_cutoff(now)):
+            # Same re-stamp as _write_quotes: an unchanged quote is still a fresh one.
+            changes["price_updated_at"] = now
+        return changes
+
+    @staticmethod
+    def _write_asset_details(rows: list):
+        """[Internal Helper] Applies a batch of asset detail changes and commits, skipping the batch on failure. Returns False if it failed."""
+        if not rows: return True
+        try:
+            bulk_update_by_id(Asset, rows, len(rows))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Could not update details for {len(rows)} assets: {e}")
+            return False
+        invalidate_assets(row["id"] for row in rows)
+        return True
+
+
+class IndexSnapshot:
+    """
+    Holds the latest market index quotes in memory, refreshed by a daemon thread every `interval`
+    seconds so readers never block on Yahoo. The thread starts on the first read, which keeps it out
+    of short-lived scripts and ensures each gunicorn worker starts its own after forking.
+    A failed refresh keeps serving the previous snapshot. A refresh that changes the quotes replaces the
+    shared indices version token, so summary ETags change with the indices in every worker.
+    """
+    def __init__(self, fetch):
+        self._fetch = fetch
+        self._data = []
+        self.updated_at = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def get(self, interval: int = 60, background: bool = True):
+        if background:
+            self._ensure_started(interval)
+        return self._data
+
+    def refresh(self):
+        data = self._fetch()
+        if data:
+            changed = data != self._data
+            self._data = data
+            self.updated_at = datetime.utcnow()
+            if changed: invalidate_indices()
+        return self._data
+
+    def _ensure_started(self, interval: int):
+        if self._thread and self._thread.is_alive(): return
+        with self._lock:
+            if self._thread and self._thread.is_alive(): return
+            self._thread = threading.Thread(target=self._run, args=(interval,), name='index-snapshot', daemon=True)
+            self._thread.start()
+
+    def _run(self, interval: int):
+        while True:
             try:
-                # 1. Get primary data from yfinance
-                yfinance_data = MarketDataService._get_yfinance_data(asset.ticker_symbol) or {}
-                
-                # 2. Get supplemental data from Tiingo
-                tiingo_data = {}
-                if tiingo_client:
-                    try:
-                        tiingo_data = tiingo_client.get_ticker_metadata(asset.ticker_symbol)
-                    except Exception:
-                        print(f"Could not fetch Tiingo supplemental data for {asset.ticker_symbol}")
-
-                # 3. Merge data, prioritizing yfinance
-                asset.name = yfinance_data.get('name', asset.name)
-                if yfinance_data.get('last_price'): asset.last_price = yfinance_data['last_price']
-                if yfinance_data.get('previous_close'): asset.previous_close_price = yfinance_data['previous_close']
-                
-                # Fill in gaps with Tiingo data
-                asset.description = yfinance_data.get('description') or tiingo_data.get('description', asset.description)
-                asset.exchange_code = yfinance_data.get('exchange_code') or tiingo_data.get('exchangeCode', asset.exchange_code)
-                if not asset.list_date and tiingo_data.get('startDate'):
-                    asset.list_date = datetime.strptime(tiingo_data['startDate'], '%Y-%m-%d').date()
-
-                asset.price_updated_at = datetime.utcnow()
-                db.session.commit()
-                print(f"Successfully updated details for {asset.ticker_symbol}.")
+                self.refresh()
             except Exception as e:
-                print(f"Could not update details for {asset.ticker_symbol}: {e}")
-                db.session.rollback()
\ No newline at end of file
+                print(f"Index snapshot refresh failed: {e}")
+            time.sleep(interval)
+
+index_snapshot = IndexSnapshot(MarketDataService.get_index_data)
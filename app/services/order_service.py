@@ -2,6 +2,7 @@
 
 from app.models.models import db, Account, Asset, Holding, Transaction, TransactionType, TransactionStatus
 from .market_data_service import MarketDataService
+from .summary_cache import invalidate_portfolios
 from decimal import Decimal
 from datetime import date
 
@@ -46,6 +47,8 @@ class OrderService:
             )
             db.session.add(pending_order)
             db.session.commit()
+            # The summary's cash flow counts pending orders too.
+            invalidate_portfolios(account.portfolio_id)
             return pending_order
 
         total_value = quantity * current_price
@@ -86,4 +89,5 @@ class OrderService:
         
         db.session.add(transaction)
         db.session.commit()
+        invalidate_portfolios(account.portfolio_id)
         return transaction
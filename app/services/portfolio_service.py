@@ -2,18 +2,54 @@
 
 from datetime import date, timedelta
 from decimal import Decimal
-from sqlalchemy import func, case
-from ..models.models import db, Portfolio, Account, Holding, Transaction
+from sqlalchemy import and_, func, case
+from sqlalchemy.orm import contains_eager, joinedload
+from ..models.models import db, Portfolio, Account, Asset, Holding, Transaction
 from .market_data_service import MarketDataService
+from .summary_cache import summary_cache
 
-def get_detailed_holdings(portfolio_id: int):
+def _load_holdings(portfolio_id: int):
     """
-    Retrieves a detailed list of all individual holdings for a portfolio.
+    [Internal Helper] Loads every holding of a portfolio together with its account and asset in a single
+    joined query, so valuations never lazy-load per row. The summary shares one result across its sections.
     """
-    holdings = Holding.query.join(Account).filter(Account.portfolio_id == portfolio_id).all()
-    if not holdings:
-        return [], None
+    return Holding.query.join(Holding.account) \
+        .options(contains_eager(Holding.account), joinedload(Holding.asset)) \
+        .filter(Account.portfolio_id == portfolio_id) \
+        .order_by(Holding.id).all()
+
+EMPTY_TOTALS = {"market_value": Decimal('0.0'), "cost_basis": Decimal('0.0'), "todays_change": Decimal('0.0'), "yesterday_value": Decimal('0.0')}
 
+def holdings_totals(portfolio_id: int = None, account_ids: list = None):
+    """
+    Sums the market value, cost basis, today's change and yesterday's value of holdings per account with
+    one grouped query over holdings JOIN assets. Returns {account_id: totals}; accounts without holdings
+    are absent (see EMPTY_TOTALS). As in Holding.market_value, an asset without a price is worth 0, and
+    the day change only covers assets with both a last price and a previous close.
+    """
+    priced = and_(Asset.last_price != 0, Asset.previous_close_price != 0)
+    query = db.session.query(
+        Holding.account_id,
+        func.sum(Holding.quantity * Asset.last_price).label('market_value'),
+        func.sum(Holding.cost_basis).label('cost_basis'),
+        func.sum(case((priced, (Asset.last_price - Asset.previous_close_price) * Holding.quantity), else_=0)).label('todays_change'),
+        func.sum(case((priced, Asset.previous_close_price * Holding.quantity), else_=0)).label('yesterday_value')
+    ).join(Asset, Holding.asset_id == Asset.id).group_by(Holding.account_id)
+    if portfolio_id is not None:
+        query = query.join(Account, Holding.account_id == Account.id).filter(Account.portfolio_id == portfolio_id)
+    if account_ids is not None:
+        query = query.filter(Holding.account_id.in_(account_ids))
+    return {
+        row.account_id: {name: Decimal(str(row._mapping[name] or 0)) for name in EMPTY_TOTALS}
+        for row in query
+    }
+
+def _sum_totals(totals: list):
+    """[Internal Helper] Adds up several accounts' holdings totals."""
+    return {name: sum((t[name] for t in totals), Decimal('0.0')) for name in EMPTY_TOTALS}
+
+def _serialize_holdings(holdings: list):
+    """[Internal Helper] Builds the detailed holdings list from loaded holdings."""
     detailed_holdings = []
     for holding in holdings:
         market_value = holding.market_value
@@ -31,81 +67,36 @@ def get_detailed_holdings(portfolio_id: int):
             "unrealized_pnl": float(unrealized_pnl),
             "current_price": float(holding.asset.last_price) if holding.asset.last_price else None
         })
-        
-    return detailed_holdings, None
+    return detailed_holdings
+
+def get_detailed_holdings(portfolio_id: int):
+    """
+    Retrieves a detailed list of all individual holdings for a portfolio.
+    """
+    return _serialize_holdings(_load_holdings(portfolio_id)), None
 
 def get_total_holdings_value(portfolio_id: int):
     """Calculates the total market value of all assets held in a portfolio."""
-    holdings = Holding.query.join(Account).filter(Account.portfolio_id == portfolio_id).all()
-    total_value = sum(holding.market_value for holding in holdings)
+    total_value = _sum_totals(holdings_totals(portfolio_id).values())["market_value"]
     return {"total_holdings_value": float(total_value)}, None
 
-def get_portfolio_summary(portfolio_id: int):
-    """
-    Calculates a full summary for a given portfolio, assuming a single account model.
-    """
-    portfolio = db.session.get(Portfolio, portfolio_id)
-    if not portfolio:
-        return None, "Portfolio not found"
+# --- Summary Sections ---
+# Each section of the portfolio summary is computed independently, so callers that need one slice
+# (e.g. the movers or allocation routes) never pay for the others.
+SUMMARY_SECTIONS = ('performance', 'movers', 'indices', 'holdings', 'cash_flow', 'allocation')
 
-    # --- Simplified Single-Account Logic ---
-    account = portfolio.accounts[0] if portfolio.accounts else None
-    if not account:
-        return None, "No account found for this portfolio."
-
-    # --- Calculate Core Metrics from the Single Account ---
-    total_holdings_value = account.holdings_market_value
+def _performance_section(portfolio_id: int, account: Account):
+    """[Internal Helper] Net worth and P&L of the single account, plus today's change across the portfolio."""
+    totals = holdings_totals(portfolio_id)
+    account_totals = totals.get(account.id, EMPTY_TOTALS)
+    total_holdings_value = account_totals["market_value"]
     net_worth = account.balance + total_holdings_value
-    total_initial_investment = sum(h.cost_basis for h in account.holdings)
-    
+    total_initial_investment = account_totals["cost_basis"]
+
     overall_pl = total_holdings_value - total_initial_investment
     overall_pl_percent = (overall_pl / total_initial_investment) * 100 if total_initial_investment > 0 else Decimal('0.0')
-
-    # --- Calculate Insights based on all holdings in the portfolio ---
-    total_todays_change = Decimal('0.0')
-    total_yesterday_value = Decimal('0.0')
-    daily_movers = []
-    
-    all_holdings = Holding.query.join(Account).filter(Account.portfolio_id == portfolio_id).all()
-    for holding in all_holdings:
-        if holding.asset and holding.asset.last_price and holding.asset.previous_close_price:
-            change_for_holding = (holding.asset.last_price - holding.asset.previous_close_price) * holding.quantity
-            total_todays_change += change_for_holding
-            
-            yesterday_holding_value = holding.asset.previous_close_price * holding.quantity
-            total_yesterday_value += yesterday_holding_value
-            
-            percent_change = (change_for_holding / yesterday_holding_value) * 100 if yesterday_holding_value > 0 else Decimal('0.0')
-            daily_movers.append({
-                "ticker": holding.asset.ticker_symbol,
-                "name": holding.asset.name,
-                "change_amount": float(change_for_holding),
-                "percent_change": float(percent_change)
-            })
-
-    # --- Fetch Market Index Data ---
-    market_indices = MarketDataService.get_index_data()
-
-    # --- Determine Top 5 Gainers and Losers ---
-    daily_movers.sort(key=lambda x: x['change_amount'], reverse=True)
-    top_gainers = daily_movers[:5]
-    top_losers = sorted([mover for mover in daily_movers if mover['change_amount'] < 0], key=lambda x: x['change_amount'])[:5]
-
-    # --- Calculate Cash Flow for the Last 30 Days ---
-    thirty_days_ago = date.today() - timedelta(days=30)
-    cash_flow_query = db.session.query(
-        func.sum(case((Transaction.total_amount > 0, Transaction.total_amount), else_=0)).label('income'),
-        func.sum(case((Transaction.total_amount < 0, Transaction.total_amount), else_=0)).label('spending')
-    ).join(Account).filter(
-        Account.portfolio_id == portfolio_id,
-        Transaction.transaction_date >= thirty_days_ago
-    ).one()
-    
-    income = cash_flow_query.income or Decimal('0.0')
-    spending = cash_flow_query.spending or Decimal('0.0')
-    
-    # --- Assemble the Complete Summary Object ---
-    summary = {
+    total_todays_change = _sum_totals(totals.values())["todays_change"]
+    return {
         "net_worth": float(net_worth),
         "performance": {
             "total_initial_investment": float(total_initial_investment),
@@ -113,18 +104,134 @@ def get_portfolio_summary(portfolio_id: int):
             "overall_pl": float(overall_pl),
             "overall_pl_percent": float(overall_pl_percent),
             "todays_change_amount": float(total_todays_change),
-        },
-        "market_indices": market_indices,
-        "detailed_holdings": get_detailed_holdings(portfolio_id)[0],
-        "account": {
-            "id": account.id,
-            "name": account.name,
-            "cash_balance": float(account.balance)
-        },
+        }
+    }
+
+def _movers_section(portfolio_id: int, account: Account, limit: int = 5):
+    """
+    [Internal Helper] Top daily gainers and losers among the portfolio's holdings, ranked and limited in SQL.
+    Only holdings whose asset has both a last price and a previous close are ranked.
+    """
+    change = ((Asset.last_price - Asset.previous_close_price) * Holding.quantity).label('change_amount')
+    yesterday = (Asset.previous_close_price * Holding.quantity).label('yesterday_value')
+    ranked = db.session.query(Asset.ticker_symbol, Asset.name, change, yesterday) \
+        .join(Holding, Holding.asset_id == Asset.id).join(Account, Holding.account_id == Account.id) \
+        .filter(Account.portfolio_id == portfolio_id, Asset.last_price != 0, Asset.previous_close_price != 0)
+
+    def serialize(rows):
+        return [{
+            "ticker": row.ticker_symbol,
+            "name": row.name,
+            "change_amount": float(row.change_amount),
+            "percent_change": float(row.change_amount) / float(row.yesterday_value) * 100 if row.yesterday_value and row.yesterday_value > 0 else 0.0
+        } for row in rows]
+
+    return {
         "insights": {
-            "top_gainers": top_gainers,
-            "top_losers": top_losers
+            "top_gainers": serialize(ranked.order_by(change.desc(), Holding.id).limit(limit)),
+            "top_losers": serialize(ranked.filter(change < 0).order_by(change, Holding.id).limit(limit))
+        }
+    }
+
+def _indices_section(portfolio_id: int, account: Account):
+    """[Internal Helper] Market indices, served from the in-memory snapshot."""
+    return {"market_indices": MarketDataService.get_cached_index_data()}
+
+def _holdings_section(portfolio_id: int, account: Account):
+    """[Internal Helper] The detailed holdings list, loaded with one joined query."""
+    return {"detailed_holdings": _serialize_holdings(_load_holdings(portfolio_id))}
+
+def _cash_flow_section(portfolio_id: int, account: Account, days: int = 30):
+    """[Internal Helper] Deposits and other inflows versus withdrawals and outflows over the last `days` days."""
+    since = date.today() - timedelta(days=days)
+    cash_flow_query = db.session.query(
+        func.sum(case((Transaction.total_amount > 0, Transaction.total_amount), else_=0)).label('income'),
+        func.sum(case((Transaction.total_amount < 0, Transaction.total_amount), else_=0)).label('spending')
+    ).join(Account).filter(
+        Account.portfolio_id == portfolio_id,
+        Transaction.transaction_date >= since
+    ).one()
+    return {
+        "cash_flow": {
+            "period_days": days,
+            "income": float(cash_flow_query.income or 0),
+            "spending": float(cash_flow_query.spending or 0)
+        }
+    }
+
+def _allocation_section(portfolio_id: int, account: Account):
+    """[Internal Helper] Market value and weight of holdings per asset type, grouped in SQL."""
+    rows = db.session.query(Asset.asset_type, func.sum(Holding.quantity * Asset.last_price)) \
+        .join(Holding, Holding.asset_id == Asset.id).join(Account, Holding.account_id == Account.id) \
+        .filter(Account.portfolio_id == portfolio_id).group_by(Asset.asset_type).all()
+    values = {asset_type.value: float(value or 0) for asset_type, value in rows}
+    total = sum(values.values())
+    return {
+        "allocation": {
+            asset_type: {"market_value": value, "percent": value / total * 100 if total else 0.0}
+            for asset_type, value in sorted(values.items(), key=lambda item: item[1], reverse=True)
         }
     }
 
-    return summary, None
\ No newline at end of file
+SECTION_BUILDERS = {
+    'performance': _performance_section,
+    'movers': _movers_section,
+    'indices': _indices_section,
+    'holdings': _holdings_section,
+    'cash_flow': _cash_flow_section,
+    'allocation': _allocation_section
+}
+
+def parse_summary_fields(value: str):
+    """Parses a comma-separated fields= query value into summary sections. None or empty means every section."""
+    if not value: return None
+    return [field.strip() for field in value.split(',') if field.strip()]
+
+def get_portfolio_summary(portfolio_id: int, fields: list = None):
+    """
+    Calculates a summary for a given portfolio, assuming a single account model.
+    `fields` selects sections from SUMMARY_SECTIONS (all by default); only those are computed.
+    The account block is always included. Raises ValueError for unknown fields.
+    Database-derived sections are served from the summary cache until a write invalidates the portfolio;
+    market indices change on their own schedule and are always attached from the live snapshot.
+    """
+    fields = list(fields or SUMMARY_SECTIONS)
+    unknown = [field for field in fields if field not in SUMMARY_SECTIONS]
+    if unknown:
+        raise ValueError(f"Unknown summary field(s): {', '.join(unknown)}. Choose from: {', '.join(SUMMARY_SECTIONS)}")
+
+    cached_sections = [section for section in fields if section != 'indices']
+    version = summary_cache.version(portfolio_id)  # Read before computing; see SummaryCache.
+    summary = summary_cache.get(portfolio_id, version, cached_sections)
+    if summary is None:
+        summary, error = _compute_summary(portfolio_id, cached_sections)
+        if error: return None, error
+        summary_cache.set(portfolio_id, version, cached_sections, summary)
+
+    summary = dict(summary)  # Never mutate a cached entry.
+    if 'indices' in fields:
+        summary.update(_indices_section(portfolio_id, None))
+    return summary, None
+
+def _compute_summary(portfolio_id: int, fields: list):
+    """[Internal Helper] Computes the requested summary sections from the database."""
+    portfolio = db.session.get(Portfolio, portfolio_id)
+    if not portfolio:
+        return None, "Portfolio not found"
+
+    # --- Simplified Single-Account Logic ---
+    account = portfolio.accounts[0] if portfolio.accounts else None
+    if not account:
+        return None, "No account found for this portfolio."
+
+    # --- Assemble the Requested Sections ---
+    summary = {}
+    for section in SUMMARY_SECTIONS:
+        if section in fields:
+            summary.update(SECTION_BUILDERS[section](portfolio_id, account))
+    summary["account"] = {
+        "id": account.id,
+        "name": account.name,
+        "cash_balance": float(account.balance)
+    }
+    return summary, None
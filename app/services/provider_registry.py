@@ -0,0 +1,328 @@
+# app/services/provider_registry.py
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from .fetch_pool import throttle
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+class ProviderUnavailable(Exception):
+    """Raised instead of calling a provider whose circuit breaker is open."""
+
+# Runs hedged attempts; losing attempts finish in the background and their results are ignored.
+# Every provider call is bounded by the call timeout, so a stuck provider frees its worker once that passes.
+_hedge_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='provider-hedge')
+# The request deadline (monotonic time) in force on the current thread, if any; see deadline_scope.
+_deadline = threading.local()
+
+def _remaining_time():
+    """[Internal Helper] Seconds left until the current thread's request deadline, or None without one."""
+    deadline_at = getattr(_deadline, 'at', None)
+    return None if deadline_at is None else deadline_at - time.monotonic()
+
+def _with_deadline(deadline_at: float, fn):
+    """[Internal Helper] Wraps fn to run under `deadline_at` on whichever thread executes it."""
+    def bounded():
+        _deadline.at = deadline_at
+        try:
+            return fn()
+        finally:
+            _deadline.at = None
+    return bounded
+
+def _call_with_timeout(name: str, fn, args, kwargs, timeout: float):
+    """
+    [Internal Helper] Runs fn on a daemon thread and waits at most `timeout` seconds for it. The provider
+    client libraries have no reliable timeouts of their own, so a call that overruns is abandoned rather
+    than cancelled: it finishes in the background and its result is dropped.
+    """
+    outcome = {}
+    def run():
+        try:
+            outcome['result'] = fn(*args, **kwargs)
+        except BaseException as e:
+            outcome['error'] = e
+    worker = threading.Thread(target=run, name=f'provider-call-{name}', daemon=True)
+    worker.start()
+    worker.join(max(0.0, timeout))
+    if worker.is_alive():
+        raise TimeoutError(f"{name} did not answer within {timeout:.2f} seconds.")
+    if 'error' in outcome: raise outcome['error']
+    return outcome['result']
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures so callers skip the provider immediately.
+    After `reset_timeout` seconds a single half-open probe is let through: success closes the
+    breaker again, failure re-opens it for another `reset_timeout`.
+    """
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _current_state(self):
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state, self._probing = HALF_OPEN, False
+        return self.state
+
+    def allow(self):
+        """Returns True if a call may go through now. In the half-open state only one probe is allowed at a time."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED: return True
+            if state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state, self.consecutive_failures, self._probing = CLOSED, 0, False
+
+    def release_probe(self):
+        """Gives back the half-open probe taken by allow() for a call that was never made."""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self.state, self.opened_at, self._probing = OPEN, time.monotonic(), False
+
+    def reset(self):
+        self.record_success()
+
+    def snapshot(self):
+        with self._lock:
+            state = self._current_state()
+            retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at)) if state == OPEN else 0.0
+            return {"state": state, "consecutive_failures": self.consecutive_failures, "retry_in_seconds": round(retry_in, 1)}
+
+class ProviderStats:
+    """Rolling latency and error statistics over a provider's last `window` calls."""
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.total_calls = 0
+        self.total_errors = 0
+
+    def record(self, latency: float, ok: bool):
+        with self._lock:
+            self._samples.append((latency, ok))
+            self.total_calls += 1
+            if not ok: self.total_errors += 1
+
+    def __len__(self):
+        return len(self._samples)
+
+    def error_rate(self):
+        with self._lock:
+            if not self._samples: return 0.0
+            return sum(1 for _, ok in self._samples if not ok) / len(self._samples)
+
+    def percentile(self, pct: float):
+        """Returns the `pct` percentile (0-100) of recent successful call latencies, or None without samples."""
+        with self._lock:
+            latencies = sorted(latency for latency, ok in self._samples if ok)
+        if not latencies: return None
+        return latencies[min(len(latencies) - 1, int(round(pct / 100 * (len(latencies) - 1))))]
+
+    def snapshot(self):
+        p50, p95 = self.percentile(50), self.percentile(95)
+        return {
+            "window_calls": len(self),
+            "error_rate": round(self.error_rate(), 4),
+            "latency_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "latency_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "total_calls": self.total_calls,
+            "total_errors": self.total_errors
+        }
+
+class ProviderRegistry:
+    """
+    Tracks every market data provider's circuit breaker and rolling statistics, runs provider
+    calls through them, and orders fallback chains so the currently healthiest provider goes first.
+    Providers are registered in preference order, which breaks ties between equally healthy ones.
+    """
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30, window: int = 200, latency_bucket: float = 1.0,
+                 hedge_percentile: float = 95, hedge_min_delay: float = 0.25, hedge_default_delay: float = 1.0,
+                 request_deadline: float = 8.0, call_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.window = window
+        self.latency_bucket = latency_bucket
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_default_delay = hedge_default_delay
+        self.request_deadline = request_deadline
+        self.call_timeout = call_timeout
+        self._providers = {}
+        self._lock = threading.Lock()
+
+    def configure(self, **settings):
+        """Applies breaker, statistics and hedging settings (constructor keyword names) from app config. Resets all recorded state."""
+        with self._lock:
+            for name, value in settings.items():
+                if value is not None: setattr(self, name, value)
+            names = list(self._providers)
+            self._providers.clear()
+        for name in names:
+            self.register(name)
+
+    def register(self, name: str):
+        with self._lock:
+            if name not in self._providers:
+                self._providers[name] = (CircuitBreaker(self.failure_threshold, self.reset_timeout), ProviderStats(self.window))
+            return self._providers[name]
+
+    def breaker(self, name: str):
+        return self.register(name)[0]
+
+    def stats(self, name: str):
+        return self.register(name)[1]
+
+    def call(self, name: str, fn, *args, tokens: float = 1, **kwargs):
+        """
+        Calls fn(*args, **kwargs) against provider `name`: raises ProviderUnavailable while its
+        breaker is open, waits for its rate limit, then records the call's latency and outcome.
+        The call is given up with TimeoutError after `call_timeout` seconds, or sooner if the thread's
+        request deadline (see deadline_scope) comes first; a call after that deadline, or one whose rate
+        limit wait would run past it, is never made.
+        Exceptions raised by fn, including timeouts, count as failures and are re-raised.
+        """
+        remaining = _remaining_time()
+        if remaining is not None and remaining <= 0:
+            raise TimeoutError(f"The request deadline passed before {name} was called.")
+        breaker, stats = self.register(name)
+        if not breaker.allow():
+            raise ProviderUnavailable(f"{name} is temporarily disabled after repeated failures.")
+        try:
+            throttle(name, tokens, timeout=_remaining_time())
+        except TimeoutError:
+            breaker.release_probe()
+            raise
+        timeout, remaining = self.call_timeout or None, _remaining_time()
+        if remaining is not None: timeout = remaining if timeout is None else min(timeout, remaining)
+        started = time.monotonic()
+        try:
+            result = fn(*args, **kwargs) if timeout is None else _call_with_timeout(name, fn, args, kwargs, timeout)
+        except Exception:
+            stats.record(time.monotonic() - started, ok=False)
+            breaker.record_failure()
+            raise
+        stats.record(time.monotonic() - started, ok=True)
+        breaker.record_success()
+        return result
+
+    def hedge_delay(self, name: str):
+        """How long to wait on `name` before hedging: its configured latency percentile, never below the minimum delay."""
+        observed = self.stats(name).percentile(self.hedge_percentile)
+        return max(self.hedge_min_delay, self.hedge_default_delay if observed is None else observed)
+
+    @contextmanager
+    def deadline_scope(self, deadline: float = None):
+        """
+        Bounds every provider call made on this thread inside the block, hedged or not, by one request
+        deadline (default request_deadline) so follow-up lookups cannot outlast it. Nested scopes keep the earlier deadline.
+        """
+        previous = getattr(_deadline, 'at', None)
+        deadline_at = time.monotonic() + (deadline or self.request_deadline)
+        _deadline.at = deadline_at if previous is None else min(previous, deadline_at)
+        try:
+            yield
+        finally:
+            _deadline.at = previous
+
+    def hedged(self, attempts, accept=bool, deadline: float = None):
+        """
+        Runs `attempts`, a list of (provider, fn) in fallback order, as a hedged request. The first
+        attempt starts immediately; the next one starts as soon as the previous fails or has been
+        running longer than its hedge delay, so a slow provider is raced rather than waited out.
+        Returns (provider, result) for the first result passing `accept`, or (None, None) if every
+        attempt failed. Raises TimeoutError once `deadline` seconds (default request_deadline), or the
+        enclosing deadline_scope, pass. Losing attempts are cancelled if they have not started and otherwise
+        ignored; their provider calls run under the same deadline, so they free their worker once it passes.
+        """
+        deadline_at = time.monotonic() + (deadline or self.request_deadline)
+        if getattr(_deadline, 'at', None) is not None: deadline_at = min(deadline_at, _deadline.at)
+        remaining, pending = list(attempts), {}
+        next_hedge_at = None
+
+        def launch():
+            provider, fn = remaining.pop(0)
+            pending[_hedge_executor.submit(_with_deadline(deadline_at, fn))] = provider
+            return time.monotonic() + self.hedge_delay(provider)
+
+        if remaining: next_hedge_at = launch()
+        while pending:
+            now = time.monotonic()
+            if now >= deadline_at: break
+            wake_at = min(deadline_at, next_hedge_at) if remaining else deadline_at
+            done, _ = wait(pending, timeout=max(0.0, wake_at - now), return_when=FIRST_COMPLETED)
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception:
+                    continue
+                if accept(result):
+                    for loser in pending: loser.cancel()
+                    return provider, result
+            if remaining and (not pending or time.monotonic() >= next_hedge_at):
+                next_hedge_at = launch()
+
+        if pending:
+            for loser in pending: loser.cancel()
+            raise TimeoutError(f"No provider answered within {deadline or self.request_deadline} seconds.")
+        return None, None
+
+    def _health_key(self, name: str, preference: int):
+        breaker, stats = self.register(name)
+        state_rank = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}[breaker.snapshot()['state']]
+        p50 = stats.percentile(50) or 0.0
+        # Coarse buckets so small latency differences do not override the preference order.
+        return (state_rank, round(stats.error_rate(), 1), int(p50 // self.latency_bucket), preference)
+
+    def ordered(self, names):
+        """Returns the given providers healthiest first, leaving out those whose breaker is open."""
+        names = list(names)
+        ranked = sorted(names, key=lambda name: self._health_key(name, names.index(name)))
+        return [name for name in ranked if self.breaker(name).snapshot()['state'] != OPEN]
+
+    def snapshot(self):
+        """Returns breaker state and rolling statistics for every registered provider."""
+        with self._lock:
+            names = list(self._providers)
+        return {name: {**self.breaker(name).snapshot(), **self.stats(name).snapshot()} for name in names}
+
+    def reset(self, name: str = None):
+        """Closes the breaker of one provider (or all of them)."""
+        with self._lock:
+            names = [name] if name else list(self._providers)
+        for provider in names:
+            self.breaker(provider).reset()
+
+provider_registry = ProviderRegistry()
+
+def configure_providers(config):
+    """Applies circuit breaker, statistics and hedging settings from the app config."""
+    provider_registry.configure(
+        failure_threshold=config.get('PROVIDER_BREAKER_FAILURE_THRESHOLD'),
+        reset_timeout=config.get('PROVIDER_BREAKER_RESET_SECONDS'),
+        window=config.get('PROVIDER_STATS_WINDOW'),
+        latency_bucket=config.get('PROVIDER_LATENCY_BUCKET_SECONDS'),
+        hedge_percentile=config.get('PROVIDER_HEDGE_PERCENTILE'),
+        hedge_min_delay=config.get('PROVIDER_HEDGE_MIN_DELAY_SECONDS'),
+        hedge_default_delay=config.get('PROVIDER_HEDGE_DEFAULT_DELAY_SECONDS'),
+        request_deadline=config.get('PROVIDER_REQUEST_DEADLINE_SECONDS'),
+        call_timeout=config.get('PROVIDER_CALL_TIMEOUT_SECONDS')
+    )
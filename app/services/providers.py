@@ -0,0 +1,327 @@
+# app/services/providers.py
+
+import json
+import os
+import random
+import time
+import zlib
+import yfinance as yf
+from datetime import datetime, timedelta, date
+from decimal import Decimal, InvalidOperation
+from twelvedata import TDClient
+from tiingo import TiingoClient
+from .provider_registry import provider_registry
+
+def safe_decimal(value, default=Decimal('0.0')):
+    """Safely converts a value to a Decimal, returning a default on failure."""
+    try:
+        if value is None or str(value).lower() in ['none', 'nan', '']: return default
+        return Decimal(str(value))
+    except (InvalidOperation, ValueError): return default
+
+def safe_int(value, default=0):
+    """Safely converts a value to an integer, returning a default on failure."""
+    try:
+        if value is None or str(value).lower() in ['none', 'nan', '']: return default
+        return int(float(value))
+    except (ValueError, TypeError): return default
+
+class MarketDataProvider:
+    """
+    Interface the market data service depends on. Implementations return plain dicts, perform no
+    database access, and route every remote call through `call` so it is rate limited and tracked
+    by the provider registry. Operations a provider does not support raise NotImplementedError and
+    are left out of its `capabilities`:
+
+    - 'profile' / 'quote' / 'metadata': get_profile(ticker) returns a dict with any of name, description,
+      exchange_code, list_date, last_price, previous_close and currency ('quote' providers include prices,
+      'metadata' providers descriptive fields), or None if the ticker is unknown.
+    - 'quotes': get_quotes(tickers) returns {ticker: {'last_price', 'previous_close'}} in one call.
+    - 'history': get_history(ticker, start) returns daily bar dicts keyed like HistoricalPrice columns.
+    - 'indices': get_quotes also accepts market index symbols such as ^GSPC.
+    """
+    name = None
+    capabilities = frozenset()
+
+    def is_configured(self):
+        return True
+
+    def call(self, fn, *args, tokens: float = 1, **kwargs):
+        return provider_registry.call(self.name, fn, *args, tokens=tokens, **kwargs)
+
+    def get_profile(self, ticker: str):
+        raise NotImplementedError
+
+    def get_quotes(self, tickers: list):
+        raise NotImplementedError
+
+    def get_history(self, ticker: str, start: date = None):
+        raise NotImplementedError
+
+class YFinanceProvider(MarketDataProvider):
+    name = 'yfinance'
+    capabilities = frozenset({'profile', 'quote', 'metadata', 'quotes', 'history', 'indices'})
+
+    def get_profile(self, ticker: str):
+        info = self.call(lambda: yf.Ticker(ticker).info)
+        if not info or not info.get('longName'): return None
+        list_date_ms = info.get('firstTradeDateMilliseconds')
+        return {
+            "name": info.get('longName'),
+            "description": info.get('longBusinessSummary'),
+            "exchange_code": info.get('exchange'),
+            "list_date": datetime.fromtimestamp(list_date_ms / 1000).date() if list_date_ms else None,
+            "last_price": safe_decimal(info.get('currentPrice') or info.get('regularMarketPrice')),
+            "previous_close": safe_decimal(info.get('previousClose') or info.get('regularMarketPreviousClose')),
+            "currency": info.get('financialCurrency', 'USD')
+        }
+
+    def get_quotes(self, tickers: list):
+        df = self.call(yf.download, tickers, period="5d", interval="1d", auto_adjust=False, progress=False, threads=False)
+        quotes = {}
+        if df is None or df.empty: return quotes
+        closes = df['Close']
+        if getattr(closes, 'columns', None) is None:
+            closes = closes.to_frame(name=tickers[0])
+        for ticker in tickers:
+            if ticker not in closes.columns: continue
+            series = closes[ticker].dropna()
+            if series.empty: continue
+            last_price = safe_decimal(series.iloc[-1])
+            if not last_price: continue
+            quotes[ticker] = {
+                'last_price': last_price,
+                'previous_close': safe_decimal(series.iloc[-2]) if len(series) > 1 else None
+            }
+        return quotes
+
+    def get_history(self, ticker: str, start: date = None):
+        def download():
+            y_ticker = yf.Ticker(ticker)
+            if start:
+                return y_ticker.history(start=start.isoformat(), interval="1d")
+            return y_ticker.history(period="1y", interval="1d")
+
+        hist_df = self.call(download)
+        if hist_df.empty: raise ValueError("yfinance returned no historical data.")
+        return [{
+            'price_date': price_date.date(),
+            'open_price': safe_decimal(row.get('Open')), 'high_price': safe_decimal(row.get('High')),
+            'low_price': safe_decimal(row.get('Low')), 'close_price': safe_decimal(row.get('Close')),
+            'volume': safe_int(row.get('Volume'))
+        } for price_date, row in hist_df.iterrows()]
+
+class TwelveDataProvider(MarketDataProvider):
+    name = 'twelvedata'
+    capabilities = frozenset({'profile', 'quote', 'quotes', 'history'})
+
+    def __init__(self, api_key: str = None):
+        self.client = TDClient(apikey=api_key) if api_key and api_key != 'YOUR_TWELVE_DATA_KEY' else None
+
+    def is_configured(self):
+        return self.client is not None
+
+    def get_profile(self, ticker: str):
+        quote = self.call(lambda: self.client.quote(symbol=ticker).as_json())
+        if not quote or quote.get('status') == 'error': return None
+        return {
+            'name': quote.get('name'),
+            'exchange_code': quote.get('exchange'),
+            'currency': quote.get('currency'),
+            'last_price': safe_decimal(quote.get('close')),
+            'previous_close': safe_decimal(quote.get('previous_close'))
+        }
+
+    def get_quotes(self, tickers: list):
+        # Twelve Data bills one credit per symbol in a batch request.
+        response = self.call(lambda: self.client.quote(symbol=",".join(tickers)).as_json(), tokens=len(tickers))
+        # A single-symbol request returns the quote itself rather than a symbol-keyed dict.
+        if len(tickers) == 1: response = {tickers[0]: response}
+        quotes = {}
+        for ticker, quote in (response or {}).items():
+            if not isinstance(quote, dict) or quote.get('status') == 'error': continue
+            last_price = safe_decimal(quote.get('close'))
+            if not last_price: continue
+            quotes[ticker.upper()] = {
+                'last_price': last_price,
+                'previous_close': safe_decimal(quote.get('previous_close'))
+            }
+        return quotes
+
+    def get_history(self, ticker: str, start: date = None):
+        def download():
+            if start:
+                return self.client.time_series(symbol=ticker, interval="1day", start_date=start.isoformat(), outputsize=5000).as_json()
+            return self.client.time_series(symbol=ticker, interval="1day", outputsize=365).as_json()
+
+        ts = self.call(download)
+        return [{
+            'price_date': datetime.strptime(row['datetime'], '%Y-%m-%d').date(),
+            'open_price': safe_decimal(row.get('open')), 'high_price': safe_decimal(row.get('high')),
+            'low_price': safe_decimal(row.get('low')), 'close_price': safe_decimal(row.get('close')),
+            'volume': safe_int(row.get('volume'))
+        } for row in ts]
+
+class TiingoProvider(MarketDataProvider):
+    name = 'tiingo'
+    capabilities = frozenset({'profile', 'metadata'})
+
+    def __init__(self, api_key: str = None):
+        self.client = TiingoClient({'api_key': api_key}) if api_key and api_key != 'YOUR_TIINGO_KEY' else None
+
+    def is_configured(self):
+        return self.client is not None
+
+    def get_profile(self, ticker: str):
+        meta = self.call(self.client.get_ticker_metadata, ticker)
+        if not meta: return None
+        return {
+            'name': meta.get('name'),
+            'description': meta.get('description'),
+            'exchange_code': meta.get('exchangeCode'),
+            'list_date': datetime.strptime(meta['startDate'], '%Y-%m-%d').date() if meta.get('startDate') else None
+        }
+
+class LocalProvider(MarketDataProvider):
+    """
+    Offline stand-in for benchmarks and load tests. Replays responses recorded to `data_dir`
+    (one <TICKER>.json file per symbol, as written by `flask record-market-data`) and, when
+    `synthesize` is set, generates deterministic data for any other ticker. Latency and errors
+    are injected on every call to mimic a remote provider.
+    """
+    name = 'local'
+    capabilities = frozenset({'profile', 'quote', 'metadata', 'quotes', 'history', 'indices'})
+
+    def __init__(self, data_dir: str = None, synthesize: bool = True, latency_ms: float = 0, latency_jitter_ms: float = 0,
+                 error_rate: float = 0.0, history_days: int = 365, seed: int = None):
+        self.data_dir = data_dir
+        self.synthesize = synthesize
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.error_rate = error_rate
+        self.history_days = history_days
+        self._random = random.Random(seed)
+
+    def _simulate(self, fn):
+        """Runs fn after the injected delay, failing instead at the configured error rate."""
+        delay = max(0.0, self.latency_ms + self._random.uniform(-self.latency_jitter_ms, self.latency_jitter_ms)) / 1000
+        if delay: time.sleep(delay)
+        if self.error_rate and self._random.random() < self.error_rate:
+            raise ConnectionError("Injected failure from the local market data provider.")
+        return fn()
+
+    def _load(self, ticker: str):
+        """Returns (profile, bars) for a ticker from its recording, or synthesized, or None."""
+        path = os.path.join(self.data_dir, f"{ticker.upper()}.json") if self.data_dir else None
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                recording = json.load(f)
+            profile = dict(recording.get('profile') or {})
+            for field in ('last_price', 'previous_close'):
+                if profile.get(field) is not None: profile[field] = safe_decimal(profile[field])
+            if profile.get('list_date'): profile['list_date'] = date.fromisoformat(profile['list_date'])
+            bars = [dict(
+                {k: safe_decimal(v) for k, v in bar.items() if k.endswith('_price')},
+                price_date=date.fromisoformat(bar['price_date']), volume=safe_int(bar.get('volume'))
+            ) for bar in recording.get('history') or []]
+            return profile, bars
+        if self.synthesize:
+            return self._synthesized(ticker.upper())
+        return None
+
+    def _synthesized(self, ticker: str):
+        """A deterministic random walk per ticker over the last `history_days` weekdays."""
+        rng = random.Random(zlib.crc32(ticker.encode()))
+        price = rng.uniform(5, 500)
+        bars, day = [], date.today() - timedelta(days=self.history_days)
+        while day <= date.today():
+            if day.weekday() < 5:
+                open_price = price
+                price = max(0.5, price * (1 + rng.gauss(0.0003, 0.02)))
+                bars.append({
+                    'price_date': day,
+                    'open_price': Decimal(f"{open_price:.4f}"), 'close_price': Decimal(f"{price:.4f}"),
+                    'high_price': Decimal(f"{max(open_price, price) * (1 + abs(rng.gauss(0, 0.01))):.4f}"),
+                    'low_price': Decimal(f"{min(open_price, price) * (1 - abs(rng.gauss(0, 0.01))):.4f}"),
+                    'volume': rng.randint(100_000, 10_000_000)
+                })
+            day += timedelta(days=1)
+        profile = {
+            'name': f"{ticker} Synthetic Holdings", 'description': f"Synthetic stand-in data for {ticker}.",
+            'exchange_code': 'LOCAL', 'list_date': bars[0]['price_date'] if bars else None, 'currency': 'USD',
+            'last_price': bars[-1]['close_price'] if bars else None,
+            'previous_close': bars[-2]['close_price'] if len(bars) > 1 else None
+        }
+        return profile, bars
+
+    def get_profile(self, ticker: str):
+        loaded = self.call(self._simulate, lambda: self._load(ticker))
+        return dict(loaded[0]) if loaded else None
+
+    def get_quotes(self, tickers: list):
+        def quotes():
+            found = {}
+            for ticker in tickers:
+                loaded = self._load(ticker)
+                if loaded and loaded[0].get('last_price'):
+                    found[ticker] = {'last_price': loaded[0]['last_price'], 'previous_close': loaded[0].get('previous_close')}
+            return found
+        return self.call(self._simulate, quotes)
+
+    def get_history(self, ticker: str, start: date = None):
+        loaded = self.call(self._simulate, lambda: self._load(ticker))
+        if not loaded: raise ValueError(f"No local data for {ticker}.")
+        return [dict(bar) for bar in loaded[1] if not start or bar['price_date'] >= start]
+
+    @staticmethod
+    def save_recording(data_dir: str, ticker: str, profile: dict, bars: list):
+        """Writes a ticker's profile and bars to `data_dir` in the format LocalProvider replays."""
+        def encode(value):
+            return value.isoformat() if isinstance(value, date) else str(value) if isinstance(value, Decimal) else value
+
+        os.makedirs(data_dir, exist_ok=True)
+        recording = {
+            'profile': {k: encode(v) for k, v in (profile or {}).items()},
+            'history': [{k: encode(v) for k, v in bar.items()} for bar in bars or []]
+        }
+        with open(os.path.join(data_dir, f"{ticker.upper()}.json"), 'w', encoding='utf-8') as f:
+            json.dump(recording, f)
+
+# --- Configured Providers ---
+# Ordered by preference, which breaks ties between equally healthy providers.
+market_data_providers = {}
+
+def configure_market_data_providers(config):
+    """Builds the providers listed in MARKET_DATA_PROVIDERS from the app config."""
+    factories = {
+        'yfinance': lambda: YFinanceProvider(),
+        'twelvedata': lambda: TwelveDataProvider(config.get('TWELVE_DATA_API_KEY')),
+        'tiingo': lambda: TiingoProvider(config.get('TIINGO_API_KEY')),
+        'local': lambda: LocalProvider(
+            data_dir=config.get('LOCAL_PROVIDER_DATA_DIR'),
+            synthesize=config.get('LOCAL_PROVIDER_SYNTHESIZE', True),
+            latency_ms=config.get('LOCAL_PROVIDER_LATENCY_MS', 0),
+            latency_jitter_ms=config.get('LOCAL_PROVIDER_LATENCY_JITTER_MS', 0),
+            error_rate=config.get('LOCAL_PROVIDER_ERROR_RATE', 0.0),
+            seed=config.get('LOCAL_PROVIDER_SEED')
+        ),
+    }
+    names = config.get('MARKET_DATA_PROVIDERS') or ['yfinance', 'twelvedata', 'tiingo']
+    unknown = [name for name in names if name not in factories]
+    if unknown:
+        raise ValueError(f"Unknown market data providers: {', '.join(unknown)}")
+
+    market_data_providers.clear()
+    for name in names:
+        market_data_providers[name] = factories[name]()
+        provider_registry.register(name)
+
+def get_provider(name: str):
+    return market_data_providers[name]
+
+def available_providers(capability: str, exclude=()):
+    """Returns the configured providers offering `capability`, healthiest first, skipping any whose circuit breaker is open."""
+    return provider_registry.ordered(
+        name for name, provider in market_data_providers.items()
+        if capability in provider.capabilities and provider.is_configured() and name not in exclude
+    )
@@ -0,0 +1,254 @@
+# app/services/refresh_policy.py
+
+import math
+import statistics
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+from flask import current_app
+from sqlalchemy import func, literal, text
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.models.models import db, Asset, AssetType, AssetRefreshStats, HistoricalPrice
+from .market_data_service import bulk_upsert, chunked
+
+def decayed_score(score: float, since: datetime, now: datetime, half_life: float):
+    """An exponentially decayed access score carried forward from `since` to `now`."""
+    if not score or not since: return 0.0
+    elapsed = max((now - since).total_seconds(), 0)
+    return score * 0.5 ** (elapsed / half_life)
+
+# --- Access Tracking ---
+class AccessTracker:
+    """
+    Counts API accesses per asset in memory and folds them into asset_refresh_stats at most once every
+    `flush_interval` seconds, so viewing an asset never costs a write of its own. Flushes increment the
+    stored counters in SQL on their own connection, so concurrent flushes from several workers never
+    lose counts and never commit the request's session.
+    """
+    def __init__(self, flush_interval: float = 30, half_life: float = 6 * 60 * 60):
+        self.flush_interval = flush_interval
+        self.half_life = half_life
+        self._pending = Counter()
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def configure(self, flush_interval: float = None, half_life: float = None):
+        with self._lock:
+            if flush_interval is not None: self.flush_interval = flush_interval
+            if half_life is not None: self.half_life = half_life
+            self._pending.clear()
+
+    def record(self, asset_ids):
+        """Counts one access to each asset, flushing the buffer if it is due. Never raises."""
+        with self._lock:
+            self._pending.update(asset_id for asset_id in asset_ids if asset_id)
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        if due: self.flush()
+
+    def flush(self):
+        """Writes buffered accesses on a separate connection and commits them. Returns the number of assets written."""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._last_flush = time.monotonic()
+        if not pending: return 0
+
+        now = datetime.utcnow()
+        rows = [{"asset_id": asset_id, "access_count": count, "access_score": float(count), "last_accessed_at": now, "updated_at": now}
+                for asset_id, count in pending.items()]
+        try:
+            with db.engine.begin() as conn:
+                for chunk in chunked(rows, 1000):
+                    conn.execute(_access_increment(conn.dialect.name, chunk, self.half_life))
+        except Exception as e:
+            print(f"Could not record asset accesses: {e}")
+            return 0
+        return len(rows)
+
+def _access_increment(dialect: str, rows: list, half_life: float):
+    """
+    [Internal Helper] An upsert that adds `rows`' counts to the stored ones in SQL (count = count + n), and
+    their scores to the stored score decayed from its last access to now (see decayed_score), atomically per row.
+    """
+    table = AssetRefreshStats.__table__
+    if dialect == 'mysql':
+        stmt = mysql_insert(table).values(rows)
+        new = stmt.inserted
+        elapsed = func.greatest(func.timestampdiff(text('SECOND'), table.c.last_accessed_at, new.last_accessed_at), 0)
+    elif dialect == 'sqlite':
+        stmt = sqlite_insert(table).values(rows)
+        new = stmt.excluded
+        elapsed = func.max((func.julianday(new.last_accessed_at) - func.julianday(table.c.last_accessed_at)) * 86400, 0)
+    else:
+        raise ValueError(f"Access tracking is not supported for the '{dialect}' database dialect.")
+
+    # Ordered, because MySQL applies each assignment before evaluating the next: the score reads the old last_accessed_at.
+    values = [
+        ('access_count', table.c.access_count + new.access_count),
+        ('access_score', func.coalesce(table.c.access_score * func.pow(0.5, elapsed / literal(float(half_life))), 0) + new.access_score),
+        ('last_accessed_at', new.last_accessed_at),
+        ('updated_at', new.updated_at)
+    ]
+    if dialect == 'mysql':
+        return stmt.on_duplicate_key_update(values)
+    return stmt.on_conflict_do_update(index_elements=['asset_id'], set_=dict(values))
+
+asset_access = AccessTracker()
+
+def record_asset_access(*asset_ids):
+    """Counts an API access to each asset for the adaptive refresh policy."""
+    asset_access.record(asset_ids)
+
+def configure_access_tracking(config):
+    """Applies ASSET_ACCESS_* settings. Called by the app factory."""
+    asset_access.configure(
+        flush_interval=config.get('ASSET_ACCESS_FLUSH_SECONDS'),
+        half_life=config.get('ASSET_ACCESS_HALF_LIFE_SECONDS')
+    )
+
+# --- Volatility ---
+def realized_volatility(asset_ids, lookback_days: int = 20):
+    """
+    Returns {asset_id: standard deviation of daily log returns} over each asset's last `lookback_days`
+    stored closes, read with a single query. Assets with fewer than 5 returns are omitted.
+    """
+    asset_ids = list(asset_ids)
+    if not asset_ids: return {}
+    # Calendar days covering the lookback in trading days, with room for holidays.
+    since = date.today() - timedelta(days=int(lookback_days * 1.6) + 7)
+    rows = db.session.query(HistoricalPrice.asset_id, HistoricalPrice.close_price) \
+        .filter(HistoricalPrice.asset_id.in_(asset_ids), HistoricalPrice.price_date >= since) \
+        .order_by(HistoricalPrice.asset_id, HistoricalPrice.price_date).all()
+
+    closes = defaultdict(list)
+    for asset_id, close in rows:
+        if close and close > 0: closes[asset_id].append(float(close))
+
+    volatility = {}
+    for asset_id, series in closes.items():
+        series = series[-(lookback_days + 1):]
+        returns = [math.log(b / a) for a, b in zip(series, series[1:])]
+        if len(returns) >= 5: volatility[asset_id] = statistics.stdev(returns)
+    return volatility
+
+# --- Interval Policy ---
+class RefreshPolicy:
+    """
+    Turns each asset's tier base interval into an adaptive one: volatile and frequently viewed assets
+    refresh faster, quiet and rarely viewed ones back off, all within [min_interval, max_interval].
+    If the resulting intervals would need more than `calls_per_minute` provider calls (one call quotes
+    up to `batch_size` tickers), every interval is stretched by the same factor to fit the budget.
+    """
+    def __init__(self, min_interval: float = 15, max_interval: float = 60 * 60, reference_volatility: float = 0.02,
+                 calls_per_minute: float = 60, batch_size: int = 100, half_life: float = 6 * 60 * 60, lookback_days: int = 20):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.reference_volatility = reference_volatility
+        self.calls_per_minute = calls_per_minute
+        self.batch_size = batch_size
+        self.half_life = half_life
+        self.lookback_days = lookback_days
+        self.stretch = 1.0
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            min_interval=config.get('SCHEDULER_ADAPTIVE_MIN_SECONDS', 15),
+            max_interval=config.get('SCHEDULER_ADAPTIVE_MAX_SECONDS', 60 * 60),
+            reference_volatility=config.get('SCHEDULER_REFERENCE_VOLATILITY', 0.02),
+            calls_per_minute=config.get('SCHEDULER_CALLS_PER_MINUTE', 60),
+            batch_size=config.get('MARKET_DATA_BATCH_SIZE', 100),
+            half_life=config.get('ASSET_ACCESS_HALF_LIFE_SECONDS', 6 * 60 * 60)
+        )
+
+    def interval_for(self, base: float, volatility: float = None, access_score: float = 0.0):
+        """
+        Scales a base interval down by up to 4x for volatility above the reference daily volatility
+        (and up by up to 4x below it), and down by 1 + log2(1 + access_score) for recent views.
+        """
+        vol_factor = min(max(volatility / self.reference_volatility, 0.25), 4.0) if volatility else 1.0
+        access_factor = 1 + math.log2(1 + max(access_score, 0))
+        return min(max(base / (vol_factor * access_factor), self.min_interval), self.max_interval)
+
+    def compute(self, tiers: dict, bases: dict, now: datetime = None):
+        """
+        Computes and stores the refresh interval of every asset in `tiers` ({asset_id: tier name}), using
+        `bases` ({tier name: base interval seconds}). Returns {asset_id: interval seconds}.
+        """
+        now = now or datetime.utcnow()
+        volatility = realized_volatility(tiers, self.lookback_days)
+        stats = {s.asset_id: s for s in AssetRefreshStats.query.filter(AssetRefreshStats.asset_id.in_(list(tiers)))}
+        access = {asset_id: decayed_score(s.access_score, s.last_accessed_at, now, self.half_life) for asset_id, s in stats.items()}
+
+        intervals = {
+            asset_id: self.interval_for(bases[tier], volatility.get(asset_id), access.get(asset_id, 0.0))
+            for asset_id, tier in tiers.items()
+        }
+        demand = sum(60.0 / interval for interval in intervals.values()) / self.batch_size
+        self.stretch = max(demand / self.calls_per_minute, 1.0) if self.calls_per_minute else 1.0
+        intervals = {asset_id: interval * self.stretch for asset_id, interval in intervals.items()}
+
+        rows = [{
+            "asset_id": asset_id,
+            "access_count": stats[asset_id].access_count if asset_id in stats else 0,
+            "access_score": stats[asset_id].access_score if asset_id in stats else 0.0,
+            "volatility": volatility.get(asset_id),
+            "tier": tier,
+            "refresh_interval_seconds": int(round(intervals[asset_id])),
+            "updated_at": now
+        } for asset_id, tier in tiers.items()]
+        bulk_upsert(AssetRefreshStats, rows, ['asset_id'], ['volatility', 'tier', 'refresh_interval_seconds', 'updated_at'])
+        # Assets that dropped out of every intraday tier go back to the nightly refresh only.
+        AssetRefreshStats.query.filter(AssetRefreshStats.asset_id.notin_(list(tiers)), AssetRefreshStats.tier.isnot(None)) \
+            .update({"tier": None, "refresh_interval_seconds": None}, synchronize_session=False)
+        db.session.commit()
+        return intervals
+
+STATS_SORT_ORDERS = {
+    'interval': (AssetRefreshStats.refresh_interval_seconds.is_(None), AssetRefreshStats.refresh_interval_seconds),
+    'access': (AssetRefreshStats.access_score.desc(), AssetRefreshStats.last_accessed_at.desc()),
+    'volatility': (AssetRefreshStats.volatility.is_(None), AssetRefreshStats.volatility.desc())
+}
+
+def viewed_asset_ids(now: datetime, half_life: float, min_score: float = 1.0):
+    """IDs of STOCK/ETF assets whose decayed access score is still at least `min_score`."""
+    # A score decays below 1/16th of its value after four half-lives, so older rows are skipped in SQL.
+    query = db.session.query(AssetRefreshStats.asset_id, AssetRefreshStats.access_score, AssetRefreshStats.last_accessed_at) \
+        .join(Asset).filter(Asset.asset_type.in_([AssetType.STOCK, AssetType.ETF]),
+                            AssetRefreshStats.last_accessed_at >= now - timedelta(seconds=4 * half_life))
+    return {asset_id for asset_id, score, since in query if decayed_score(score, since, now, half_life) >= min_score}
+
+def get_refresh_stats(limit: int = 100, sort: str = 'interval'):
+    """
+    Returns the adaptive refresh state of up to `limit` assets for tuning, fastest-refreshing first
+    (sort='interval'), most viewed first (sort='access') or most volatile first (sort='volatility'),
+    plus the provider calls per minute the stored intervals need against the scheduler's budget.
+    """
+    if sort not in STATS_SORT_ORDERS: raise ValueError(f"sort must be one of: {', '.join(STATS_SORT_ORDERS)}")
+    query = db.session.query(AssetRefreshStats, Asset.ticker_symbol, Asset.price_updated_at).join(Asset) \
+        .order_by(*STATS_SORT_ORDERS[sort])
+
+    now = datetime.utcnow()
+    intervals = [i for (i,) in db.session.query(AssetRefreshStats.refresh_interval_seconds).filter(AssetRefreshStats.refresh_interval_seconds > 0)]
+    batch_size = current_app.config.get('MARKET_DATA_BATCH_SIZE', 100)
+    assets = [{
+        "asset_id": stats.asset_id,
+        "ticker_symbol": ticker,
+        "tier": stats.tier,
+        "refresh_interval_seconds": stats.refresh_interval_seconds,
+        "volatility": round(stats.volatility, 6) if stats.volatility is not None else None,
+        "access_count": stats.access_count,
+        "access_score": round(decayed_score(stats.access_score, stats.last_accessed_at, now, asset_access.half_life), 3),
+        "last_accessed_at": stats.last_accessed_at.isoformat() if stats.last_accessed_at else None,
+        "price_updated_at": price_updated_at.isoformat() if price_updated_at else None
+    } for stats, ticker, price_updated_at in query.limit(limit)]
+    return {
+        "budget": {
+            "calls_per_minute": current_app.config.get('SCHEDULER_CALLS_PER_MINUTE'),
+            "demand_calls_per_minute": round(sum(60.0 / i for i in intervals) / batch_size, 3),
+            "batch_size": batch_size,
+            "adaptive_assets": len(intervals)
+        },
+        "assets": assets
+    }
@@ -0,0 +1,194 @@
+# app/services/refresh_scheduler.py
+
+import math
+import time
+from datetime import datetime, timezone
+from app.core.market_calendar import MarketCalendar
+from app.models.models import db, Asset, AssetType, Holding, Transaction, TransactionStatus, WatchlistItem
+from .fetch_pool import TokenBucket
+from .market_data_service import MarketDataService
+from .refresh_policy import RefreshPolicy, viewed_asset_ids
+
+# --- Refresh Tiers ---
+# held:      assets in any holding or with a pending order; they drive valuations and order triggers.
+# watchlist: assets only on watchlists.
+# nightly:   every STOCK/ETF asset, once after the close of each trading day, which also records the
+#            closing prices of the intraday tiers.
+# With a RefreshPolicy the intraday tiers (plus recently viewed assets) are refreshed per asset instead,
+# each on its own adaptive interval (see refresh_policy), within a provider calls-per-minute budget.
+
+def _parse_clock(value):
+    return datetime.strptime(value, '%H:%M').time() if isinstance(value, str) else value
+
+def held_asset_ids():
+    """IDs of assets held in any account or referenced by a pending order."""
+    held = db.session.query(Holding.asset_id).filter(Holding.quantity > 0)
+    pending = db.session.query(Transaction.asset_id).filter(
+        Transaction.status == TransactionStatus.PENDING, Transaction.asset_id.isnot(None)
+    )
+    return {asset_id for (asset_id,) in held.union(pending)}
+
+def watchlist_asset_ids():
+    """IDs of assets on any watchlist."""
+    return {asset_id for (asset_id,) in db.session.query(WatchlistItem.asset_id).distinct()}
+
+def all_asset_ids():
+    """IDs of every asset with a refreshable quote."""
+    query = db.session.query(Asset.id).filter(Asset.asset_type.in_([AssetType.STOCK, AssetType.ETF]))
+    return {asset_id for (asset_id,) in query}
+
+class RefreshScheduler:
+    """
+    Decides which refresh tiers are due and runs them. Intraday tiers only run while the exchange
+    is open; the nightly tier runs once per trading day after `nightly_time` (exchange-local).
+    Nothing runs on weekends, exchange holidays or outside those windows.
+    With a `policy`, the tier intervals become base intervals that the policy adapts per asset.
+    """
+    def __init__(self, calendar: MarketCalendar, held_interval: float = 60, watchlist_interval: float = 15 * 60,
+                 nightly_time='17:00', max_sleep: float = 5 * 60, policy: RefreshPolicy = None,
+                 recompute_interval: float = 15 * 60):
+        self.calendar = calendar
+        self.intervals = {'held': held_interval, 'watchlist': watchlist_interval}
+        self.nightly_time = _parse_clock(nightly_time)
+        self.max_sleep = max_sleep
+        self.last_run = {}          # tier -> datetime of its last intraday run
+        self.last_nightly = None    # exchange-local date of the last nightly run
+
+        self.policy = policy
+        self.recompute_interval = recompute_interval
+        self.budget = TokenBucket(policy.calls_per_minute) if policy and policy.calls_per_minute else None
+        self.asset_intervals = {}   # asset_id -> adaptive interval seconds
+        self.last_recompute = None
+        self.last_attempt = {}      # asset_id -> naive UTC time of the last refresh attempt
+
+    @classmethod
+    def from_config(cls, config):
+        calendar = MarketCalendar(
+            config.get('MARKET_TIMEZONE', 'America/New_York'),
+            _parse_clock(config.get('MARKET_OPEN_TIME', '09:30')),
+            _parse_clock(config.get('MARKET_CLOSE_TIME', '16:00')),
+            config.get('MARKET_EXTRA_HOLIDAYS', ())
+        )
+        return cls(
+            calendar,
+            held_interval=config.get('SCHEDULER_HELD_INTERVAL_SECONDS', 60),
+            watchlist_interval=config.get('SCHEDULER_WATCHLIST_INTERVAL_SECONDS', 15 * 60),
+            nightly_time=config.get('SCHEDULER_NIGHTLY_TIME', '17:00'),
+            policy=RefreshPolicy.from_config(config) if config.get('SCHEDULER_ADAPTIVE', True) else None,
+            recompute_interval=config.get('SCHEDULER_RECOMPUTE_SECONDS', 15 * 60)
+        )
+
+    def _nightly_due(self, now: datetime):
+        local = self.calendar.local(now)
+        return (self.calendar.is_trading_day(local.date()) and local.time() >= self.nightly_time
+                and self.last_nightly != local.date())
+
+    def due_tiers(self, now: datetime):
+        """Returns the tiers that should run at `now`, in priority order."""
+        due = []
+        if self.calendar.is_open(now) and self.policy:
+            due.append('adaptive')
+        elif self.calendar.is_open(now):
+            for tier, interval in self.intervals.items():
+                last = self.last_run.get(tier)
+                if last is None or (now - last).total_seconds() >= interval:
+                    due.append(tier)
+        if self._nightly_due(now):
+            due.append('nightly')
+        return due
+
+    def seconds_until_next(self, now: datetime):
+        """How long the daemon can sleep before a tier may become due, capped at `max_sleep`."""
+        if self.calendar.is_open(now) and self.policy:
+            waits = [self.policy.min_interval]
+        elif self.calendar.is_open(now):
+            waits = [interval - (now - self.last_run[tier]).total_seconds() if tier in self.last_run else 0
+                     for tier, interval in self.intervals.items()]
+        else:
+            waits = [(self.calendar.next_open(now) - self.calendar.local(now)).total_seconds()]
+        local = self.calendar.local(now)
+        if self.calendar.is_trading_day(local.date()) and self.last_nightly != local.date():
+            waits.append((self.calendar.at(local.date(), self.nightly_time) - local).total_seconds())
+        return min(max(min(waits), 1), self.max_sleep)
+
+    def run_once(self, now: datetime = None):
+        """Refreshes the prices of every due tier. Returns {tier: number of assets refreshed}."""
+        now = now or datetime.now(timezone.utc)
+        refreshed = {}
+        for tier in self.due_tiers(now):
+            if tier == 'adaptive':
+                refreshed[tier] = self._run_adaptive(now)
+                continue
+            if tier == 'held':
+                asset_ids = held_asset_ids()
+            elif tier == 'watchlist':
+                asset_ids = watchlist_asset_ids() - held_asset_ids()
+            else:
+                asset_ids = all_asset_ids()
+
+            # update_asset_prices treats an empty filter as "all assets", so empty tiers are skipped.
+            if asset_ids:
+                started = time.monotonic()
+                MarketDataService.update_asset_prices(asset_ids=sorted(asset_ids))
+                print(f"Scheduler: refreshed {len(asset_ids)} {tier} assets in {time.monotonic() - started:.1f}s.")
+            refreshed[tier] = len(asset_ids)
+
+            if tier == 'nightly': self.last_nightly = self.calendar.local(now).date()
+            else: self.last_run[tier] = now
+        return refreshed
+
+    def _adaptive_tiers(self, now: datetime):
+        """[Internal Helper] {asset_id: tier} of every asset refreshed intraday, highest tier winning."""
+        tiers = {asset_id: 'viewed' for asset_id in viewed_asset_ids(now, self.policy.half_life)}
+        tiers.update({asset_id: 'watchlist' for asset_id in watchlist_asset_ids()})
+        tiers.update({asset_id: 'held' for asset_id in held_asset_ids()})
+        return tiers
+
+    def _run_adaptive(self, now: datetime):
+        """
+        [Internal Helper] Refreshes the intraday assets that are past their adaptive interval, most overdue
+        first, taking only as many provider calls as the budget has left. Returns the number refreshed.
+        """
+        utc_now = now.astimezone(timezone.utc).replace(tzinfo=None)  # Stored timestamps are naive UTC.
+        if self.last_recompute is None or (now - self.last_recompute).total_seconds() >= self.recompute_interval:
+            bases = {'held': self.intervals['held'], 'watchlist': self.intervals['watchlist'], 'viewed': self.intervals['watchlist']}
+            self.asset_intervals = self.policy.compute(self._adaptive_tiers(utc_now), bases, utc_now)
+            self.last_recompute = now
+            print(f"Scheduler: recomputed intervals for {len(self.asset_intervals)} assets (budget stretch {self.policy.stretch:.2f}x).")
+        if not self.asset_intervals: return 0
+
+        updated_at = dict(db.session.query(Asset.id, Asset.price_updated_at).filter(Asset.id.in_(list(self.asset_intervals))))
+        overdue = []
+        for asset_id, interval in self.asset_intervals.items():
+            last = max((t for t in (updated_at.get(asset_id), self.last_attempt.get(asset_id)) if t), default=None)
+            ratio = math.inf if last is None else (utc_now - last).total_seconds() / interval
+            if ratio >= 1: overdue.append((ratio, asset_id))
+        if not overdue: return 0
+
+        overdue.sort(reverse=True)
+        batch_size = self.policy.batch_size
+        calls = math.ceil(len(overdue) / batch_size)
+        if self.budget: calls = self.budget.take(calls)
+        selected = [asset_id for _, asset_id in overdue[:calls * batch_size]]
+        if not selected: return 0
+
+        started = time.monotonic()
+        MarketDataService.update_asset_prices(asset_ids=selected)
+        self.last_attempt.update((asset_id, utc_now) for asset_id in selected)
+        print(f"Scheduler: refreshed {len(selected)} of {len(overdue)} overdue assets in {time.monotonic() - started:.1f}s.")
+        return len(selected)
+
+    def run_forever(self):
+        """Runs due tiers until interrupted, sleeping between them. A failed run is logged and retried next tick."""
+        print("Price refresh scheduler started.")
+        while True:
+            delay = None
+            try:
+                self.run_once()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Scheduler run failed: {e}")
+                delay = 30  # Back off instead of retrying a failing tier every second.
+            finally:
+                db.session.remove()
+            time.sleep(max(self.seconds_until_next(datetime.now(timezone.utc)), delay or 0))
@@ -0,0 +1,133 @@
+# app/services/summary_cache.py
+
+import secrets
+from app.core.cache import TTLCache
+from app.core.disk_cache import DiskCache
+from app.models.models import db, Account, Holding, Watchlist, WatchlistItem
+
+# --- Portfolio Summary Cache ---
+# Summaries only change when an order, transaction, fund movement or price refresh touches a portfolio,
+# so they are cached until one of those writes invalidates them (write-through), with the TTL as a backstop
+# for writes made by another process that does not share the backend.
+# The same per-portfolio version token is the ETag of the portfolio and watchlist GET routes, so watchlist
+# writes and price changes of watchlisted assets bump it too. Market indices, which appear in every summary
+# but belong to no portfolio, have a version token of their own on the same backend.
+
+class SummaryCache:
+    """
+    Caches computed portfolio summaries on a pluggable backend: any object with get(key) and
+    set(key, value, ttl), such as the in-process TTLCache or the shared DiskCache.
+    Each portfolio has a version token that invalidation replaces. Entries are stored under the version
+    read before they were computed, so a summary computed while a write committed is never served after it.
+    Tokens live for `version_ttl` seconds (defaults to `ttl`): a per-process backend must let them expire as
+    quickly as its summaries, since writes in other processes cannot replace them. `shared` marks a backend
+    every process reads and writes, whose tokens are therefore valid across processes.
+    """
+    def __init__(self, backend=None, ttl: float = 60, version_ttl: float = None, shared: bool = False):
+        self.backend = backend if backend is not None else TTLCache(ttl=ttl, max_size=1000)
+        self.ttl = ttl
+        self.version_ttl = version_ttl if version_ttl is not None else ttl
+        self.shared = shared
+
+    def configure(self, backend=None, ttl: float = None, version_ttl: float = None, shared: bool = False):
+        if backend is not None: self.backend = backend
+        if ttl is not None: self.ttl = ttl
+        self.version_ttl = version_ttl if version_ttl is not None else self.ttl
+        self.shared = shared
+
+    def _version_key(self, portfolio_id):
+        return f"portfolio-version:{portfolio_id}"
+
+    def _entry_key(self, portfolio_id: int, version: str, sections):
+        return f"portfolio-summary:{portfolio_id}:{version}:{','.join(sorted(sections))}"
+
+    def version(self, portfolio_id):
+        """
+        Returns the portfolio's current version token, creating one if it has none (or it expired).
+        Besides portfolio IDs, `portfolio_id` may name other shared inputs (see INDICES_VERSION).
+        """
+        token = self.backend.get(self._version_key(portfolio_id))
+        if token is None:
+            token = secrets.token_hex(8)
+            self.backend.set(self._version_key(portfolio_id), token, ttl=self.version_ttl)
+        return token
+
+    def get(self, portfolio_id: int, version: str, sections):
+        """Returns the cached summary of `sections` at `version`, or None."""
+        if not self.ttl: return None
+        return self.backend.get(self._entry_key(portfolio_id, version, sections))
+
+    def set(self, portfolio_id: int, version: str, sections, summary: dict):
+        if not self.ttl: return
+        self.backend.set(self._entry_key(portfolio_id, version, sections), summary, ttl=self.ttl)
+
+    def invalidate(self, *portfolio_ids):
+        """Gives each portfolio a new version token, orphaning every summary cached under the old one."""
+        for portfolio_id in set(portfolio_ids):
+            self.backend.set(self._version_key(portfolio_id), secrets.token_hex(8), ttl=self.version_ttl)
+
+    def clear(self):
+        self.backend.clear()
+
+summary_cache = SummaryCache()
+
+def configure_summary_cache(config):
+    """
+    Applies SUMMARY_CACHE_* settings. Called by the app factory. Without an explicit SUMMARY_CACHE_BACKEND
+    the shared disk backend is used wherever the on-disk provider cache is configured, and caching is off
+    otherwise: a per-process cache would serve other workers' stale balances, so it is opt-in only.
+    """
+    ttl = config.get('SUMMARY_CACHE_TTL', 60)
+    backend = config.get('SUMMARY_CACHE_BACKEND') or ('disk' if config.get('PROVIDER_RESPONSE_CACHE_DIR') else 'off')
+    if backend == 'off':
+        summary_cache.configure(TTLCache(ttl=60, max_size=config.get('SUMMARY_CACHE_MAX_SIZE', 1000)), 0, 60)
+    elif backend == 'memory':
+        summary_cache.configure(TTLCache(ttl=ttl, max_size=config.get('SUMMARY_CACHE_MAX_SIZE', 1000)), ttl)
+    elif backend == 'disk':
+        # Every process sees every invalidation, so versions can outlive the summaries they tag.
+        version_ttl = config.get('SUMMARY_CACHE_SHARED_VERSION_TTL', 24 * 60 * 60)
+        summary_cache.configure(DiskCache(config.get('SUMMARY_CACHE_DIR'), ttl=version_ttl), ttl, version_ttl, shared=True)
+    else:
+        raise ValueError(f"Unknown SUMMARY_CACHE_BACKEND: {backend}")
+
+# --- Invalidation Hooks ---
+INDICES_VERSION = 'indices'
+
+def portfolio_version(portfolio_id: int):
+    """
+    The portfolio's current version token, used as the ETag of its GET routes. None unless the backend is
+    shared: per-process tokens differ between workers and miss other workers' writes, so they cannot be ETags.
+    """
+    return summary_cache.version(portfolio_id) if summary_cache.shared else None
+
+def portfolio_ids_for_assets(asset_ids):
+    """
+    Reverse asset -> portfolio index: IDs of portfolios holding or watching any of the assets,
+    read with one query over the holdings' and watchlist items' asset_id indexes.
+    """
+    asset_ids = list(asset_ids)
+    if not asset_ids: return set()
+    held = db.session.query(Account.portfolio_id).join(Holding, Holding.account_id == Account.id) \
+        .filter(Holding.asset_id.in_(asset_ids))
+    watched = db.session.query(Watchlist.portfolio_id).join(WatchlistItem, WatchlistItem.watchlist_id == Watchlist.id) \
+        .filter(WatchlistItem.asset_id.in_(asset_ids))
+    return {portfolio_id for (portfolio_id,) in held.union(watched)}
+
+def invalidate_portfolios(*portfolio_ids):
+    """Drops the cached summaries of portfolios whose orders, transactions, funds or watchlists changed. Call after commit."""
+    summary_cache.invalidate(*(portfolio_id for portfolio_id in portfolio_ids if portfolio_id))
+
+def invalidate_assets(asset_ids):
+    """Drops the cached summaries of only those portfolios holding or watching assets whose prices or details changed."""
+    summary_cache.invalidate(*portfolio_ids_for_assets(asset_ids))
+
+def indices_version():
+    """
+    The market indices' version token, mixed into the summary ETag. It lives on the shared backend like the
+    portfolio tokens, so every worker agrees on it; None unless the backend is shared (see portfolio_version).
+    """
+    return summary_cache.version(INDICES_VERSION) if summary_cache.shared else None
+
+def invalidate_indices():
+    """Replaces the indices' version token. Called whenever a worker's index snapshot refresh changes the quotes."""
+    summary_cache.invalidate(INDICES_VERSION)
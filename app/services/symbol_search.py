@@ -0,0 +1,280 @@
+# app/services/symbol_search.py
+
+import bisect
+import csv
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from flask import current_app
+from app.core.cache import TTLCache
+from app.models.models import db, Asset, SymbolListing
+from .market_data_service import MarketDataService, bulk_upsert
+from .provider_registry import provider_registry, ProviderUnavailable
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+# Only a query shaped like a ticker (letters, digits and . - ^ =) may reach a provider. Queries not typed in
+# upper case may also be misspelled names ("appel"), so those only do when nothing local matches them at all.
+TICKER_RE = re.compile(r"^[A-Z0-9.\-^=]{1,20}$", re.IGNORECASE)
+
+# Header aliases accepted by load_symbol_file (compared case-insensitively).
+COLUMN_ALIASES = {
+    'ticker_symbol': ('ticker', 'symbol', 'ticker_symbol', 'act symbol'),
+    'name': ('name', 'security name', 'company name', 'company', 'description'),
+    'exchange_code': ('exchange', 'exchange_code', 'exchangecode', 'listing exchange'),
+    'asset_type': ('asset_type', 'assettype', 'type', 'quotetype'),
+}
+
+# Scores used to rank matches: exact ticker > ticker prefix > name token prefix > fuzzy name.
+EXACT_TICKER_SCORE = 100
+TICKER_PREFIX_SCORE = 80
+NAME_TOKEN_SCORE = 60
+FUZZY_NAME_SCORE = 40
+# Minimum share of the query's trigrams that must appear in a name for a fuzzy match.
+FUZZY_MIN_CONTAINMENT = 0.5
+
+def _tokens(text: str):
+    return TOKEN_RE.findall((text or '').lower())
+
+def _trigrams(text: str):
+    padded = f"  {' '.join(_tokens(text))} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class _TrieNode:
+    __slots__ = ('children', 'entry_id')
+
+    def __init__(self):
+        self.children = {}
+        self.entry_id = None
+
+class SymbolSearchIndex:
+    """
+    In-memory search over the symbol universe: a prefix trie on tickers, a sorted token list with
+    posting lists for name-word prefixes, and trigram postings for fuzzy name matches.
+    """
+    def __init__(self, entries=()):
+        self.entries = []
+        self._by_ticker = {}
+        self._trie = _TrieNode()
+        self._token_postings = {}
+        self._sorted_tokens = []
+        self._trigram_postings = {}
+        self._trigram_counts = []
+        self._lock = threading.Lock()
+        for entry in entries:
+            self._add(entry, keep_sorted=False)
+        self._sorted_tokens = sorted(self._token_postings)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, entry: dict):
+        """Adds a single symbol, e.g. one discovered through a provider lookup. Known tickers are left as indexed."""
+        with self._lock:
+            self._add(entry, keep_sorted=True)
+
+    def _add(self, entry: dict, keep_sorted: bool):
+        ticker = entry['ticker'].upper()
+        if ticker in self._by_ticker: return
+        entry_id = len(self.entries)
+        self.entries.append(dict(entry, ticker=ticker))
+        self._by_ticker[ticker] = entry_id
+
+        node = self._trie
+        for char in ticker:
+            node = node.children.setdefault(char, _TrieNode())
+        node.entry_id = entry_id
+
+        for token in set(_tokens(entry.get('name'))):
+            if token not in self._token_postings:
+                self._token_postings[token] = []
+                if keep_sorted: bisect.insort(self._sorted_tokens, token)
+            self._token_postings[token].append(entry_id)
+
+        grams = _trigrams(entry.get('name'))
+        self._trigram_counts.append(len(grams))
+        for gram in grams:
+            self._trigram_postings.setdefault(gram, []).append(entry_id)
+
+    def _ticker_prefix(self, prefix: str, limit: int):
+        """Returns up to `limit` entry ids whose ticker starts with `prefix`, shortest tickers first."""
+        node = self._trie
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None: return []
+        found, level = [], [node]
+        while level and len(found) < limit:
+            next_level = []
+            for current in level:
+                if current.entry_id is not None:
+                    found.append(current.entry_id)
+                next_level.extend(current.children[c] for c in sorted(current.children))
+            level = next_level
+        return found[:limit]
+
+    def _name_prefix(self, token: str):
+        """Returns the set of entry ids with a name word starting with `token`."""
+        ids = set()
+        start = bisect.bisect_left(self._sorted_tokens, token)
+        for candidate in self._sorted_tokens[start:]:
+            if not candidate.startswith(token): break
+            ids.update(self._token_postings[candidate])
+        return ids
+
+    def search(self, query: str, limit: int = 10):
+        """Returns up to `limit` ranked matches as dicts with ticker, name, exchange, asset_type and score."""
+        query = (query or '').strip()
+        if not query: return []
+        scores = {}
+
+        def score(entry_id, value):
+            if value > scores.get(entry_id, 0): scores[entry_id] = value
+
+        # 1. Exact and prefix ticker matches
+        ticker_query = query.upper()
+        for entry_id in self._ticker_prefix(ticker_query, limit * 5):
+            extra_chars = len(self.entries[entry_id]['ticker']) - len(ticker_query)
+            score(entry_id, EXACT_TICKER_SCORE if extra_chars == 0 else TICKER_PREFIX_SCORE - min(extra_chars, 10))
+
+        # 2. Every query word must prefix a word of the name
+        query_tokens = _tokens(query)
+        if query_tokens:
+            candidates = None
+            for token in query_tokens:
+                ids = self._name_prefix(token)
+                candidates = ids if candidates is None else candidates & ids
+                if not candidates: break
+            for entry_id in candidates or ():
+                name_tokens = _tokens(self.entries[entry_id].get('name'))
+                leading = 5 if name_tokens and name_tokens[0].startswith(query_tokens[0]) else 0
+                score(entry_id, NAME_TOKEN_SCORE + leading - min(len(name_tokens), 10) * 0.5)
+
+        # 3. Fuzzy trigram matches, only when the cheaper stages came up short
+        if len(scores) < limit:
+            query_grams = _trigrams(query)
+            shared = Counter()
+            for gram in query_grams:
+                shared.update(self._trigram_postings.get(gram, ()))
+            for entry_id, count in shared.items():
+                containment = count / len(query_grams)
+                if containment >= FUZZY_MIN_CONTAINMENT:
+                    # Containment tolerates long names; Jaccard similarity breaks ties in favour of closer lengths.
+                    jaccard = count / (len(query_grams) + self._trigram_counts[entry_id] - count)
+                    score(entry_id, FUZZY_NAME_SCORE * (0.8 * containment + 0.2 * jaccard))
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], len(self.entries[item[0]]['ticker']), self.entries[item[0]]['ticker']))
+        return [dict(self.entries[entry_id], score=round(value, 2)) for entry_id, value in ranked[:limit]]
+
+# --- Process-wide Index ---
+_index = None
+_index_built_at = 0.0
+_index_lock = threading.Lock()
+# Tickers that the provider fallback could not resolve recently.
+_unknown_tickers = TTLCache(ttl=60 * 60, max_size=10000)
+
+def build_search_index():
+    """Builds a search index from the symbol universe plus any tracked assets not listed in it."""
+    listings = db.session.query(
+        SymbolListing.ticker_symbol, SymbolListing.name, SymbolListing.exchange_code, SymbolListing.asset_type
+    ).all()
+    assets = db.session.query(Asset.ticker_symbol, Asset.name, Asset.exchange_code, Asset.asset_type).all()
+    entries = [
+        {"ticker": ticker, "name": name, "exchange": exchange, "asset_type": asset_type}
+        for ticker, name, exchange, asset_type in listings
+    ]
+    entries.extend(
+        {"ticker": ticker, "name": name, "exchange": exchange, "asset_type": asset_type.value if asset_type else None}
+        for ticker, name, exchange, asset_type in assets
+    )
+    return SymbolSearchIndex(entries)
+
+def get_search_index():
+    """Returns the process-wide index, rebuilding it once it is older than SYMBOL_INDEX_REFRESH_SECONDS."""
+    global _index, _index_built_at
+    max_age = current_app.config.get('SYMBOL_INDEX_REFRESH_SECONDS', 3600)
+    if _index is None or time.monotonic() - _index_built_at > max_age:
+        with _index_lock:
+            if _index is None or time.monotonic() - _index_built_at > max_age:
+                _index = build_search_index()
+                _index_built_at = time.monotonic()
+    return _index
+
+def invalidate_search_index():
+    """Forces the next search to rebuild the index from the database."""
+    global _index
+    _index = None
+    _unknown_tickers.clear()
+
+def search_symbols(query: str, limit: int = 10):
+    """
+    Searches the local symbol universe by ticker and company name. Only when the query is shaped like
+    a ticker (see TICKER_RE) and nothing in the universe matches it well is a provider asked to resolve
+    it, upper-cased; a hit is saved to the universe, and a miss is remembered for an hour. The lookup is
+    hedged and bounded by PROVIDER_REQUEST_DEADLINE_SECONDS, and a failed or timed-out one only drops it.
+    """
+    index = get_search_index()
+    results = index.search(query, limit)
+    typed = query.strip()
+    ticker = typed.upper()
+    if any(r['score'] >= NAME_TOKEN_SCORE for r in results) or not TICKER_RE.match(ticker):
+        return results
+    if typed != ticker and results:
+        return results
+    if _unknown_tickers.get(ticker):
+        return results
+
+    try:
+        with provider_registry.deadline_scope():
+            data = MarketDataService._get_cached_profile(ticker) or MarketDataService._hedged_profile(ticker)[1]
+    except (TimeoutError, ProviderUnavailable) as e:
+        print(f"Symbol lookup for {ticker} skipped: {e}")
+        return results
+    if not data or not data.get('name'):
+        _unknown_tickers.set(ticker, True)
+        return results
+
+    entry = {"ticker": ticker, "name": data['name'], "exchange": data.get('exchange_code'), "asset_type": None}
+    try:
+        bulk_upsert(SymbolListing, [{
+            "ticker_symbol": ticker, "name": entry['name'], "exchange_code": entry['exchange'],
+            "asset_type": None, "updated_at": datetime.utcnow()
+        }], ['ticker_symbol'], ['name', 'exchange_code', 'updated_at'])
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Could not save symbol listing for {ticker}: {e}")
+    index.add(entry)
+    return [dict(entry, score=EXACT_TICKER_SCORE)] + results[:limit - 1]
+
+def _read_symbol_rows(path: str):
+    """Reads listing rows from a CSV or JSON file and normalizes their column names."""
+    with open(path, newline='', encoding='utf-8') as f:
+        raw_rows = json.load(f) if os.path.splitext(path)[1].lower() == '.json' else list(csv.DictReader(f))
+
+    rows = {}
+    for raw in raw_rows:
+        lowered = {str(k).strip().lower(): v for k, v in raw.items()}
+        row = {}
+        for column, aliases in COLUMN_ALIASES.items():
+            row[column] = next((str(lowered[a]).strip() for a in aliases if lowered.get(a) not in (None, '')), None)
+        if row['ticker_symbol'] and row['name']:
+            row['ticker_symbol'] = row['ticker_symbol'].upper()[:20]
+            row['name'] = row['name'][:255]
+            row['updated_at'] = datetime.utcnow()
+            rows[row['ticker_symbol']] = row
+    return list(rows.values())
+
+def load_symbol_file(path: str, chunk_size: int = 1000):
+    """Bulk-loads (upserts) the symbol universe from a listings CSV or JSON file. Returns the row count."""
+    rows = _read_symbol_rows(path)
+    try:
+        bulk_upsert(SymbolListing, rows, ['ticker_symbol'], ['name', 'exchange_code', 'asset_type', 'updated_at'], chunk_size)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    invalidate_search_index()
+    return len(rows)
@@ -3,6 +3,7 @@
 from datetime import datetime
 from decimal import Decimal
 from app.models.models import db, Account, Transaction, TransactionType
+from .summary_cache import invalidate_portfolios
 
 def add_transaction(data: dict):
     """
@@ -34,6 +35,7 @@ def add_transaction(data: dict):
 
     db.session.add(new_transaction)
     db.session.commit()
+    invalidate_portfolios(account.portfolio_id)
     
     return new_transaction
 
@@ -74,4 +76,5 @@ def update_transaction(transaction_id: int, data: dict):
         transaction.transaction_date = datetime.strptime(data['transaction_date'], '%Y-%m-%d').date()
     
     db.session.commit()
+    invalidate_portfolios(transaction.account.portfolio_id)  # The date moves it in or out of the cash-flow window.
     return transaction
\ No newline at end of file
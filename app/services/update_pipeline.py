@@ -0,0 +1,204 @@
+# app/services/update_pipeline.py
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from flask import current_app
+from app.models.models import db, Asset, AssetType, UpdateCheckpoint
+from .market_data_service import MarketDataService, bulk_upsert, chunked
+
+# --- Full Update Pipeline ---
+# The prices, details and history phases of a full market data update run as one staged pipeline:
+# quote batches are fetched first, and as each batch is written its tickers move on to the details and
+# history fetches, which then overlap with the remaining quote batches. Fetches run on a pool of
+# `workers` threads; every database write stays on the calling thread's session, as with fetch_all.
+# Each (asset, phase) outcome is checkpointed, so a resumed run only redoes unfinished or failed work.
+
+PHASES = ('prices', 'details', 'history')
+PHASE_ASSET_TYPES = {
+    'prices': (AssetType.STOCK, AssetType.ETF),
+    'details': (AssetType.STOCK, AssetType.ETF),
+    'history': (AssetType.STOCK, AssetType.ETF, AssetType.INDEX)
+}
+
+class PhaseStats:
+    """Counts and active time span of one pipeline phase."""
+    def __init__(self):
+        self.done = self.failed = self.skipped = 0
+        self.started = self.finished = None
+
+    def start(self):
+        if self.started is None: self.started = time.monotonic()
+
+    def record(self, done: int = 0, failed: int = 0):
+        self.done += done
+        self.failed += failed
+        self.finished = time.monotonic()
+
+    @property
+    def elapsed(self):
+        return (self.finished - self.started) if self.started is not None and self.finished is not None else 0.0
+
+    def to_dict(self):
+        return {
+            "done": self.done,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "seconds": round(self.elapsed, 1),
+            "per_second": round(self.done / self.elapsed, 2) if self.elapsed else None
+        }
+
+class _Checkpoints:
+    """[Internal Helper] Buffers checkpoint rows and upserts them in batches on the current session."""
+    def __init__(self, run_id: int, flush_size: int = 100):
+        self.run_id = run_id
+        self.flush_size = flush_size
+        self._rows = []
+
+    def add(self, phase: str, asset_ids, status: str):
+        now = datetime.utcnow()
+        self._rows.extend({"run_id": self.run_id, "asset_id": asset_id, "phase": phase, "status": status, "updated_at": now}
+                          for asset_id in asset_ids)
+        if len(self._rows) >= self.flush_size: self.flush()
+
+    def flush(self):
+        if not self._rows: return
+        bulk_upsert(UpdateCheckpoint, self._rows, ['run_id', 'asset_id', 'phase'], ['status', 'updated_at'])
+        db.session.commit()
+        self._rows = []
+
+def completed_checkpoints(run_id: int):
+    """Returns {(asset_id, phase)} already done in a run."""
+    query = db.session.query(UpdateCheckpoint.asset_id, UpdateCheckpoint.phase) \
+        .filter(UpdateCheckpoint.run_id == run_id, UpdateCheckpoint.status == 'done')
+    return set(query)
+
+def run_update_pipeline(run_id: int, phases=PHASES, tickers: list = None, workers: int = None, progress=None):
+    """
+    Runs the given phases of a full market data update over every asset (or only `tickers`), skipping
+    work already checkpointed as done under `run_id`. `workers` bounds the concurrent fetches across all
+    phases (defaults to MARKET_DATA_MAX_WORKERS). `progress(done, failed, total)` counts (asset, phase) pairs.
+    Returns {phase: PhaseStats}.
+    """
+    phases = [phase for phase in PHASES if phase in phases]
+    batch_size = current_app.config.get('MARKET_DATA_BATCH_SIZE', 100)
+    workers = workers or current_app.config.get('MARKET_DATA_MAX_WORKERS', 8)
+    progress = progress or (lambda done, failed, total: None)
+
+    asset_types = {asset_type for phase in phases for asset_type in PHASE_ASSET_TYPES[phase]}
+    query = Asset.query.filter(Asset.asset_type.in_(asset_types))
+    if tickers:
+        tickers = [ticker.upper() for ticker in tickers]
+        query = query.filter(Asset.ticker_symbol.in_(tickers))
+    assets = query.all()
+    if tickers:
+        unknown = set(tickers) - {asset.ticker_symbol for asset in assets}
+        if unknown: print(f"Skipping unknown tickers: {', '.join(sorted(unknown))}")
+
+    completed = completed_checkpoints(run_id)
+    stats = {phase: PhaseStats() for phase in phases}
+    todo = {}
+    for phase in phases:
+        applicable = [asset for asset in assets if asset.asset_type in PHASE_ASSET_TYPES[phase]]
+        todo[phase] = {asset.ticker_symbol: asset for asset in applicable if (asset.id, phase) not in completed}
+        stats[phase].skipped = len(applicable) - len(todo[phase])
+    total = sum(len(pending) for pending in todo.values())
+    print(f"Full update run {run_id}: {total} (asset, phase) steps to do, "
+          f"{sum(s.skipped for s in stats.values())} already done.")
+
+    checkpoints = _Checkpoints(run_id, batch_size)
+    counts = {"done": 0, "failed": 0}
+    def finish(phase, done_ids=(), failed_ids=()):
+        checkpoints.add(phase, done_ids, 'done')
+        checkpoints.add(phase, failed_ids, 'failed')
+        stats[phase].record(len(done_ids), len(failed_ids))
+        counts["done"] += len(done_ids)
+        counts["failed"] += len(failed_ids)
+        progress(counts["done"], counts["failed"], total)
+    progress(0, 0, total)
+
+    latest_dates = MarketDataService._get_latest_price_dates([a.id for a in todo['history'].values()]) \
+        if todo.get('history') else {}
+    details_pending = []
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='full-update')
+    futures = {}
+
+    def submit(phase, key, fn, *args):
+        stats[phase].start()
+        futures[pool.submit(fn, *args)] = (phase, key)
+
+    def release(ticker_list):
+        """Queues the details and history fetches of tickers whose quotes are written (or not needed)."""
+        for ticker in ticker_list:
+            if ticker in todo.get('details', {}):
+                submit('details', ticker, MarketDataService._fetch_asset_details, ticker)
+            if ticker in todo.get('history', {}):
+                asset = todo['history'][ticker]
+                submit('history', ticker, MarketDataService._fetch_historical_data, ticker, latest_dates.get(asset.id))
+
+    def write_details():
+        if not details_pending: return
+        ok = MarketDataService._write_asset_details(list(details_pending))
+        ids = [changes["id"] for changes in details_pending]
+        finish('details', ids if ok else (), () if ok else ids)
+        details_pending.clear()
+
+    try:
+        # 1. Quote batches go first; tickers without a pending price step start their other phases right away.
+        # The pool already bounds concurrency, so each batch does its own per-ticker fallback serially.
+        for batch in chunked(list(todo.get('prices', {})), batch_size):
+            submit('prices', batch, MarketDataService._fetch_quotes, batch, batch_size, 1)
+        release([asset.ticker_symbol for asset in assets if asset.ticker_symbol not in todo.get('prices', {})])
+
+        # 2. Write each result as it lands, on this thread's session.
+        while futures:
+            finished, _ = wait(list(futures), return_when=FIRST_COMPLETED)
+            for future in finished:
+                phase, key = futures.pop(future)
+                error = future.exception()
+                if phase == 'prices':
+                    batch_assets = {ticker: todo['prices'][ticker] for ticker in key}
+                    if error:
+                        print(f"Quote batch of {len(key)} tickers failed: {error}")
+                        finish('prices', failed_ids=[a.id for a in batch_assets.values()])
+                    else:
+                        unquoted = MarketDataService._write_quotes(batch_assets, future.result(), batch_size)
+                        finish('prices', [a.id for a in batch_assets.values() if a.id not in unquoted], list(unquoted))
+                    release(key)
+                elif phase == 'details':
+                    asset = todo['details'][key]
+                    try:
+                        if error: raise error
+                        changes = MarketDataService._merge_asset_details(asset, *future.result())
+                    except Exception as e:
+                        print(f"Could not update details for {key}: {e}")
+                        finish('details', failed_ids=[asset.id]); continue
+                    if changes:
+                        details_pending.append({"id": asset.id, **changes})
+                        if len(details_pending) >= batch_size: write_details()
+                    else:
+                        finish('details', [asset.id])
+                else:
+                    asset = todo['history'][key]
+                    if error:
+                        print(f"Could not update historical data for {key}: {error}")
+                        finish('history', failed_ids=[asset.id]); continue
+                    bars = future.result()
+                    stored = MarketDataService._store_historical_data(asset, bars) if bars else 0
+                    if bars and not stored: finish('history', failed_ids=[asset.id])
+                    else: finish('history', [asset.id])
+        write_details()
+        checkpoints.flush()
+    finally:
+        # Pending fetches are dropped on failure or Ctrl+C; their steps stay unfinished for --resume.
+        pool.shutdown(wait=True, cancel_futures=True)
+    return stats
+
+def format_stats(stats: dict):
+    """Renders per-phase pipeline stats as a small text table."""
+    lines = [f"{'phase':<10}{'done':>8}{'failed':>8}{'skipped':>9}{'seconds':>10}{'per sec':>9}"]
+    for phase, phase_stats in stats.items():
+        s = phase_stats.to_dict()
+        rate = f"{s['per_second']:.2f}" if s['per_second'] is not None else '-'
+        lines.append(f"{phase:<10}{s['done']:>8}{s['failed']:>8}{s['skipped']:>9}{s['seconds']:>10.1f}{rate:>9}")
+    return "\n".join(lines)
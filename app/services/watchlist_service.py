@@ -2,6 +2,7 @@
 
 from app.models.models import db, Watchlist, WatchlistItem, Asset, Portfolio
 from .market_data_service import MarketDataService
+from .summary_cache import invalidate_portfolios
 
 def get_all_watchlists(portfolio_id: int):
     """Retrieves all watchlists for a given portfolio, including their items."""
@@ -19,6 +20,12 @@ def get_all_watchlists(portfolio_id: int):
         result.append({ "id": wl.id, "name": wl.name, "items": items })
     return result
 
+def watched_asset_ids(portfolio_id: int):
+    """IDs of the assets on any of a portfolio's watchlists, read without loading the watchlists."""
+    query = db.session.query(WatchlistItem.asset_id).join(Watchlist, WatchlistItem.watchlist_id == Watchlist.id) \
+        .filter(Watchlist.portfolio_id == portfolio_id).distinct()
+    return [asset_id for (asset_id,) in query]
+
 def create_watchlist(portfolio_id: int, name: str):
     """Creates a new, empty watchlist."""
     portfolio = db.session.get(Portfolio, portfolio_id)
@@ -31,6 +38,7 @@ def create_watchlist(portfolio_id: int, name: str):
     new_watchlist = Watchlist(name=name, portfolio_id=portfolio_id)
     db.session.add(new_watchlist)
     db.session.commit()
+    invalidate_portfolios(portfolio_id)
     return new_watchlist
 
 def delete_watchlist(watchlist_id: int):
@@ -39,8 +47,10 @@ def delete_watchlist(watchlist_id: int):
     if not watchlist:
         raise ValueError("Watchlist not found.")
     
+    portfolio_id = watchlist.portfolio_id
     db.session.delete(watchlist)
     db.session.commit()
+    invalidate_portfolios(portfolio_id)
     return True
 
 def rename_watchlist(watchlist_id: int, new_name: str):
@@ -54,6 +64,7 @@ def rename_watchlist(watchlist_id: int, new_name: str):
 
     watchlist.name = new_name
     db.session.commit()
+    invalidate_portfolios(watchlist.portfolio_id)
     return watchlist
 
 def add_item_to_watchlist(watchlist_id: int, ticker: str):
@@ -70,6 +81,7 @@ def add_item_to_watchlist(watchlist_id: int, ticker: str):
     new_item = WatchlistItem(watchlist_id=watchlist_id, asset_id=asset.id)
     db.session.add(new_item)
     db.session.commit()
+    invalidate_portfolios(watchlist.portfolio_id)
     
     return new_item
 
@@ -84,6 +96,8 @@ def remove_item_from_watchlist(watchlist_id: int, ticker: str):
     if not item:
         raise ValueError(f"'{ticker}' not found in this watchlist.")
     
+    portfolio_id = item.watchlist.portfolio_id
     db.session.delete(item)
     db.session.commit()
+    invalidate_portfolios(portfolio_id)
     return True
@@ -0,0 +1,32 @@
+"""Unique historical price per asset and day
+
+Revision ID: 5c1e8a2d7f30
+Revises: 9f9f9f19ea0f
+Create Date: 2026-10-17 09:12:31.402118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1e8a2d7f30'
+down_revision = '9f9f9f19ea0f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keep only the newest row for any (asset_id, price_date) pair so the unique index can be built.
+    # The derived table is required by MySQL, which cannot select from the table it deletes from.
+    op.execute(
+        "DELETE FROM historical_prices WHERE id NOT IN ("
+        "SELECT keep_id FROM (SELECT MAX(id) AS keep_id FROM historical_prices GROUP BY asset_id, price_date) AS keepers)"
+    )
+    with op.batch_alter_table('historical_prices', schema=None) as batch_op:
+        batch_op.create_index('ix_historical_prices_asset_id_price_date', ['asset_id', 'price_date'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('historical_prices', schema=None) as batch_op:
+        batch_op.drop_index('ix_historical_prices_asset_id_price_date')
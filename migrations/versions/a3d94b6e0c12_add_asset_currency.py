@@ -0,0 +1,26 @@
+"""Add asset currency
+
+Revision ID: a3d94b6e0c12
+Revises: 5c1e8a2d7f30
+Create Date: 2026-10-17 10:03:44.918265
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3d94b6e0c12'
+down_revision = '5c1e8a2d7f30'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('assets', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('currency', sa.String(length=10), nullable=True, server_default='USD'))
+
+
+def downgrade():
+    with op.batch_alter_table('assets', schema=None) as batch_op:
+        batch_op.drop_column('currency')
@@ -0,0 +1,33 @@
+"""Add update checkpoints
+
+Revision ID: a8d3e61f5c20
+Revises: f2a7c5e81b34
+Create Date: 2026-10-17 16:04:51.218036
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8d3e61f5c20'
+down_revision = 'f2a7c5e81b34'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('update_checkpoints',
+    sa.Column('run_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('asset_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('phase', sa.String(length=20), nullable=False),
+    sa.Column('status', sa.String(length=10), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['asset_id'], ['assets.id'], ),
+    sa.ForeignKeyConstraint(['run_id'], ['jobs.id'], ),
+    sa.PrimaryKeyConstraint('run_id', 'asset_id', 'phase')
+    )
+
+
+def downgrade():
+    op.drop_table('update_checkpoints')
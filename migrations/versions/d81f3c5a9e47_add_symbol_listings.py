@@ -0,0 +1,33 @@
+"""Add symbol listings
+
+Revision ID: d81f3c5a9e47
+Revises: a3d94b6e0c12
+Create Date: 2026-10-17 11:20:05.371942
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd81f3c5a9e47'
+down_revision = 'a3d94b6e0c12'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('symbol_listings',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('ticker_symbol', sa.String(length=20), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('exchange_code', sa.String(length=50), nullable=True),
+    sa.Column('asset_type', sa.String(length=50), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('ticker_symbol')
+    )
+
+
+def downgrade():
+    op.drop_table('symbol_listings')
@@ -0,0 +1,35 @@
+"""Add asset refresh stats
+
+Revision ID: f2a7c5e81b34
+Revises: e6b2d40c9a17
+Create Date: 2026-10-17 15:26:12.774390
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a7c5e81b34'
+down_revision = 'e6b2d40c9a17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('asset_refresh_stats',
+    sa.Column('asset_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('access_count', sa.Integer(), nullable=False),
+    sa.Column('access_score', sa.Float(), nullable=False),
+    sa.Column('last_accessed_at', sa.DateTime(), nullable=True),
+    sa.Column('volatility', sa.Float(), nullable=True),
+    sa.Column('tier', sa.String(length=20), nullable=True),
+    sa.Column('refresh_interval_seconds', sa.Integer(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['asset_id'], ['assets.id'], ),
+    sa.PrimaryKeyConstraint('asset_id')
+    )
+
+
+def downgrade():
+    op.drop_table('asset_refresh_stats')
@@ -1,6 +1,8 @@
 import pytest
 from app import create_app
 from app.models.models import db as _db
+from app.services import market_data_service, refresh_policy, summary_cache, symbol_search
+from app.services.provider_registry import provider_registry
 
 @pytest.fixture(scope='session')
 def app():
@@ -22,4 +24,16 @@ def client(app, db):
 
 @pytest.fixture
 def runner(app):
-    return app.test_cli_runner()
\ No newline at end of file
+    return app.test_cli_runner()
+
+@pytest.fixture(autouse=True)
+def clear_market_data_caches():
+    """Keeps module-level provider caches and search indexes from leaking between tests."""
+    yield
+    market_data_service.quote_cache.clear()
+    market_data_service.metadata_cache.clear()
+    market_data_service.unresolvable_tickers.clear()
+    symbol_search.invalidate_search_index()
+    provider_registry.configure()
+    refresh_policy.asset_access.configure()
+    summary_cache.summary_cache.clear()
@@ -1,7 +1,7 @@
 # tests/test_api/test_account_routes.py
 
 from decimal import Decimal
-from app.models.models import User, Portfolio, Account
+from app.models.models import User, Portfolio, Account, Asset, AssetType, Holding
 
 def test_get_accounts_for_portfolio_api(client, db):
     """
@@ -28,6 +28,36 @@ def test_get_accounts_for_portfolio_api(client, db):
     assert len(json_data) == 1
     assert json_data[0]['name'] == 'Primary Account'
 
+def test_get_accounts_for_portfolio_values_holdings_in_one_query(client, db):
+    """
+    GIVEN an account holding several assets
+    WHEN the GET /api/v1/accounts/portfolio/<id> endpoint is called
+    THEN its balance should include the holdings' market value, read with the account in two queries in total
+    """
+    # ARRANGE
+    from sqlalchemy import event
+    user = User(username="test", email="test@test.com", password_hash="123")
+    portfolio = Portfolio(name="Test Portfolio", user=user)
+    account = Account(name="Primary Account", balance=Decimal("1000.00"), portfolio=portfolio)
+    assets = [Asset(ticker_symbol=f"T{i}", name=f"Test {i}", asset_type=AssetType.STOCK, last_price=Decimal("10")) for i in range(3)]
+    db.session.add_all([user, portfolio, account, *assets, *(Holding(account=account, asset=a, quantity=2, cost_basis=20) for a in assets)])
+    db.session.commit()
+    portfolio_id = portfolio.id
+    db.session.expire_all()
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+
+    # ACT
+    try:
+        response = client.get(f'/api/v1/accounts/portfolio/{portfolio_id}')
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    # ASSERT
+    assert response.get_json()[0]['balance'] == 1060.0
+    assert len(statements) == 2
+
 def test_manage_funds_deposit_api(client, db):
     """
     GIVEN an account with an initial balance
@@ -0,0 +1,54 @@
+# tests/test_api/test_admin_routes.py
+
+from decimal import Decimal
+from app.models.models import Asset, AssetType
+from app.services import refresh_policy
+from app.services.provider_registry import provider_registry
+
+def test_get_provider_status_api(client):
+    """
+    GIVEN a provider whose circuit breaker has been opened
+    WHEN the GET /api/v1/admin/providers endpoint is called, and the breaker is then reset
+    THEN the status should report the open breaker and leave it out of the fallback order until reset
+    """
+    # ARRANGE
+    for _ in range(provider_registry.failure_threshold):
+        provider_registry.breaker('yfinance').record_failure()
+
+    # ACT
+    response = client.get('/api/v1/admin/providers')
+    reset_response = client.post('/api/v1/admin/providers/yfinance/reset')
+    json_data = response.get_json()
+
+    # ASSERT
+    assert response.status_code == 200
+    assert json_data['providers']['yfinance']['state'] == 'open'
+    assert 'yfinance' not in json_data['order']
+    assert reset_response.status_code == 200
+    assert reset_response.get_json()['provider']['state'] == 'closed'
+
+def test_get_refresh_stats_api(client, db, mocker):
+    """
+    GIVEN an asset viewed through the asset details endpoint
+    WHEN buffered accesses are flushed and GET /api/v1/admin/refresh-stats is called
+    THEN the asset should be listed with its access count, and an unknown sort should be rejected
+    """
+    # ARRANGE
+    asset = Asset(ticker_symbol="AAPL", name="Apple Inc.", asset_type=AssetType.STOCK, last_price=Decimal("190"))
+    db.session.add(asset)
+    db.session.commit()
+    mocker.patch('app.services.market_data_service.MarketDataService.refresh_asset_in_background', return_value=True)
+    client.get('/api/v1/market/asset/AAPL')
+    refresh_policy.asset_access.flush()
+
+    # ACT
+    response = client.get('/api/v1/admin/refresh-stats?sort=access')
+    bad_response = client.get('/api/v1/admin/refresh-stats?sort=nope')
+
+    # ASSERT
+    assert response.status_code == 200
+    json_data = response.get_json()
+    assert json_data['assets'][0]['ticker_symbol'] == 'AAPL'
+    assert json_data['assets'][0]['access_count'] == 1
+    assert json_data['budget']['calls_per_minute'] == 60
+    assert bad_response.status_code == 400
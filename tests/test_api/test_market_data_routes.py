@@ -133,3 +133,104 @@ def test_search_assets_success_api(client, db):
     assert isinstance(json_data, list)
     assert len(json_data) == 1
     assert json_data[0]['ticker'] == 'AAPL'
+
+def test_get_asset_details_range_and_fields_api(client, db, mocker):
+    """
+    GIVEN an asset with several days of stored history
+    WHEN the GET /api/v1/market/asset/<ticker> endpoint is called with start, end, fields and interval
+    THEN only bars within the range should be returned, with just the requested fields, resampled weekly
+    """
+    # ARRANGE
+    from datetime import date
+    from app.models.models import HistoricalPrice
+    asset = Asset(ticker_symbol='AAPL', name='Apple Inc.', asset_type=AssetType.STOCK, last_price=Decimal("175"))
+    db.session.add(asset)
+    db.session.commit()
+    # Mon 2025-01-06 .. Fri 2025-01-10, then Mon 2025-01-13
+    for day, close in [(6, 100), (7, 101), (8, 102), (9, 103), (10, 104), (13, 105)]:
+        db.session.add(HistoricalPrice(asset_id=asset.id, price_date=date(2025, 1, day), open_price=close - 1,
+                                       high_price=close + 1, low_price=close - 2, close_price=close, volume=10))
+    db.session.commit()
+    mocker.patch('app.services.market_data_service.MarketDataService.refresh_asset_in_background', return_value=True)
+
+    # ACT
+    response = client.get('/api/v1/market/asset/AAPL?start=2025-01-07&end=2025-01-13&fields=open,close,volume&interval=1wk')
+    json_data = response.get_json()
+
+    # ASSERT
+    assert response.status_code == 200
+    assert json_data['historical_data'] == [
+        {"date": "2025-01-07", "open": 100.0, "close": 104.0, "volume": 40},
+        {"date": "2025-01-13", "open": 104.0, "close": 105.0, "volume": 10},
+    ]
+    assert json_data['freshness']['latest_price_date'] == "2025-01-13"
+
+def test_get_asset_details_invalid_fields_api(client):
+    """
+    GIVEN an unknown history field
+    WHEN the GET /api/v1/market/asset/<ticker> endpoint is called
+    THEN it should return a 400 Bad Request error
+    """
+    # ACT
+    response = client.get('/api/v1/market/asset/AAPL?fields=close,pe_ratio')
+
+    # ASSERT
+    assert response.status_code == 400
+    assert "fields" in response.get_json()['error']
+
+def test_get_asset_details_max_points_api(client, db, mocker):
+    """
+    GIVEN an asset with a year of daily history
+    WHEN the GET /api/v1/market/asset/<ticker> endpoint is called with max_points
+    THEN the history should be downsampled to that many points, keeping the first and last bars
+    """
+    # ARRANGE
+    from datetime import date, timedelta
+    from app.models.models import HistoricalPrice
+    asset = Asset(ticker_symbol='AAPL', name='Apple Inc.', asset_type=AssetType.STOCK, last_price=Decimal("175"))
+    db.session.add(asset)
+    db.session.commit()
+    first_day = date(2024, 1, 1)
+    db.session.add_all([
+        HistoricalPrice(asset_id=asset.id, price_date=first_day + timedelta(days=i), close_price=100 + (i % 7))
+        for i in range(365)
+    ])
+    db.session.commit()
+    mocker.patch('app.services.market_data_service.MarketDataService.refresh_asset_in_background', return_value=True)
+
+    # ACT
+    response = client.get('/api/v1/market/asset/AAPL?max_points=50')
+    history = response.get_json()['historical_data']
+
+    # ASSERT
+    assert response.status_code == 200
+    assert len(history) == 50
+    assert history[0]['date'] == "2024-01-01"
+    assert history[-1]['date'] == (first_day + timedelta(days=364)).isoformat()
+
+def test_refresh_prices_queues_job_api(client, db, mocker):
+    """
+    GIVEN a stock asset
+    WHEN POST /api/v1/market/refresh-prices is called and the job's status is polled
+    THEN it should return 202 with a job whose status endpoint reports the refresh as finished
+    """
+    # ARRANGE
+    asset = Asset(ticker_symbol="AAPL", name="Apple Inc.", asset_type=AssetType.STOCK)
+    db.session.add(asset)
+    db.session.commit()
+    mocker.patch('app.services.market_data_service.MarketDataService._get_batch_quotes',
+                 return_value={"AAPL": {"last_price": Decimal("190.00"), "previous_close": Decimal("188.00")}})
+
+    # ACT
+    response = client.post('/api/v1/market/refresh-prices')
+    job_response = client.get(response.headers['Location'])
+
+    # ASSERT
+    assert response.status_code == 202
+    assert response.get_json()['deduplicated'] is False
+    assert job_response.status_code == 200
+    job = job_response.get_json()
+    assert job['status'] == 'SUCCEEDED'
+    assert job['progress']['done'] == 1 and job['progress']['total'] == 1
+    assert db.session.get(Asset, asset.id).last_price == Decimal("190.00")
+    assert client.get('/api/v1/jobs/999').status_code == 404
@@ -2,6 +2,8 @@
 
 from decimal import Decimal
 from app.models.models import User, Portfolio, Account, Asset, Holding, AssetType
+from app.services.market_data_service import index_snapshot
+from app.services.summary_cache import configure_summary_cache
 
 def test_get_portfolio_summary_api(client, db):
     """
@@ -38,4 +40,115 @@ def test_get_portfolio_summary_api(client, db):
     # Check that the single account is represented correctly
     account_data = json_data.get('account', {})
     assert account_data is not None
-    assert account_data.get('name') == "Primary Account"
\ No newline at end of file
+    assert account_data.get('name') == "Primary Account"
+
+def test_portfolio_summary_fields_and_section_routes(client, db, mocker):
+    """
+    GIVEN a portfolio with a gaining and a losing holding
+    WHEN the summary is requested with fields=movers, the movers and allocation routes are called,
+         and an unknown field is requested
+    THEN only the requested sections should be computed and returned, and the unknown field should be rejected
+    """
+    # ARRANGE
+    user = User(username="test", email="test@test.com", password_hash="123")
+    portfolio = Portfolio(name="Test Portfolio", user=user)
+    account = Account(name="Primary Account", balance=Decimal("5000.00"), portfolio=portfolio)
+    aapl = Asset(ticker_symbol="AAPL", name="Apple Inc", asset_type=AssetType.STOCK, last_price=Decimal("200"), previous_close_price=Decimal("190"))
+    spy = Asset(ticker_symbol="SPY", name="S&P 500 ETF", asset_type=AssetType.ETF, last_price=Decimal("500"), previous_close_price=Decimal("510"))
+    db.session.add_all([user, portfolio, account, aapl, spy,
+                        Holding(account=account, asset=aapl, quantity=10, cost_basis=1500),
+                        Holding(account=account, asset=spy, quantity=2, cost_basis=1000)])
+    db.session.commit()
+    mock_indices = mocker.patch('app.services.market_data_service.MarketDataService.get_cached_index_data')
+
+    # ACT
+    summary = client.get(f'/api/v1/portfolio/{portfolio.id}/summary?fields=movers').get_json()
+    movers = client.get(f'/api/v1/portfolio/{portfolio.id}/performance/movers').get_json()
+    allocation = client.get(f'/api/v1/portfolio/{portfolio.id}/allocation').get_json()
+    bad_response = client.get(f'/api/v1/portfolio/{portfolio.id}/summary?fields=movers,bogus')
+
+    # ASSERT
+    assert set(summary) == {"insights", "account"}
+    assert [m["ticker"] for m in movers["top_gainers"]] == ["AAPL", "SPY"]
+    assert movers["top_losers"][0] == {"ticker": "SPY", "name": "S&P 500 ETF", "change_amount": -20.0,
+                                       "percent_change": -20.0 / 1020.0 * 100}
+    assert allocation == {"STOCK": {"market_value": 2000.0, "percent": 2000.0 / 3000.0 * 100},
+                          "ETF": {"market_value": 1000.0, "percent": 1000.0 / 3000.0 * 100}}
+    mock_indices.assert_not_called()
+    assert bad_response.status_code == 400
+
+def test_portfolio_routes_answer_conditional_gets(app, client, db, mocker, tmp_path):
+    """
+    GIVEN a portfolio whose summary has been fetched once with the shared summary cache
+    WHEN it is requested again with the returned ETag, and again after a deposit and an index refresh
+    THEN the repeat should be a 304 computed without any valuation work, each write or refresh
+         should change the ETag, and the per-process cache should send no ETag at all
+    """
+    # ARRANGE
+    user = User(username="test", email="test@test.com", password_hash="123")
+    portfolio = Portfolio(name="Test Portfolio", user=user)
+    account = Account(name="Primary Account", balance=Decimal("5000.00"), portfolio=portfolio)
+    db.session.add_all([user, portfolio, account])
+    db.session.commit()
+    portfolio_id, account_id = portfolio.id, account.id
+    mocker.patch('app.services.market_data_service.MarketDataService.get_cached_index_data', return_value=[])
+    mocker.patch.object(index_snapshot, '_data', [])
+    mocker.patch.object(index_snapshot, '_fetch', return_value=[{"name": "S&P 500", "price": 5000.0}])
+    unshared = client.get(f'/api/v1/portfolio/{portfolio_id}/summary')
+    configure_summary_cache({**app.config, 'SUMMARY_CACHE_BACKEND': 'disk', 'SUMMARY_CACHE_DIR': str(tmp_path)})
+
+    try:
+        first = client.get(f'/api/v1/portfolio/{portfolio_id}/summary')
+        compute = mocker.patch('app.services.portfolio_service._compute_summary', return_value=({"account": {}}, None))
+
+        # ACT
+        repeat = client.get(f'/api/v1/portfolio/{portfolio_id}/summary', headers={'If-None-Match': first.headers['ETag']})
+        computed_for_repeat = compute.call_count
+        client.post(f'/api/v1/accounts/{account_id}/funds', json={"action": "DEPOSIT", "amount": 100})
+        after_deposit = client.get(f'/api/v1/portfolio/{portfolio_id}/summary?fields=performance', headers={'If-None-Match': first.headers['ETag']})
+        index_snapshot.refresh()
+        after_refresh = client.get(f'/api/v1/portfolio/{portfolio_id}/summary', headers={'If-None-Match': first.headers['ETag']})
+        missing = client.get('/api/v1/portfolio/999/accounts')
+    finally:
+        configure_summary_cache(app.config)
+
+    # ASSERT
+    assert unshared.status_code == 200 and 'ETag' not in unshared.headers
+    assert first.status_code == 200 and first.headers['ETag']
+    assert repeat.status_code == 304 and repeat.headers['ETag'] == first.headers['ETag']
+    assert computed_for_repeat == 0
+    assert after_deposit.headers['ETag'] != first.headers['ETag']
+    assert after_refresh.status_code != 304
+    assert missing.status_code == 404 and 'ETag' not in missing.headers
+
+def test_pending_order_changes_summary_etag(app, client, db, mocker, tmp_path):
+    """
+    GIVEN a portfolio summary fetched with the shared summary cache
+    WHEN a LIMIT buy is placed and the summary is requested with the earlier ETag
+    THEN a fresh summary should be returned, including the pending order in its cash flow
+    """
+    # ARRANGE
+    user = User(username="test", email="test@test.com", password_hash="123")
+    portfolio = Portfolio(name="Test Portfolio", user=user)
+    account = Account(name="Primary Account", balance=Decimal("1000.00"), portfolio=portfolio)
+    asset = Asset(ticker_symbol="AAPL", name="Apple Inc", asset_type=AssetType.STOCK, last_price=Decimal("100"))
+    db.session.add_all([user, portfolio, account, asset])
+    db.session.commit()
+    portfolio_id, account_id = portfolio.id, account.id
+    configure_summary_cache({**app.config, 'SUMMARY_CACHE_BACKEND': 'disk', 'SUMMARY_CACHE_DIR': str(tmp_path)})
+
+    try:
+        first = client.get(f'/api/v1/portfolio/{portfolio_id}/summary?fields=cash_flow')
+
+        # ACT
+        placed = client.post('/api/v1/orders/', json={"account_id": account_id, "ticker": "AAPL", "quantity": 2, "order_type": "LIMIT",
+                                                      "transaction_type": "BUY", "trigger_price": 90})
+        after_order = client.get(f'/api/v1/portfolio/{portfolio_id}/summary?fields=cash_flow',
+                                 headers={'If-None-Match': first.headers['ETag']})
+    finally:
+        configure_summary_cache(app.config)
+
+    # ASSERT
+    assert placed.status_code == 201
+    assert after_order.status_code == 200
+    assert after_order.get_json()['cash_flow']['spending'] == -180.0
@@ -1,6 +1,7 @@
 # tests/test_api/test_watchlist_routes.py
 
 from app.models.models import User, Portfolio, Watchlist, Asset, WatchlistItem, AssetType
+from app.services.summary_cache import configure_summary_cache
 
 def test_create_and_get_watchlist_api(client, db):
     """
@@ -70,3 +71,40 @@ def test_add_and_remove_item_from_watchlist_api(client, db, mocker):
     assert WatchlistItem.query.count() == 0
 
     assert remove_response.status_code == 200
+
+def test_get_watchlists_answers_conditional_gets(app, client, db, mocker, tmp_path):
+    """
+    GIVEN a portfolio with a watchlist that has been fetched once with the shared summary cache
+    WHEN it is requested again with the returned ETag, and again after an item is added
+    THEN the repeat should be a 304 that still records the access, and the write should change the ETag
+    """
+    # ARRANGE
+    user = User(username="test", email="test@test.com", password_hash="123")
+    portfolio = Portfolio(name="Test Portfolio", user=user)
+    watchlist = Watchlist(name="Tech", portfolio=portfolio)
+    asset = Asset(ticker_symbol="AAPL", name="Apple Inc", asset_type=AssetType.STOCK)
+    msft = Asset(ticker_symbol="MSFT", name="Microsoft", asset_type=AssetType.STOCK)
+    db.session.add_all([user, portfolio, watchlist, asset, msft, WatchlistItem(watchlist=watchlist, asset=asset)])
+    db.session.commit()
+    portfolio_id, watchlist_id, asset_id = portfolio.id, watchlist.id, asset.id
+    configure_summary_cache({**app.config, 'SUMMARY_CACHE_BACKEND': 'disk', 'SUMMARY_CACHE_DIR': str(tmp_path)})
+
+    try:
+        first = client.get(f'/api/v1/watchlists/{portfolio_id}')
+        record_access = mocker.patch('app.api.watchlist_routes.record_asset_access')
+        get_all = mocker.patch('app.services.watchlist_service.get_all_watchlists', return_value=[])
+        mocker.patch('app.services.market_data_service.MarketDataService.find_or_create_asset', return_value=msft)
+
+        # ACT
+        repeat = client.get(f'/api/v1/watchlists/{portfolio_id}', headers={'If-None-Match': first.headers['ETag']})
+        client.post(f'/api/v1/watchlists/{watchlist_id}/items', json={"ticker": "MSFT"})
+        after_write = client.get(f'/api/v1/watchlists/{portfolio_id}', headers={'If-None-Match': first.headers['ETag']})
+    finally:
+        configure_summary_cache(app.config)
+
+    # ASSERT
+    assert first.status_code == 200
+    assert repeat.status_code == 304
+    record_access.assert_any_call(asset_id)
+    assert get_all.call_count == 1
+    assert after_write.headers['ETag'] != first.headers['ETag']
@@ -0,0 +1,75 @@
+# tests/test_core/test_cache.py
+
+import threading
+import time
+from app.core.cache import TTLCache, SingleFlight
+
+def test_ttl_cache_expires_entries_and_counts_hits():
+    """
+    GIVEN a TTL cache with a short TTL
+    WHEN a value is read before and after it expires
+    THEN the first read should be a hit and the second a miss
+    """
+    # ARRANGE
+    cache = TTLCache(ttl=0.05)
+    cache.set("AAPL", 175)
+
+    # ACT
+    fresh = cache.get("AAPL")
+    time.sleep(0.06)
+    expired = cache.get("AAPL")
+
+    # ASSERT
+    assert fresh == 175
+    assert expired is None
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+def test_ttl_cache_evicts_least_recently_used():
+    """
+    GIVEN a full cache
+    WHEN an older entry is read and then a new entry is added
+    THEN the least recently used entry should be evicted
+    """
+    # ARRANGE
+    cache = TTLCache(ttl=60, max_size=2)
+    cache.set("AAPL", 1)
+    cache.set("MSFT", 2)
+    cache.get("AAPL")
+
+    # ACT
+    cache.set("TSLA", 3)
+
+    # ASSERT
+    assert cache.get("MSFT") is None
+    assert cache.get("AAPL") == 1
+    assert cache.stats()['evictions'] == 1
+
+def test_single_flight_runs_concurrent_calls_once():
+    """
+    GIVEN several threads asking for the same key at once
+    WHEN they go through a SingleFlight
+    THEN the function should run once and every caller should get its result
+    """
+    # ARRANGE
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def resolve():
+        calls.append(1)
+        release.wait(1)
+        return 42
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("NEWCO", resolve))) for _ in range(5)]
+
+    # ACT
+    for t in threads: t.start()
+    time.sleep(0.05)
+    release.set()
+    for t in threads: t.join()
+
+    # ASSERT
+    assert len(calls) == 1
+    assert results == [42] * 5
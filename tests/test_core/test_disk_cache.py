@@ -0,0 +1,54 @@
+# tests/test_core/test_disk_cache.py
+
+import os
+import time
+from datetime import date
+from decimal import Decimal
+from app.core.disk_cache import DiskCache
+
+def test_disk_cache_round_trips_values_across_instances(tmp_path):
+    """
+    GIVEN a value containing Decimals and dates written by one cache instance
+    WHEN another instance on the same directory reads it, with and without a stricter max age
+    THEN the value should come back unchanged, and the max age should turn it into a miss
+    """
+    # ARRANGE
+    bars = [{'price_date': date(2025, 1, 2), 'close_price': Decimal("101.25"), 'volume': 10}]
+    DiskCache(str(tmp_path)).set(['history', 'yfinance', 'AAPL', '1y'], bars)
+    time.sleep(0.02)
+    reader = DiskCache(str(tmp_path))
+
+    # ACT
+    value, age = reader.lookup(['history', 'yfinance', 'AAPL', '1y'])
+    too_old = reader.get(['history', 'yfinance', 'AAPL', '1y'], max_age=0.01)
+
+    # ASSERT
+    assert value == bars
+    assert age > 0
+    assert too_old is None
+    assert reader.get(['history', 'yfinance', 'MSFT', '1y']) is None
+    assert reader.stats()['hits'] == 1
+
+def test_disk_cache_expires_and_prunes_least_recently_used(tmp_path):
+    """
+    GIVEN a cache with a small size limit
+    WHEN an entry outlives its TTL and more data is written than the limit allows
+    THEN the expired entry should miss and the least recently used entries should be removed
+    """
+    # ARRANGE
+    cache = DiskCache(str(tmp_path), max_bytes=10_000)
+    cache.set('short-lived', 'x', ttl=0.01)
+    payload = os.urandom(1500).hex()  # incompressible
+
+    # ACT
+    time.sleep(0.02)
+    expired = cache.get('short-lived')
+    for i in range(10):
+        cache.set(f'entry-{i}', payload)
+        time.sleep(0.01)
+    cache.prune()
+
+    # ASSERT
+    assert expired is None
+    assert cache.get('entry-0') is None
+    assert cache.get('entry-9') == payload
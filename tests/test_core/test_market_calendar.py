@@ -0,0 +1,40 @@
+# tests/test_core/test_market_calendar.py
+
+from datetime import date, datetime, timezone
+from app.core.market_calendar import MarketCalendar, nyse_holidays
+
+def test_nyse_holidays_follow_observance_rules():
+    """
+    GIVEN the NYSE holiday rules
+    WHEN the holidays of 2021, 2022 and 2026 are computed
+    THEN floating, observed and unobserved holidays should land on the exchange's dates
+    """
+    # ACT
+    holidays_2021, holidays_2022, holidays_2026 = nyse_holidays(2021), nyse_holidays(2022), nyse_holidays(2026)
+
+    # ASSERT
+    assert date(2026, 4, 3) in holidays_2026       # Good Friday
+    assert date(2026, 7, 3) in holidays_2026       # July 4th on a Saturday, observed Friday
+    assert date(2026, 11, 26) in holidays_2026     # Thanksgiving
+    assert date(2022, 6, 20) in holidays_2022      # Juneteenth on a Sunday, observed Monday
+    assert date(2021, 12, 31) not in holidays_2021 # New Year's 2022 on a Saturday is not observed
+    assert date(2021, 6, 18) not in holidays_2021  # Juneteenth predates 2022
+    assert len(holidays_2026) == 10
+
+def test_market_calendar_session_hours():
+    """
+    GIVEN the default NYSE calendar
+    WHEN UTC moments around the session, a weekend and a holiday are checked
+    THEN only moments inside the regular session of a trading day should count as open
+    """
+    # ARRANGE
+    calendar = MarketCalendar(extra_holidays=[date(2026, 10, 21)])
+
+    # ASSERT
+    assert calendar.is_open(datetime(2026, 10, 16, 13, 30, tzinfo=timezone.utc))      # 09:30 EDT Friday
+    assert not calendar.is_open(datetime(2026, 10, 16, 20, 0))                         # 16:00 EDT, naive UTC
+    assert not calendar.is_open(datetime(2026, 10, 17, 15, 0, tzinfo=timezone.utc))    # Saturday
+    assert not calendar.is_open(datetime(2026, 10, 21, 15, 0, tzinfo=timezone.utc))    # extra holiday
+    assert calendar.is_open(datetime(2026, 12, 1, 14, 30, tzinfo=timezone.utc))        # 09:30 EST after DST ends
+    next_open = calendar.next_open(datetime(2026, 10, 16, 21, 0, tzinfo=timezone.utc))
+    assert next_open.date() == date(2026, 10, 19) and next_open.hour == 9 and next_open.minute == 30
@@ -0,0 +1,38 @@
+# tests/test_services/test_downsampling.py
+
+import numpy as np
+from datetime import date, timedelta
+from app.services.downsampling import lttb_indices, downsample_rows
+
+def test_lttb_keeps_endpoints_and_extremes():
+    """
+    GIVEN a long series with a single sharp spike
+    WHEN it is downsampled with LTTB
+    THEN the result should have the requested size, keep both endpoints, and keep the spike
+    """
+    # ARRANGE
+    x = np.arange(10000, dtype=float)
+    y = np.sin(x / 500.0)
+    y[4321] = 25.0
+
+    # ACT
+    indices = lttb_indices(x, y, 200)
+
+    # ASSERT
+    assert len(indices) == 200
+    assert indices[0] == 0 and indices[-1] == 9999
+    assert 4321 in indices
+    assert np.all(np.diff(indices) > 0)
+
+def test_downsample_rows_returns_short_series_unchanged():
+    """
+    GIVEN fewer rows than max_points
+    WHEN downsample_rows is called
+    THEN the rows should be returned as-is
+    """
+    # ARRANGE
+    rows = [(date(2025, 1, 1) + timedelta(days=i), float(i)) for i in range(5)]
+
+    # ACT & ASSERT
+    assert downsample_rows(rows, 10) == rows
+    assert len(downsample_rows(rows, 3)) == 3
@@ -0,0 +1,62 @@
+# tests/test_services/test_fetch_pool.py
+
+import threading
+import time
+from app.services.fetch_pool import TokenBucket, FetchPool, fetch_all
+
+def test_token_bucket_throttles_after_burst():
+    """
+    GIVEN a token bucket allowing 600 calls per minute with a burst of 2
+    WHEN 4 tokens are acquired back to back
+    THEN the first 2 should pass immediately and the rest should wait for refill (~0.1s each)
+    """
+    # ARRANGE
+    bucket = TokenBucket(rate_per_minute=600, capacity=2)
+
+    # ACT
+    start = time.monotonic()
+    for _ in range(4):
+        bucket.acquire()
+    elapsed = time.monotonic() - start
+
+    # ASSERT
+    assert elapsed >= 0.18
+
+def test_fetch_pool_returns_results_and_errors_to_caller_thread():
+    """
+    GIVEN a fetch function that fails for one item
+    WHEN items are run through the FetchPool
+    THEN every item should be yielded back once, with the error captured rather than raised
+    AND the fetches should run off the calling thread
+    """
+    # ARRANGE
+    caller = threading.get_ident()
+    seen_threads = set()
+
+    def fetch(item):
+        seen_threads.add(threading.get_ident())
+        if item == 'BAD':
+            raise ValueError("provider error")
+        return item.lower()
+
+    # ACT
+    with FetchPool(max_workers=4) as pool:
+        results = {item: (result, error) for item, result, error in pool.imap_unordered(fetch, ['AAPL', 'MSFT', 'BAD'])}
+
+    # ASSERT
+    assert results['AAPL'] == ('aapl', None)
+    assert results['MSFT'] == ('msft', None)
+    assert isinstance(results['BAD'][1], ValueError)
+    assert caller not in seen_threads
+
+def test_fetch_all_runs_single_item_inline():
+    """
+    GIVEN a single item
+    WHEN fetch_all is called
+    THEN the fetch should run on the calling thread without starting a pool
+    """
+    # ACT
+    results = list(fetch_all(lambda item: threading.get_ident(), ['AAPL']))
+
+    # ASSERT
+    assert results == [('AAPL', threading.get_ident(), None)]
@@ -0,0 +1,74 @@
+# tests/test_services/test_job_service.py
+
+from datetime import datetime, timedelta
+from app.models.models import Job, JobStatus
+from app.services import job_service
+
+def test_enqueue_job_deduplicates_active_jobs(app, db, mocker):
+    """
+    GIVEN a price refresh job that is still running
+    WHEN another refresh is requested
+    THEN the running job should be returned instead of a new one being queued
+    """
+    # ARRANGE
+    running = Job(job_type='refresh-prices', status=JobStatus.RUNNING, active_key='refresh-prices')
+    db.session.add(running)
+    db.session.commit()
+    mock_run = mocker.patch('app.services.job_service.run_job')
+
+    # ACT
+    job, created = job_service.enqueue_price_refresh()
+
+    # ASSERT
+    assert created is False
+    assert job.id == running.id
+    mock_run.assert_not_called()
+    assert Job.query.count() == 1
+
+def test_enqueue_job_replaces_abandoned_job_and_records_progress(app, db, mocker):
+    """
+    GIVEN a refresh job whose process stopped reporting progress long ago
+    WHEN a new refresh is requested and its handler reports progress and completes
+    THEN the old job should be marked failed and the new one should record its progress and succeed
+    """
+    # ARRANGE
+    stale = Job(job_type='refresh-prices', status=JobStatus.RUNNING, active_key='refresh-prices',
+                updated_at=datetime.utcnow() - timedelta(hours=1))
+    db.session.add(stale)
+    db.session.commit()
+
+    def handler(params, progress):
+        progress(0, 0, 3)
+        progress(2, 1, 3)
+    mocker.patch.dict(job_service.JOB_HANDLERS, {'refresh-prices': handler})
+
+    # ACT
+    job, created = job_service.enqueue_price_refresh()
+    status = job_service.get_job_status(job.id)
+
+    # ASSERT
+    assert created is True
+    assert db.session.get(Job, stale.id).status == JobStatus.FAILED
+    assert status['status'] == 'SUCCEEDED'
+    assert status['progress'] == {"total": 3, "done": 2, "failed": 1, "percent": 100.0}
+    assert Job.query.filter(Job.active_key.isnot(None)).count() == 0
+
+def test_failed_job_records_error_and_releases_key(app, db, mocker):
+    """
+    GIVEN a job handler that raises
+    WHEN the job runs
+    THEN the job should be marked failed with the error, and a new job of the same type can be queued
+    """
+    # ARRANGE
+    mocker.patch.dict(job_service.JOB_HANDLERS, {'refresh-prices': mocker.Mock(side_effect=RuntimeError("provider down"))})
+
+    # ACT
+    job, _ = job_service.enqueue_price_refresh()
+    status = job_service.get_job_status(job.id)
+    second, created = job_service.enqueue_price_refresh()
+
+    # ASSERT
+    assert status['status'] == 'FAILED'
+    assert status['error'] == "provider down"
+    assert created is True
+    assert second.id != job.id
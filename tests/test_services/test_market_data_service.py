@@ -2,7 +2,7 @@
 
 import pytest
 from decimal import Decimal
-from app.services.market_data_service import MarketDataService
+from app.services.market_data_service import MarketDataService, unresolvable_tickers
 from app.models.models import Asset, AssetType, HistoricalPrice
 from tests.data.mock_api_data import MOCK_AAPL_DATA, MOCK_RELIANCE_DATA
 from datetime import date
@@ -104,4 +104,372 @@ def test_get_asset_details_logic(db, mocker):
     assert details is not None
     assert details['ticker_symbol'] == "AAPL"
     assert "fundamentals" in details
-    assert details['fundamentals']['sector'] == "Technology"
\ No newline at end of file
+    assert details['fundamentals']['sector'] == "Technology"
+
+def test_update_asset_prices_uses_batch_quotes(db, mocker):
+    """
+    GIVEN several stock assets in the database
+    WHEN update_asset_prices is called
+    AND yfinance's multi-ticker download returns prices for only some of them
+    THEN the assets should be updated from the batch response
+    AND only the missing ticker should fall back to a per-ticker lookup
+    """
+    # ARRANGE
+    db.session.add_all([
+        Asset(ticker_symbol="AAPL", name="Apple Inc", asset_type=AssetType.STOCK),
+        Asset(ticker_symbol="MSFT", name="Microsoft", asset_type=AssetType.STOCK),
+        Asset(ticker_symbol="DELIST", name="Delisted Co", asset_type=AssetType.STOCK),
+    ])
+    db.session.commit()
+
+    columns = pd.MultiIndex.from_product([['Close'], ['AAPL', 'MSFT', 'DELIST']])
+    batch_df = pd.DataFrame([[170.0, 300.0, None], [175.0, 310.0, None]], columns=columns)
+    mock_download = mocker.patch('app.services.providers.yf.download', return_value=batch_df)
+    mock_single = mocker.patch(
+        'app.services.market_data_service.MarketDataService._get_profile',
+        return_value={'last_price': Decimal("1.00"), 'previous_close': Decimal("1.10")}
+    )
+
+    # ACT
+    MarketDataService.update_asset_prices(batch_size=2)
+
+    # ASSERT
+    assert mock_download.call_count == 2 # 3 tickers in chunks of 2
+    mock_single.assert_called_once_with("DELIST")
+    aapl = Asset.query.filter_by(ticker_symbol="AAPL").first()
+    assert aapl.last_price == Decimal("175.0")
+    assert aapl.previous_close_price == Decimal("170.0")
+    assert Asset.query.filter_by(ticker_symbol="DELIST").first().last_price == Decimal("1.00")
+
+def test_update_all_historical_data_incremental(db, mocker):
+    """
+    GIVEN an asset whose history is stored up to a known date
+    WHEN update_all_historical_data is called in incremental mode
+    THEN only the window from the latest stored date should be requested
+    AND the latest stored bar, possibly partial when it was synced intraday, should be overwritten
+    """
+    # ARRANGE
+    from datetime import timedelta
+    latest = date.today() - timedelta(days=7)
+    asset = Asset(ticker_symbol="AAPL", name="Apple Inc", asset_type=AssetType.STOCK)
+    db.session.add(asset)
+    db.session.commit()
+    db.session.add(HistoricalPrice(asset_id=asset.id, price_date=latest, close_price=Decimal("100")))
+    db.session.commit()
+
+    new_dates = [latest, latest + timedelta(days=1), latest + timedelta(days=2)]
+    hist_df = pd.DataFrame(
+        {'Open': [1, 2, 3], 'High': [1, 2, 3], 'Low': [1, 2, 3], 'Close': [100.5, 101, 102], 'Volume': [10, 20, 30]},
+        index=pd.DatetimeIndex(new_dates)
+    )
+    mock_ticker = mocker.patch('app.services.providers.yf.Ticker')
+    mock_ticker.return_value.history.return_value = hist_df
+
+    # ACT
+    MarketDataService.update_all_historical_data()
+
+    # ASSERT
+    mock_ticker.return_value.history.assert_called_once_with(start=latest.isoformat(), interval="1d")
+    db.session.expire_all()
+    stored = HistoricalPrice.query.filter_by(asset_id=asset.id).order_by(HistoricalPrice.price_date).all()
+    assert [h.price_date for h in stored] == new_dates
+    assert stored[0].close_price == Decimal("100.5")
+
+def test_upsert_historical_prices_overwrites_revised_bars(db):
+    """
+    GIVEN a stored historical bar
+    WHEN upsert_historical_prices is called with a revised bar for the same day and a new bar
+    THEN the existing row should be overwritten in place and the new one inserted
+    """
+    # ARRANGE
+    from app.services.market_data_service import upsert_historical_prices
+    asset = Asset(ticker_symbol="AAPL", name="Apple Inc", asset_type=AssetType.STOCK)
+    db.session.add(asset)
+    db.session.commit()
+    db.session.add(HistoricalPrice(asset_id=asset.id, price_date=date(2025, 1, 2), close_price=Decimal("100")))
+    db.session.commit()
+
+    # ACT
+    upsert_historical_prices([
+        {'asset_id': asset.id, 'price_date': date(2025, 1, 2), 'open_price': None, 'high_price': None,
+         'low_price': None, 'close_price': Decimal("101.5"), 'volume': 10},
+        {'asset_id': asset.id, 'price_date': date(2025, 1, 3), 'open_price': None, 'high_price': None,
+         'low_price': None, 'close_price': Decimal("102"), 'volume': 20},
+    ], chunk_size=1)
+    db.session.commit()
+    db.session.expire_all()
+
+    # ASSERT
+    stored = HistoricalPrice.query.filter_by(asset_id=asset.id).order_by(HistoricalPrice.price_date).all()
+    assert len(stored) == 2
+    assert stored[0].close_price == Decimal("101.5")
+    assert stored[1].volume == 20
+
+def test_get_profile_serves_repeat_lookups_from_cache(db, mocker):
+    """
+    GIVEN a ticker that was just fetched from yfinance
+    WHEN it is requested again, and again after only the price entry expires
+    THEN the second lookup should not call yfinance and the third should refetch once
+    """
+    # ARRANGE
+    from app.services import market_data_service
+    mock_ticker = mocker.patch('app.services.providers.yf.Ticker')
+    mock_ticker.return_value.info = {'longName': 'Apple Inc.', 'currentPrice': 175.5, 'previousClose': 172.0}
+
+    # ACT
+    first = MarketDataService._get_profile("AAPL")
+    second = MarketDataService._get_profile("AAPL")
+    market_data_service.quote_cache.delete("AAPL")
+    MarketDataService._get_profile("AAPL")
+
+    # ASSERT
+    assert first == second
+    assert second['name'] == 'Apple Inc.'
+    assert second['last_price'] == Decimal("175.5")
+    assert mock_ticker.call_count == 2
+    assert MarketDataService.get_cache_stats()['metadata']['hits'] == 2
+
+def test_index_snapshot_keeps_last_good_data_on_failed_refresh():
+    """
+    GIVEN an index snapshot that refreshed successfully once
+    WHEN a later refresh returns no data
+    THEN readers should keep getting the previous snapshot
+    """
+    # ARRANGE
+    from app.services.market_data_service import IndexSnapshot
+    responses = [[{"name": "S&P 500", "ticker": "^GSPC", "price": 5000.0, "change_percent": 1.0}], []]
+    snapshot = IndexSnapshot(lambda: responses.pop(0))
+
+    # ACT
+    snapshot.refresh()
+    snapshot.refresh()
+
+    # ASSERT
+    assert snapshot.get(background=False)[0]['ticker'] == "^GSPC"
+    assert snapshot.updated_at is not None
+
+def test_get_asset_details_serves_stale_data_and_schedules_refresh(db, mocker):
+    """
+    GIVEN an asset whose stored quote is older than the freshness threshold
+    WHEN get_asset_details is called
+    THEN the stored data should be returned without any inline provider calls
+    AND a background refresh should be scheduled and reported in the freshness metadata
+    """
+    # ARRANGE
+    from datetime import datetime, timedelta
+    asset = Asset(ticker_symbol="AAPL", name="Apple Inc", asset_type=AssetType.STOCK, last_price=Decimal("175"),
+                  price_updated_at=datetime.utcnow() - timedelta(hours=2))
+    db.session.add(asset)
+    db.session.commit()
+    db.session.add(HistoricalPrice(asset_id=asset.id, price_date=date.today() - timedelta(days=1), close_price=Decimal("174")))
+    db.session.commit()
+
+    mock_inline_refresh = mocker.patch('app.services.market_data_service.MarketDataService.update_all_asset_details')
+    mock_background = mocker.patch('app.services.market_data_service.MarketDataService.refresh_asset_in_background', return_value=True)
+
+    # ACT
+    details = MarketDataService.get_asset_details("AAPL")
+
+    # ASSERT
+    assert details['last_price'] == 175.0
+    assert details['currency'] == 'USD'
+    assert details['freshness']['is_stale'] is True
+    assert details['freshness']['refresh_scheduled'] is True
+    assert details['freshness']['price_age_seconds'] >= 7200
+    mock_background.assert_called_once_with(asset.id)
+    mock_inline_refresh.assert_not_called()
+
+def test_get_asset_details_fresh_data_skips_refresh(db, mocker):
+    """
+    GIVEN an asset with a recent quote and history through yesterday
+    WHEN get_asset_details is called
+    THEN no refresh should be scheduled
+    """
+    # ARRANGE
+    from datetime import datetime, timedelta
+    asset = Asset(ticker_symbol="AAPL", name="Apple Inc", asset_type=AssetType.STOCK, last_price=Decimal("175"),
+                  price_updated_at=datetime.utcnow())
+    db.session.add(asset)
+    db.session.commit()
+    db.session.add(HistoricalPrice(asset_id=asset.id, price_date=date.today() - timedelta(days=1), close_price=Decimal("174")))
+    db.session.commit()
+    mock_background = mocker.patch('app.services.market_data_service.MarketDataService.refresh_asset_in_background')
+
+    # ACT
+    details = MarketDataService.get_asset_details("AAPL")
+
+    # ASSERT
+    assert details['freshness']['is_stale'] is False
+    assert len(details['historical_data']) == 1
+    mock_background.assert_not_called()
+
+def test_find_or_create_asset_remembers_unresolvable_tickers(db, mocker):
+    """
+    GIVEN a ticker that no provider can resolve
+    WHEN find_or_create_asset is called twice
+    THEN both calls should fail but the providers should only be asked once
+    """
+    # ARRANGE
+    mock_yf = mocker.patch('app.services.market_data_service.MarketDataService._fetch_profile', return_value=None)
+
+    # ACT & ASSERT
+    with pytest.raises(ValueError):
+        MarketDataService.find_or_create_asset("NOPE")
+    with pytest.raises(ValueError, match="recently checked"):
+        MarketDataService.find_or_create_asset("nope")
+    assert mock_yf.call_count == 1
+
+def test_find_or_create_asset_does_not_remember_provider_failures(db, mocker):
+    """
+    GIVEN a ticker whose only quote provider is failing, or no provider available at all
+    WHEN find_or_create_asset is called again
+    THEN each call should fail without marking the ticker unresolvable, so the providers are asked again
+    """
+    # ARRANGE
+    mocker.patch('app.services.market_data_service.available_providers', return_value=['yfinance'])
+    mock_profile = mocker.patch('app.services.providers.YFinanceProvider.get_profile', side_effect=ConnectionError("reset"))
+
+    # ACT & ASSERT
+    with pytest.raises(ValueError, match="could not be reached"):
+        MarketDataService.find_or_create_asset("FLAKY")
+    with pytest.raises(ValueError, match="could not be reached"):
+        MarketDataService.find_or_create_asset("FLAKY")
+    assert mock_profile.call_count == 2
+
+    mocker.patch('app.services.market_data_service.available_providers', return_value=[])
+    with pytest.raises(ValueError, match="could not be reached"):
+        MarketDataService.find_or_create_asset("FLAKY")
+    assert not unresolvable_tickers.get("FLAKY")
+
+def test_historical_downloads_are_reused_from_disk_cache(app, db, mocker, tmp_path):
+    """
+    GIVEN the on-disk provider response cache is enabled
+    WHEN the same history window is fetched twice, as by two update runs on the same day
+    THEN yfinance should only be called once
+    """
+    # ARRANGE
+    from app.services.market_data_service import configure_caches
+    configure_caches({**app.config, 'PROVIDER_RESPONSE_CACHE_DIR': str(tmp_path)})
+    hist_df = pd.DataFrame(
+        {'Open': [1], 'High': [1], 'Low': [1], 'Close': [100], 'Volume': [10]},
+        index=pd.DatetimeIndex([date(2025, 1, 2)])
+    )
+    mock_ticker = mocker.patch('app.services.providers.yf.Ticker')
+    mock_ticker.return_value.history.return_value = hist_df
+
+    try:
+        # ACT
+        first = MarketDataService._fetch_historical_data("AAPL")
+        second = MarketDataService._fetch_historical_data("AAPL")
+    finally:
+        configure_caches(app.config)
+
+    # ASSERT
+    assert first == second
+    assert first[0]['close_price'] == Decimal("100")
+    assert mock_ticker.call_count == 1
+
+def test_refreshes_only_write_changed_assets(app, db, mocker):
+    """
+    GIVEN one asset whose quote and details are unchanged and one whose price moved
+    WHEN prices and then details are refreshed
+    THEN only the moved asset should be written, in one UPDATE per refresh that leaves the other columns alone
+    """
+    # ARRANGE
+    from datetime import datetime
+    from sqlalchemy import event
+    now = datetime.utcnow()
+    still = Asset(ticker_symbol="STILL", name="Still Co", description="Long text", asset_type=AssetType.STOCK,
+                  last_price=Decimal("10.0000"), previous_close_price=Decimal("9.5000"), price_updated_at=now)
+    moved = Asset(ticker_symbol="MOVED", name="Moved Co", description="Long text", asset_type=AssetType.STOCK,
+                  last_price=Decimal("20.0000"), previous_close_price=Decimal("19.0000"), price_updated_at=now)
+    db.session.add_all([still, moved])
+    db.session.commit()
+    mocker.patch('app.services.market_data_service.available_providers', return_value=['yfinance'])
+    mocker.patch('app.services.market_data_service.MarketDataService._get_batch_quotes', return_value={
+        "STILL": {"last_price": Decimal("10.00001"), "previous_close": Decimal("9.5")},
+        "MOVED": {"last_price": Decimal("21.25"), "previous_close": Decimal("19")}
+    })
+    mocker.patch('app.services.market_data_service.MarketDataService._fetch_asset_details', side_effect=lambda ticker: (
+        {"name": f"{ticker.title()} Co", "description": "Long text" if ticker == "STILL" else "New text"}, {}
+    ))
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+
+    # ACT
+    try:
+        MarketDataService.update_asset_prices(asset_ids=[still.id, moved.id])
+        price_updates = [s for s in statements if s.startswith("UPDATE assets")]
+        statements.clear()
+        MarketDataService.update_all_asset_details(asset_ids=[still.id, moved.id])
+        detail_updates = [s for s in statements if s.startswith("UPDATE assets")]
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    # ASSERT
+    assert len(price_updates) == 1 and "description" not in price_updates[0]
+    assert len(detail_updates) == 1 and "last_price" not in detail_updates[0]
+    assert db.session.get(Asset, moved.id).last_price == Decimal("21.25")
+    assert db.session.get(Asset, moved.id).description == "New text"
+    assert db.session.get(Asset, still.id).price_updated_at == now
+
+def test_refresh_asset_restamps_unchanged_quote(app, db, mocker):
+    """
+    GIVEN a stale asset whose provider still quotes the stored price, as after hours
+    WHEN the stale-while-revalidate refresh runs
+    THEN price_updated_at should be re-stamped so the asset reports as fresh and no further refresh is scheduled
+    """
+    # ARRANGE
+    from datetime import datetime, timedelta
+    asset = Asset(ticker_symbol="AAPL", name="Apple Inc", asset_type=AssetType.STOCK, last_price=Decimal("175.0000"),
+                  previous_close_price=Decimal("174.0000"), price_updated_at=datetime.utcnow() - timedelta(hours=2))
+    db.session.add(asset)
+    db.session.commit()
+    asset_id = asset.id
+    mocker.patch('app.services.market_data_service.MarketDataService._fetch_asset_details', return_value=(
+        {"name": "Apple Inc", "last_price": Decimal("175"), "previous_close": Decimal("174")}, {}
+    ))
+    mocker.patch('app.services.market_data_service.MarketDataService._fetch_historical_data', return_value=[])
+
+    # ACT
+    MarketDataService.refresh_asset(asset_id)
+    db.session.expire_all()
+    freshness = MarketDataService.get_asset_freshness(db.session.get(Asset, asset_id), date.today())
+
+    # ASSERT
+    assert freshness['price_age_seconds'] < 60
+    assert freshness['is_stale'] is False
+
+def test_detail_refresh_refetches_quote_behind_warm_disk_cache(app, db, mocker, tmp_path):
+    """
+    GIVEN a profile in the on-disk response cache that is older than the quote max age
+    WHEN an asset's details are refreshed
+    THEN the provider should be asked for a fresh quote and the new price stored
+    """
+    # ARRANGE
+    import time
+    from datetime import datetime, timedelta
+    from app.services.market_data_service import configure_caches, response_cache
+    configure_caches({**app.config, 'PROVIDER_RESPONSE_CACHE_DIR': str(tmp_path), 'PROVIDER_RESPONSE_CACHE_QUOTE_MAX_AGE': 60})
+    asset = Asset(ticker_symbol="AAPL", name="Apple Inc.", asset_type=AssetType.STOCK, last_price=Decimal("100"),
+                  previous_close_price=Decimal("99"), price_updated_at=datetime.utcnow() - timedelta(hours=1))
+    db.session.add(asset)
+    db.session.commit()
+    asset_id = asset.id
+    stored_at = mocker.patch('app.core.disk_cache.time.time', return_value=time.time() - 60 * 60)
+    response_cache.set(['profile', 'yfinance', 'AAPL'], {'name': 'Apple Inc.', 'last_price': Decimal("100"), 'previous_close': Decimal("99")})
+    mocker.stop(stored_at)
+    mocker.patch('app.services.market_data_service.available_providers', return_value=['yfinance'])
+    mock_ticker = mocker.patch('app.services.providers.yf.Ticker')
+    mock_ticker.return_value.info = {'longName': 'Apple Inc.', 'currentPrice': 120.0, 'previousClose': 100.0}
+
+    try:
+        # ACT
+        MarketDataService.update_all_asset_details(asset_id)
+    finally:
+        configure_caches(app.config)
+
+    # ASSERT
+    assert mock_ticker.call_count == 1
+    assert db.session.get(Asset, asset_id).last_price == Decimal("120")
@@ -1,7 +1,8 @@
 # tests/test_services/test_portfolio_service.py
 
 from decimal import Decimal
-from app.services.portfolio_service import get_portfolio_summary, get_detailed_holdings
+from app.services.portfolio_service import get_portfolio_summary, get_detailed_holdings, get_total_holdings_value, holdings_totals
+from app.services.summary_cache import invalidate_portfolios
 from app.models.models import User, Portfolio, Account, Asset, Holding, Transaction, TransactionType, AssetType
 from datetime import date
 
@@ -75,4 +76,107 @@ def test_get_detailed_holdings_logic(db):
     assert holding['ticker_symbol'] == 'AAPL'
     assert holding['quantity'] == 10
     assert holding['market_value'] == 1750.0 # 10 * 175
-    assert holding['unrealized_pnl'] == 250.0 # 1750 - 1500
\ No newline at end of file
+    assert holding['unrealized_pnl'] == 250.0 # 1750 - 1500
+
+def test_get_portfolio_summary_serves_indices_from_snapshot(db, mocker):
+    """
+    GIVEN a portfolio and a populated market index snapshot
+    WHEN get_portfolio_summary is called
+    THEN the indices should come from the in-memory snapshot without a live provider call
+    """
+    # ARRANGE
+    user = User(username="test", email="test@test.com", password_hash="123")
+    portfolio = Portfolio(name="Test Portfolio", user=user)
+    account = Account(name="Primary Account", balance=Decimal("1000"), portfolio=portfolio)
+    db.session.add_all([user, portfolio, account])
+    db.session.commit()
+
+    indices = [{"name": "S&P 500", "ticker": "^GSPC", "price": 5000.0, "change_percent": 1.0}]
+    mocker.patch('app.services.market_data_service.index_snapshot._data', indices)
+    mock_live = mocker.patch('app.services.market_data_service.MarketDataService.get_index_data')
+
+    # ACT
+    summary, error = get_portfolio_summary(portfolio.id)
+
+    # ASSERT
+    assert error is None
+    assert summary['market_indices'] == indices
+    mock_live.assert_not_called()
+
+def test_get_portfolio_summary_query_count_is_independent_of_positions(db, mocker):
+    """
+    GIVEN a portfolio valued once with a single position and again with many more positions
+    WHEN get_portfolio_summary is called each time
+    THEN both calls should issue the same number of queries, with no per-holding lazy loads
+    """
+    from sqlalchemy import event
+
+    # ARRANGE
+    user = User(username="test", email="test@test.com", password_hash="123")
+    portfolio = Portfolio(name="Test Portfolio", user=user)
+    account = Account(name="Primary Account", balance=Decimal("1000"), portfolio=portfolio)
+    db.session.add_all([user, portfolio, account])
+    mocker.patch('app.services.market_data_service.index_snapshot._data', [])
+
+    def add_positions(start, count):
+        for i in range(start, start + count):
+            asset = Asset(ticker_symbol=f"T{i}", name=f"Ticker {i}", asset_type=AssetType.STOCK,
+                          last_price=Decimal("10") + i, previous_close_price=Decimal("10"))
+            db.session.add(Holding(account=account, asset=asset, quantity=2, cost_basis=20))
+        db.session.commit()
+        invalidate_portfolios(portfolio.id)  # As an executed order would.
+        db.session.expire_all()  # Start each call from a cold session, as a request would.
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        # ACT
+        add_positions(0, 1)
+        statements.clear()
+        small, _ = get_portfolio_summary(portfolio.id)
+        small_count = len(statements)
+
+        add_positions(1, 25)
+        statements.clear()
+        large, _ = get_portfolio_summary(portfolio.id)
+        large_count = len(statements)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    # ASSERT
+    assert len(small['detailed_holdings']) == 1 and len(large['detailed_holdings']) == 26
+    assert large_count == small_count
+    assert small_count <= 8  # one query per section plus the portfolio and its account
+
+def test_holdings_totals_are_aggregated_in_sql(db):
+    """
+    GIVEN holdings in a priced asset, an asset without a previous close and an asset without any price
+    WHEN holdings_totals and get_total_holdings_value are called
+    THEN value and cost basis should cover every holding, and the day change only fully priced ones
+    """
+    # ARRANGE
+    user = User(username="test", email="test@test.com", password_hash="123")
+    portfolio = Portfolio(name="Test Portfolio", user=user)
+    account = Account(name="Primary Account", balance=Decimal("1000"), portfolio=portfolio)
+    priced = Asset(ticker_symbol="AAPL", name="Apple", asset_type=AssetType.STOCK, last_price=Decimal("175"), previous_close_price=Decimal("170"))
+    no_close = Asset(ticker_symbol="MSFT", name="Microsoft", asset_type=AssetType.STOCK, last_price=Decimal("300"))
+    unpriced = Asset(ticker_symbol="NEW", name="New Listing", asset_type=AssetType.STOCK)
+    db.session.add_all([user, portfolio, account, priced, no_close, unpriced,
+                        Holding(account=account, asset=priced, quantity=10, cost_basis=1500),
+                        Holding(account=account, asset=no_close, quantity=2, cost_basis=550),
+                        Holding(account=account, asset=unpriced, quantity=4, cost_basis=40)])
+    db.session.commit()
+
+    # ACT
+    totals = holdings_totals(portfolio.id)[account.id]
+    value, error = get_total_holdings_value(portfolio.id)
+
+    # ASSERT
+    assert error is None
+    assert totals["market_value"] == Decimal("2350")    # 10 * 175 + 2 * 300
+    assert totals["cost_basis"] == Decimal("2090")
+    assert totals["todays_change"] == Decimal("50")     # (175 - 170) * 10
+    assert totals["yesterday_value"] == Decimal("1700")
+    assert value == {"total_holdings_value": 2350.0}
+    assert account.holdings_market_value == Decimal("2350")
@@ -0,0 +1,149 @@
+# tests/test_services/test_provider_registry.py
+
+import time
+import pytest
+from app.services.fetch_pool import configure_rate_limits
+from app.services.provider_registry import ProviderRegistry, ProviderUnavailable
+
+def _fail():
+    raise ConnectionError("provider timed out")
+
+def test_circuit_breaker_opens_and_recovers_through_half_open_probe():
+    """
+    GIVEN a registry whose breakers open after two failures
+    WHEN a provider fails twice, and later succeeds on a probe after the reset delay
+    THEN calls should be rejected while open and the breaker should close after the successful probe
+    """
+    # ARRANGE
+    registry = ProviderRegistry(failure_threshold=2, reset_timeout=0.05)
+    registry.register('yfinance')
+
+    # ACT & ASSERT
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            registry.call('yfinance', _fail)
+    assert registry.snapshot()['yfinance']['state'] == 'open'
+    with pytest.raises(ProviderUnavailable):
+        registry.call('yfinance', lambda: "never called")
+
+    time.sleep(0.06)
+    assert registry.call('yfinance', lambda: "quote") == "quote"
+    assert registry.snapshot()['yfinance']['state'] == 'closed'
+    assert registry.snapshot()['yfinance']['total_errors'] == 2
+
+def test_ordered_puts_healthiest_provider_first():
+    """
+    GIVEN two providers where the preferred one has started failing
+    WHEN the fallback order is requested
+    THEN the healthy provider should come first, and an open breaker should drop the provider entirely
+    """
+    # ARRANGE
+    registry = ProviderRegistry(failure_threshold=3, reset_timeout=60)
+    registry.register('yfinance')
+    registry.register('twelvedata')
+    registry.call('twelvedata', lambda: "ok")
+    registry.call('yfinance', lambda: "ok")
+
+    # ACT
+    with pytest.raises(ConnectionError):
+        registry.call('yfinance', _fail)
+    degraded_order = registry.ordered(['yfinance', 'twelvedata'])
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            registry.call('yfinance', _fail)
+    open_order = registry.ordered(['yfinance', 'twelvedata'])
+
+    # ASSERT
+    assert degraded_order == ['twelvedata', 'yfinance']
+    assert open_order == ['twelvedata']
+
+def test_hedged_request_races_next_provider_when_primary_is_slow():
+    """
+    GIVEN a primary provider that stalls and a fast secondary provider
+    WHEN a hedged request is made
+    THEN the secondary should be started after the hedge delay and its answer returned
+    """
+    # ARRANGE
+    registry = ProviderRegistry(hedge_min_delay=0.01, hedge_default_delay=0.02, request_deadline=2)
+    slow_primary = lambda: time.sleep(0.5) or {"last_price": 1}
+    fast_secondary = lambda: {"last_price": 2}
+
+    # ACT
+    started = time.monotonic()
+    provider, result = registry.hedged([('yfinance', slow_primary), ('twelvedata', fast_secondary)])
+    elapsed = time.monotonic() - started
+
+    # ASSERT
+    assert provider == 'twelvedata'
+    assert result == {"last_price": 2}
+    assert elapsed < 0.4
+
+def test_hedged_request_gives_up_at_deadline():
+    """
+    GIVEN providers that never answer within the deadline
+    WHEN a hedged request is made
+    THEN it should raise TimeoutError once the deadline passes
+    """
+    # ARRANGE
+    registry = ProviderRegistry(hedge_min_delay=0.01, hedge_default_delay=0.01)
+    stalled = lambda: time.sleep(0.5)
+
+    # ACT & ASSERT
+    with pytest.raises(TimeoutError):
+        registry.hedged([('yfinance', stalled), ('twelvedata', stalled)], deadline=0.1)
+
+def test_call_is_abandoned_after_call_timeout_and_request_deadline():
+    """
+    GIVEN a provider call that hangs
+    WHEN it is made with a short call timeout, and again inside a request deadline that has already passed
+    THEN the first should raise TimeoutError after the timeout and count as a failure,
+         and the second should not reach the provider at all
+    """
+    # ARRANGE
+    registry = ProviderRegistry(call_timeout=0.05)
+    calls = []
+    hung = lambda: calls.append(1) or time.sleep(0.5)
+
+    # ACT
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        registry.call('yfinance', hung)
+    elapsed = time.monotonic() - started
+    with registry.deadline_scope(deadline=0.01):
+        time.sleep(0.02)
+        with pytest.raises(TimeoutError, match="deadline passed"):
+            registry.call('tiingo', hung)
+
+    # ASSERT
+    assert elapsed < 0.3
+    assert calls == [1]
+    assert registry.stats('yfinance').total_errors == 1
+    assert registry.stats('tiingo').total_calls == 0
+
+def test_rate_limit_wait_is_bounded_by_request_deadline():
+    """
+    GIVEN a provider whose rate limit bucket is in deficit after a large multi-symbol call
+    WHEN another call is made inside a short request deadline
+    THEN it should fail with TimeoutError straight away instead of waiting for the refill, without reaching the provider
+    """
+    # ARRANGE
+    registry = ProviderRegistry()
+    calls = []
+    configure_rate_limits({'twelvedata': 60})
+
+    try:
+        registry.call('twelvedata', lambda: "batch", tokens=120)
+
+        # ACT
+        started = time.monotonic()
+        with registry.deadline_scope(deadline=0.5):
+            with pytest.raises(TimeoutError, match="Rate limit"):
+                registry.call('twelvedata', lambda: calls.append(1))
+        elapsed = time.monotonic() - started
+    finally:
+        configure_rate_limits({})
+
+    # ASSERT
+    assert elapsed < 0.1
+    assert calls == []
+    assert registry.stats('twelvedata').total_errors == 0
@@ -0,0 +1,76 @@
+# tests/test_services/test_providers.py
+
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+from app.models.models import Asset, AssetType
+from app.services.market_data_service import MarketDataService
+from app.services.providers import LocalProvider, configure_market_data_providers
+
+def test_local_provider_replays_recordings_and_injects_errors(tmp_path):
+    """
+    GIVEN a recording written for one ticker
+    WHEN a replay-only local provider is queried, and one configured to always fail
+    THEN the recorded profile and bars should be returned, unknown tickers should have no data,
+    AND the failing provider should raise on every call
+    """
+    # ARRANGE
+    bars = [{'price_date': date(2025, 1, 2), 'open_price': Decimal("1.5"), 'high_price': Decimal("2"),
+             'low_price': Decimal("1"), 'close_price': Decimal("1.75"), 'volume': 100}]
+    LocalProvider.save_recording(str(tmp_path), "acme", {'name': 'Acme Corp', 'last_price': Decimal("1.75")}, bars)
+    provider = LocalProvider(data_dir=str(tmp_path), synthesize=False)
+    failing = LocalProvider(error_rate=1.0)
+
+    # ACT
+    profile = provider.get_profile("ACME")
+    history = provider.get_history("ACME", start=date(2025, 1, 1))
+
+    # ASSERT
+    assert profile == {'name': 'Acme Corp', 'last_price': Decimal("1.75")}
+    assert history == bars
+    assert provider.get_profile("NOPE") is None
+    with pytest.raises(ConnectionError):
+        failing.get_quotes(["ACME"])
+
+def test_update_asset_prices_offline_with_local_provider(app, db):
+    """
+    GIVEN the service configured with only the synthesizing local provider
+    WHEN asset prices and history are refreshed
+    THEN every asset should get a deterministic synthetic quote and a year of bars without network access
+    """
+    # ARRANGE
+    configure_market_data_providers({**app.config, 'MARKET_DATA_PROVIDERS': ['local']})
+    db.session.add_all([Asset(ticker_symbol=f"BENCH{i}", name=f"Bench {i}", asset_type=AssetType.STOCK) for i in range(3)])
+    db.session.commit()
+
+    try:
+        # ACT
+        MarketDataService.update_asset_prices(batch_size=2)
+        MarketDataService.update_all_historical_data()
+        expected = LocalProvider().get_quotes(["BENCH0"])["BENCH0"]
+    finally:
+        configure_market_data_providers(app.config)
+
+    # ASSERT
+    bench = Asset.query.filter_by(ticker_symbol="BENCH0").first()
+    assert bench.last_price == expected['last_price']
+    assert all(asset.last_price for asset in Asset.query.all())
+    assert len(bench.historical_prices) > 200
+    assert bench.historical_prices[-1].price_date >= date.today() - timedelta(days=3)
+
+def test_benchmark_refresh_leaves_configured_database_untouched(app, db, runner):
+    """
+    GIVEN the benchmark-refresh command
+    WHEN it is run without --database
+    THEN it should time the refresh against a throwaway database and add no BENCH assets to the configured one
+    """
+    # ACT
+    try:
+        result = runner.invoke(args=['benchmark-refresh', '--assets', '3', '--phase', 'prices'])
+    finally:
+        configure_market_data_providers(app.config)
+
+    # ASSERT
+    assert result.exit_code == 0, result.output
+    assert "prices:" in result.output and "for 3 assets" in result.output
+    assert Asset.query.filter(Asset.ticker_symbol.like('BENCH%')).count() == 0
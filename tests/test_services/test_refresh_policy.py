@@ -0,0 +1,98 @@
+# tests/test_services/test_refresh_policy.py
+
+import math
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from app.models.models import Asset, AssetType, AssetRefreshStats, HistoricalPrice
+from app.services.refresh_policy import AccessTracker, RefreshPolicy, realized_volatility
+
+def _seed_history(db, asset, daily_move):
+    """Stores 30 daily closes alternating up and down by `daily_move`."""
+    price = Decimal("100")
+    for i in range(30):
+        price *= Decimal(1 + daily_move) if i % 2 else Decimal(1 - daily_move)
+        db.session.add(HistoricalPrice(asset=asset, price_date=date.today() - timedelta(days=30 - i), close_price=round(price, 4)))
+
+def test_access_tracker_accumulates_decayed_scores(app, db):
+    """
+    GIVEN an asset viewed twice, then again after one half-life
+    WHEN the buffered accesses are flushed each time
+    THEN the total count should grow by every view, while the older views count half in the score
+    """
+    # ARRANGE
+    asset = Asset(ticker_symbol="AAPL", name="Apple", asset_type=AssetType.STOCK)
+    db.session.add(asset)
+    db.session.commit()
+    tracker = AccessTracker(flush_interval=3600, half_life=3600)
+
+    # ACT
+    tracker.record([asset.id, asset.id])
+    tracker.flush()
+    stats = db.session.get(AssetRefreshStats, asset.id)
+    stats.last_accessed_at -= timedelta(hours=1)
+    db.session.commit()
+    tracker.record([asset.id])
+    tracker.flush()
+    db.session.refresh(stats)
+
+    # ASSERT
+    assert stats.access_count == 3
+    assert math.isclose(stats.access_score, 2 * 0.5 + 1, rel_tol=1e-3)
+
+def test_access_flush_increments_in_sql_without_committing_the_request(app, db):
+    """
+    GIVEN two workers' trackers holding accesses to the same asset, and a request with an uncommitted change
+    WHEN both trackers flush
+    THEN both workers' counts should be added up, and the request's change should still be pending
+    """
+    # ARRANGE
+    asset = Asset(ticker_symbol="AAPL", name="Apple", asset_type=AssetType.STOCK)
+    db.session.add(asset)
+    db.session.commit()
+    asset_id = asset.id
+    first, second = AccessTracker(flush_interval=3600), AccessTracker(flush_interval=3600)
+    first.record([asset_id, asset_id])
+    second.record([asset_id])
+    asset.name = "Renamed"
+
+    # ACT
+    first.flush()
+    second.flush()
+    db.session.rollback()
+
+    # ASSERT
+    assert db.session.get(Asset, asset_id).name == "Apple"
+    stats = db.session.get(AssetRefreshStats, asset_id)
+    assert stats.access_count == 3
+    assert math.isclose(stats.access_score, 3, rel_tol=1e-3)
+
+def test_refresh_policy_adapts_intervals_within_budget(app, db):
+    """
+    GIVEN a volatile, frequently viewed asset and a quiet, unviewed one in the same tier
+    WHEN intervals are computed with a generous budget and then with a tiny one
+    THEN the volatile asset should refresh faster, and the tiny budget should stretch both intervals proportionally
+    """
+    # ARRANGE
+    hot = Asset(ticker_symbol="HOT", name="Hot", asset_type=AssetType.STOCK)
+    quiet = Asset(ticker_symbol="QUIET", name="Quiet", asset_type=AssetType.STOCK)
+    db.session.add_all([hot, quiet])
+    _seed_history(db, hot, 0.05)
+    _seed_history(db, quiet, 0.002)
+    db.session.add(AssetRefreshStats(asset=hot, access_count=7, access_score=7.0, last_accessed_at=datetime.utcnow()))
+    db.session.commit()
+    tiers, bases = {hot.id: 'held', quiet.id: 'held'}, {'held': 300}
+
+    # ACT
+    volatility = realized_volatility([hot.id, quiet.id])
+    relaxed = RefreshPolicy(min_interval=15, max_interval=3600, calls_per_minute=60, batch_size=1).compute(tiers, bases)
+    tight_policy = RefreshPolicy(min_interval=15, max_interval=3600, calls_per_minute=0.01, batch_size=1)
+    tight = tight_policy.compute(tiers, bases)
+
+    # ASSERT
+    assert volatility[hot.id] > volatility[quiet.id]
+    assert relaxed[hot.id] < 300 < relaxed[quiet.id]
+    assert tight_policy.stretch > 1
+    assert math.isclose(tight[hot.id] / relaxed[hot.id], tight_policy.stretch, rel_tol=1e-6)
+    assert sum(60 / i for i in tight.values()) <= 0.01 + 1e-9
+    stored = db.session.get(AssetRefreshStats, quiet.id)
+    assert stored.tier == 'held' and stored.refresh_interval_seconds == round(tight[quiet.id])
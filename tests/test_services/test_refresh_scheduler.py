@@ -0,0 +1,105 @@
+# tests/test_services/test_refresh_scheduler.py
+
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from app.core.market_calendar import MarketCalendar
+from app.models.models import (User, Portfolio, Account, Asset, AssetType, Holding, Transaction, TransactionType,
+                               TransactionStatus, Watchlist, WatchlistItem)
+from app.services.fetch_pool import TokenBucket
+from app.services.refresh_policy import RefreshPolicy
+from app.services.refresh_scheduler import RefreshScheduler
+
+# 2026-10-16 is a Friday; 14:00 UTC is 10:00 in New York.
+MARKET_OPEN = datetime(2026, 10, 16, 14, 0, tzinfo=timezone.utc)
+
+def _seed_tiers(db):
+    user = User(username="test", email="test@test.com", password_hash="123")
+    portfolio = Portfolio(name="Main", user=user)
+    account = Account(name="Brokerage", balance=Decimal("1000"), portfolio=portfolio)
+    held, ordered, watched, other = (Asset(ticker_symbol=t, name=t, asset_type=AssetType.STOCK) for t in ("HELD", "ORDR", "WTCH", "OTHR"))
+    watchlist = Watchlist(name="Ideas", portfolio=portfolio)
+    db.session.add_all([
+        user, portfolio, account, held, ordered, watched, other, watchlist,
+        Holding(account=account, asset=held, quantity=Decimal("1"), cost_basis=Decimal("10")),
+        Transaction(account=account, asset=ordered, transaction_type=TransactionType.BUY, status=TransactionStatus.PENDING,
+                    transaction_date=MARKET_OPEN.date(), quantity=Decimal("1"), total_amount=Decimal("10")),
+        WatchlistItem(watchlist=watchlist, asset=watched),
+        WatchlistItem(watchlist=watchlist, asset=held)
+    ])
+    db.session.commit()
+    return held, ordered, watched, other
+
+def test_scheduler_refreshes_tiers_at_their_own_cadence(app, db, mocker):
+    """
+    GIVEN held, pending-order, watchlist-only and other assets during market hours
+    WHEN the scheduler runs at the open, one minute later and again after the close
+    THEN held assets should refresh every minute, watchlist-only assets once, and everything after the close
+    """
+    # ARRANGE
+    held, ordered, watched, other = _seed_tiers(db)
+    mock_update = mocker.patch('app.services.refresh_scheduler.MarketDataService.update_asset_prices')
+    scheduler = RefreshScheduler(MarketCalendar(), held_interval=60, watchlist_interval=900, nightly_time='17:00')
+
+    # ACT
+    first = scheduler.run_once(MARKET_OPEN)
+    second = scheduler.run_once(MARKET_OPEN + timedelta(seconds=61))
+    nightly = scheduler.run_once(datetime(2026, 10, 16, 21, 30, tzinfo=timezone.utc))
+    repeat = scheduler.run_once(datetime(2026, 10, 16, 22, 0, tzinfo=timezone.utc))
+
+    # ASSERT
+    calls = [sorted(call.kwargs['asset_ids']) for call in mock_update.call_args_list]
+    assert first == {'held': 2, 'watchlist': 1}
+    assert calls[0] == sorted([held.id, ordered.id])
+    assert calls[1] == [watched.id]
+    assert second == {'held': 2}
+    assert nightly == {'nightly': 4}
+    assert calls[3] == sorted([held.id, ordered.id, watched.id, other.id])
+    assert repeat == {}
+
+def test_scheduler_skips_weekends_and_holidays(app, db, mocker):
+    """
+    GIVEN assets in every tier
+    WHEN the scheduler runs on a Saturday and during session hours on Thanksgiving
+    THEN nothing should be refreshed and the daemon should sleep until the next session
+    """
+    # ARRANGE
+    _seed_tiers(db)
+    mock_update = mocker.patch('app.services.refresh_scheduler.MarketDataService.update_asset_prices')
+    scheduler = RefreshScheduler(MarketCalendar(), max_sleep=7 * 24 * 60 * 60)
+    saturday = datetime(2026, 10, 17, 15, 0, tzinfo=timezone.utc)
+
+    # ACT
+    weekend = scheduler.run_once(saturday)
+    holiday = scheduler.run_once(datetime(2026, 11, 26, 16, 0, tzinfo=timezone.utc))
+
+    # ASSERT
+    assert weekend == {} and holiday == {}
+    mock_update.assert_not_called()
+    assert scheduler.seconds_until_next(saturday) == (datetime(2026, 10, 19, 13, 30, tzinfo=timezone.utc) - saturday).total_seconds()
+
+def test_adaptive_scheduler_refreshes_most_overdue_within_budget(app, db, mocker):
+    """
+    GIVEN held and watchlist assets with adaptive intervals and a budget of one provider call per tick
+    WHEN the scheduler runs during market hours and again a minute later
+    THEN each minute should refresh one batch of the most overdue assets, never-refreshed ones first
+    """
+    # ARRANGE
+    held, ordered, watched, other = _seed_tiers(db)
+    held.price_updated_at = datetime(2026, 10, 16, 13, 0)  # an hour old at MARKET_OPEN
+    db.session.commit()
+    mock_update = mocker.patch('app.services.refresh_scheduler.MarketDataService.update_asset_prices')
+    policy = RefreshPolicy(min_interval=15, max_interval=3600, calls_per_minute=1, batch_size=2)
+    scheduler = RefreshScheduler(MarketCalendar(), held_interval=60, watchlist_interval=900, policy=policy)
+
+    # ACT
+    first = scheduler.run_once(MARKET_OPEN)
+    exhausted = scheduler.run_once(MARKET_OPEN + timedelta(seconds=15))
+    scheduler.budget = TokenBucket(1)  # the next minute's call
+    second = scheduler.run_once(MARKET_OPEN + timedelta(seconds=60))
+
+    # ASSERT
+    calls = [sorted(call.kwargs['asset_ids']) for call in mock_update.call_args_list]
+    assert first == {'adaptive': 2} and exhausted == {'adaptive': 0} and second == {'adaptive': 1}
+    assert calls[0] == sorted([ordered.id, watched.id])
+    assert calls[1] == [held.id]
+    assert other.id not in scheduler.asset_intervals
@@ -0,0 +1,105 @@
+# tests/test_services/test_summary_cache.py
+
+from decimal import Decimal
+from sqlalchemy import event
+from app.models.models import User, Portfolio, Account, Asset, Holding, AssetType
+from app.services.market_data_service import MarketDataService
+from app.services.portfolio_service import get_portfolio_summary
+
+def _count_statements(db, fn):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        result = fn()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    return result, len(statements)
+
+def test_summary_is_cached_until_funds_or_held_prices_change(client, db, mocker):
+    """
+    GIVEN two portfolios holding different assets, with their summaries already computed
+    WHEN a summary is requested again, funds are deposited, and one portfolio's asset is repriced
+    THEN repeats should be served without queries, and only the portfolios affected by each write recomputed
+    """
+    # ARRANGE
+    mocker.patch('app.services.market_data_service.index_snapshot._data', [])
+    user = User(username="test", email="test@test.com", password_hash="123")
+    first, second = Portfolio(name="First", user=user), Portfolio(name="Second", user=user)
+    first_account = Account(name="First Account", balance=Decimal("1000"), portfolio=first)
+    second_account = Account(name="Second Account", balance=Decimal("1000"), portfolio=second)
+    aapl = Asset(ticker_symbol="AAPL", name="Apple", asset_type=AssetType.STOCK, last_price=Decimal("100"), previous_close_price=Decimal("100"))
+    msft = Asset(ticker_symbol="MSFT", name="Microsoft", asset_type=AssetType.STOCK, last_price=Decimal("200"), previous_close_price=Decimal("200"))
+    db.session.add_all([user, first, second, first_account, second_account, aapl, msft,
+                        Holding(account=first_account, asset=aapl, quantity=1, cost_basis=100),
+                        Holding(account=second_account, asset=msft, quantity=1, cost_basis=200)])
+    db.session.commit()
+    first_id, second_id = first.id, second.id  # Commits expire instances; reading ids later would query.
+    get_portfolio_summary(first_id)
+    get_portfolio_summary(second_id)
+
+    # ACT
+    _, cached_queries = _count_statements(db, lambda: get_portfolio_summary(first_id))
+    client.post(f'/api/v1/accounts/{first_account.id}/funds', json={"action": "DEPOSIT", "amount": 500})
+    after_deposit, _ = get_portfolio_summary(first_id)
+    MarketDataService._write_quotes({"MSFT": msft}, {"MSFT": {"last_price": 250, "previous_close": 200}}, 100)
+    _, first_queries = _count_statements(db, lambda: get_portfolio_summary(first_id))
+    repriced, _ = get_portfolio_summary(second_id)
+
+    # ASSERT
+    assert cached_queries == 0
+    assert after_deposit['net_worth'] == 1600.0
+    assert first_queries == 0  # AAPL was not repriced, so the first portfolio keeps its cached summary.
+    assert repriced['net_worth'] == 1250.0
+    assert repriced['performance']['todays_change_amount'] == 50.0
+
+def test_summary_cache_defaults_to_shared_disk_or_off(app, tmp_path):
+    """
+    GIVEN no explicit SUMMARY_CACHE_BACKEND
+    WHEN the summary cache is configured with and without an on-disk provider cache directory
+    THEN it should use the shared disk backend in the first case and cache nothing in the second
+    """
+    # ARRANGE
+    from app.core.disk_cache import DiskCache
+    from app.services.summary_cache import summary_cache, configure_summary_cache
+    config = {**app.config, 'SUMMARY_CACHE_BACKEND': None, 'SUMMARY_CACHE_DIR': str(tmp_path)}
+
+    try:
+        # ACT
+        configure_summary_cache({**config, 'PROVIDER_RESPONSE_CACHE_DIR': str(tmp_path / 'provider')})
+        disk_backend = summary_cache.backend
+        configure_summary_cache({**config, 'PROVIDER_RESPONSE_CACHE_DIR': None})
+        summary_cache.set(1, summary_cache.version(1), ['performance'], {"net_worth": 1.0})
+        cached_when_off = summary_cache.get(1, summary_cache.version(1), ['performance'])
+    finally:
+        configure_summary_cache(app.config)
+
+    # ASSERT
+    assert isinstance(disk_backend, DiskCache)
+    assert cached_when_off is None
+
+def test_pending_order_invalidates_cached_cash_flow(db, mocker):
+    """
+    GIVEN a portfolio whose cash flow summary is cached
+    WHEN a LIMIT buy is placed, which stays pending
+    THEN the next summary should include the pending order's amount in its spending
+    """
+    # ARRANGE
+    from app.services.order_service import OrderService
+    user = User(username="test", email="test@test.com", password_hash="123")
+    portfolio = Portfolio(name="Test Portfolio", user=user)
+    account = Account(name="Primary Account", balance=Decimal("1000"), portfolio=portfolio)
+    asset = Asset(ticker_symbol="AAPL", name="Apple", asset_type=AssetType.STOCK, last_price=Decimal("100"))
+    db.session.add_all([user, portfolio, account, asset])
+    db.session.commit()
+    portfolio_id, account_id = portfolio.id, account.id
+    before, _ = get_portfolio_summary(portfolio_id, ['cash_flow'])
+
+    # ACT
+    OrderService.place_order(user.id, {"account_id": account_id, "ticker": "AAPL", "quantity": 2, "order_type": "LIMIT",
+                                       "transaction_type": "BUY", "trigger_price": 90})
+    after, _ = get_portfolio_summary(portfolio_id, ['cash_flow'])
+
+    # ASSERT
+    assert before['cash_flow']['spending'] == 0.0
+    assert after['cash_flow']['spending'] == -180.0
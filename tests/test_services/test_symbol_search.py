@@ -0,0 +1,82 @@
+# tests/test_services/test_symbol_search.py
+
+from app.models.models import SymbolListing
+from app.services.provider_registry import ProviderUnavailable, _remaining_time
+from app.services.symbol_search import SymbolSearchIndex, load_symbol_file, search_symbols
+
+ENTRIES = [
+    {"ticker": "AAPL", "name": "Apple Inc.", "exchange": "NASDAQ", "asset_type": "Stock"},
+    {"ticker": "AMZN", "name": "Amazon.com, Inc.", "exchange": "NASDAQ", "asset_type": "Stock"},
+    {"ticker": "AMD", "name": "Advanced Micro Devices, Inc.", "exchange": "NASDAQ", "asset_type": "Stock"},
+    {"ticker": "MSFT", "name": "Microsoft Corporation", "exchange": "NASDAQ", "asset_type": "Stock"},
+    {"ticker": "AA", "name": "Alcoa Corporation", "exchange": "NYSE", "asset_type": "Stock"},
+]
+
+def test_search_index_ranks_ticker_then_name_then_fuzzy():
+    """
+    GIVEN an index over a few symbols
+    WHEN it is searched by exact ticker, ticker prefix, company name and a misspelled name
+    THEN the results should be ranked exact ticker > ticker prefix > name match, with typos still found
+    """
+    # ARRANGE
+    index = SymbolSearchIndex(ENTRIES)
+
+    # ACT & ASSERT
+    assert [r['ticker'] for r in index.search("AA")][:2] == ["AA", "AAPL"]
+    assert [r['ticker'] for r in index.search("am")][:2] == ["AMD", "AMZN"]
+    assert index.search("micro dev")[0]['ticker'] == "AMD"
+    assert index.search("Microsfot")[0]['ticker'] == "MSFT"
+
+def test_load_symbol_file_and_search_without_provider(db, tmp_path, mocker):
+    """
+    GIVEN a listings CSV file
+    WHEN it is bulk-loaded and then searched by company name
+    THEN the symbols should be stored and the search answered without any provider call
+    AND an unknown exact ticker should fall back to the provider only once in any case, a lower-case
+        ticker nothing matches should be upper-cased for the provider, and a lower-case typo never reach it
+    """
+    # ARRANGE
+    listings = tmp_path / "listings.csv"
+    listings.write_text("Symbol,Security Name,Exchange\nAAPL,Apple Inc.,NASDAQ\nMSFT,Microsoft Corporation,NASDAQ\n")
+    mock_provider = mocker.patch(
+        'app.services.market_data_service.MarketDataService._hedged_profile', return_value=(None, None)
+    )
+
+    # ACT
+    count = load_symbol_file(str(listings))
+    results = search_symbols("micro")
+    search_symbols("ZZZQ")
+    search_symbols("zzzq")
+    search_symbols("tsla")
+    typo_results = search_symbols("appel")
+
+    # ASSERT
+    assert count == 2
+    assert SymbolListing.query.count() == 2
+    assert results[0]['ticker'] == "MSFT"
+    assert [c.args for c in mock_provider.call_args_list] == [("ZZZQ",), ("TSLA",)]
+    assert typo_results[0]['ticker'] == "AAPL"
+
+def test_search_provider_lookup_is_bounded_and_failures_are_not_remembered(db, mocker):
+    """
+    GIVEN an exact ticker missing from the symbol universe and an unreachable provider
+    WHEN it is searched twice
+    THEN each search should ask the providers under a request deadline and return the local results,
+         without remembering the failure as an unknown ticker
+    """
+    # ARRANGE
+    deadlines = []
+
+    def unreachable(ticker):
+        deadlines.append(_remaining_time())
+        raise ProviderUnavailable("no provider answered")
+    mocker.patch('app.services.market_data_service.MarketDataService._hedged_profile', side_effect=unreachable)
+
+    # ACT
+    first = search_symbols("ZZZQ")
+    second = search_symbols("ZZZQ")
+
+    # ASSERT
+    assert first == second == []
+    assert len(deadlines) == 2
+    assert all(remaining is not None and remaining > 0 for remaining in deadlines)
@@ -0,0 +1,73 @@
+# tests/test_services/test_update_pipeline.py
+
+import pytest
+from decimal import Decimal
+from app.models.models import Asset, AssetType, Job, JobStatus, UpdateCheckpoint
+from app.services import job_service
+
+def _seed_assets(db):
+    assets = [
+        Asset(ticker_symbol="AAPL", name="Apple Inc.", asset_type=AssetType.STOCK, last_price=Decimal("190")),
+        Asset(ticker_symbol="MSFT", name="Microsoft", asset_type=AssetType.STOCK, last_price=Decimal("400")),
+        Asset(ticker_symbol="^GSPC", name="S&P 500", asset_type=AssetType.INDEX)
+    ]
+    db.session.add_all(assets)
+    db.session.commit()
+    return assets
+
+def test_full_update_checkpoints_steps_and_resumes_failures(app, db, mocker):
+    """
+    GIVEN a full update run where no source can quote MSFT
+    WHEN the run finishes and is then resumed once MSFT can be quoted
+    THEN every other step should be checkpointed as done, the run should fail, and the resumed run
+         should only fetch the failed price step, under the same run id
+    """
+    # ARRANGE
+    aapl, msft, index = _seed_assets(db)
+    fetch_quotes = mocker.patch('app.services.market_data_service.MarketDataService._fetch_quotes',
+                                side_effect=[{"AAPL": {"last_price": 191.0, "previous_close": 189.0}}, {"MSFT": {"last_price": 401.0}}])
+    fetch_details = mocker.patch('app.services.market_data_service.MarketDataService._fetch_asset_details',
+                                 return_value=({"name": "Renamed"}, {}))
+    fetch_history = mocker.patch('app.services.market_data_service.MarketDataService._fetch_historical_data', return_value=[])
+
+    # ACT
+    job, created = job_service.enqueue_full_update(background=False)
+    checkpoints = {(c.asset_id, c.phase): c.status for c in UpdateCheckpoint.query.filter_by(run_id=job.id)}
+    resumed, resumed_created = job_service.enqueue_full_update(resume=True, background=False)
+
+    # ASSERT
+    assert created is True and job.status == JobStatus.FAILED
+    assert checkpoints[(msft.id, 'prices')] == 'failed'
+    assert checkpoints[(aapl.id, 'prices')] == 'done'
+    assert checkpoints[(index.id, 'history')] == 'done'
+    assert (index.id, 'prices') not in checkpoints
+    assert len(checkpoints) == 7
+    assert resumed_created is True and resumed.status == JobStatus.SUCCEEDED
+    assert resumed.params['run_id'] == job.id
+    assert fetch_quotes.call_args_list[1].args[0] == ["MSFT"]
+    assert fetch_details.call_count == 2 and fetch_history.call_count == 3
+    assert db.session.get(Asset, msft.id).last_price == Decimal("401.0000")
+    assert db.session.get(Asset, aapl.id).name == "Renamed"
+
+def test_full_update_runs_only_requested_phase_and_tickers(app, db, mocker):
+    """
+    GIVEN several assets
+    WHEN a full update is run for the history phase of one ticker only
+    THEN only that ticker's history should be fetched and checkpointed, and unknown phases should be rejected
+    """
+    # ARRANGE
+    aapl, _, _ = _seed_assets(db)
+    fetch_quotes = mocker.patch('app.services.market_data_service.MarketDataService._fetch_quotes')
+    fetch_history = mocker.patch('app.services.market_data_service.MarketDataService._fetch_historical_data', return_value=[])
+
+    # ACT
+    job, _ = job_service.enqueue_full_update(phases=['history'], tickers=['aapl'], background=False)
+
+    # ASSERT
+    assert job.status == JobStatus.SUCCEEDED
+    fetch_quotes.assert_not_called()
+    fetch_history.assert_called_once_with('AAPL', None)
+    assert [(c.asset_id, c.phase) for c in UpdateCheckpoint.query.all()] == [(aapl.id, 'history')]
+    assert db.session.get(Job, job.id).total == 1
+    with pytest.raises(ValueError, match="nope"):
+        job_service.enqueue_full_update(phases=['nope'])
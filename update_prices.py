@@ -1,16 +1,20 @@
 # update_prices.py
 
+import argparse
 import os
 from app import create_app
-from app.services.market_data_service import MarketDataService
-from app.models.models import Asset, AssetType
+from app.services.job_service import enqueue_full_update
+from app.services.update_pipeline import PHASES
 
-def run_full_update():
+def run_full_update(resume: bool = False, workers: int = None, only_phase: str = None, tickers: list = None):
     """
     Initializes the Flask app and runs a comprehensive market data update.
     - Updates the latest prices for all assets.
     - Updates fundamental & technical data (market cap, P/E, etc.).
     - Updates the historical price data for all assets.
+    The three phases run as one staged pipeline (see app/services/update_pipeline.py), so details and
+    history for tickers already quoted overlap with the remaining quote batches. Every finished step is
+    checkpointed: after a crash or Ctrl+C, `--resume` continues the run without redoing completed work.
     This script is intended to be run on a schedule (e.g., daily).
     """
     config_name = os.getenv('FLASK_CONFIG', 'development')
@@ -18,31 +22,33 @@ def run_full_update():
 
     with app.app_context():
         print("--- Starting Comprehensive Market Data Update ---")
+        try:
+            job, created = enqueue_full_update(
+                phases=[only_phase] if only_phase else None, tickers=tickers, workers=workers,
+                resume=resume, background=False
+            )
+        except ValueError as e:
+            print(f"Error: {e}"); return False
 
-        # 1. Update latest prices
-        print("\nStep 1: Updating latest asset prices...")
-        MarketDataService.update_asset_prices()
-        print("Latest price update finished.")
+        if not created:
+            print(f"A full update is already running as job {job.id}. A crashed run is released after "
+                  f"JOB_STALE_SECONDS without progress and can then be resumed with --resume.")
+            return False
+        print(f"\n--- Comprehensive Market Data Update {job.status.value.lower()} (job {job.id}) ---")
+        return job.status.value == 'SUCCEEDED'
 
-        # 2. Update fundamental and technical data
-        print("\nStep 2: Updating fundamental and technical data (Market Cap, P/E, etc.)...")
-        MarketDataService.update_all_asset_details()
-        print("Fundamental and technical data update finished.")
-
-        # 3. Update historical price data for all relevant assets
-        print("\nStep 3: Updating historical price data for all assets...")
-        assets_for_history = Asset.query.filter(Asset.asset_type.in_([AssetType.STOCK, AssetType.ETF, AssetType.INDEX])).all()
-        if not assets_for_history:
-            print("No assets found requiring historical data updates.")
-        else:
-            for asset in assets_for_history:
-                try:
-                    MarketDataService.update_historical_data(asset.id)
-                except Exception as e:
-                    print(f"Could not update historical data for {asset.ticker_symbol}: {e}")
-        
-        print("Historical data update finished.")
-        print("\n--- Comprehensive Market Data Update Complete ---")
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Runs a checkpointed full market data update.")
+    parser.add_argument('--resume', action='store_true', help="Continue the most recent unfinished run.")
+    parser.add_argument('--workers', type=int, help="Concurrent provider fetches across all phases (default: MARKET_DATA_MAX_WORKERS).")
+    parser.add_argument('--only-phase', choices=PHASES, help="Run a single phase.")
+    parser.add_argument('--tickers', nargs='+', help="Limit the run to these tickers (space or comma separated).")
+    args = parser.parse_args(argv)
+    if args.tickers:
+        args.tickers = [t.strip().upper() for value in args.tickers for t in value.split(',') if t.strip()]
+    return args
 
 if __name__ == '__main__':
-    run_full_update()
\ No newline at end of file
+    args = _parse_args()
+    succeeded = run_full_update(args.resume, args.workers, args.only_phase, args.tickers)
+    raise SystemExit(0 if succeeded else 1)